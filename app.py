@@ -1,12 +1,27 @@
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 import streamlit as st
-from typing import Dict
 
-# Cache the chain objects to avoid re-importing/re-initializing on every rerun
+# Threads shared by all browser sessions for question prefetching and evaluation.
+STREAMLIT_WORKERS = int(os.getenv("STREAMLIT_WORKERS", "4"))
+
+TECH_STACKS = ["Python", "JavaScript", "React", "DevOps", "SQL", "System Design", "DSA", "Cloud"]
+
+# Cache the chain objects to avoid re-importing/re-initializing on every rerun.
+# core.chain builds them lazily and thread-safely, shared with the backend.
 @st.cache_resource
 def get_chains():
-    from core.chain import generation_chain, validation_chain, evaluation_chain
-    return generation_chain, validation_chain, evaluation_chain
+    from core.chain import get_chain
+    return get_chain("generation_chain"), get_chain("validation_chain"), get_chain("evaluation_chain")
+
+# Chains are invoked on these threads so generation and evaluation don't block
+# the script: the next question is generated while the candidate is typing.
+@st.cache_resource
+def get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=STREAMLIT_WORKERS, thread_name_prefix="interview")
 
 generation_chain, validation_chain, evaluation_chain = get_chains()
 
@@ -18,27 +33,97 @@ if 'question_count' not in st.session_state:
     st.session_state.question_count = 0
 if 'interview_log' not in st.session_state:
     st.session_state.interview_log = []
-
-def get_new_interview_question(difficulty: str) -> Dict | None:
-    # Import inside function to reduce cold start
+if 'prefetch' not in st.session_state:
+    # (difficulty, tech_stack, future of generate_question) for the next question.
+    st.session_state.prefetch = None
+if 'timings' not in st.session_state:
+    st.session_state.timings = []
+
+def generate_question(difficulty: str, tech_stack: str) -> Tuple[Optional[Dict], List[str], float]:
+    """Generate and validate a question; returns (question or None, notes, seconds).
+
+    Runs on a worker thread, so it reports through ``notes`` instead of calling Streamlit.
+    """
+    started = time.perf_counter()
+    notes = []
     for attempt in range(MAX_VALIDATION_ATTEMPTS):
         try:
             generated_q = generation_chain.invoke({
-                "difficulty": difficulty
+                "difficulty": difficulty,
+                "tech_stack": tech_stack,
             })
             validation_result = validation_chain.invoke({
-                "question_text": generated_q['question_text']
+                "question_text": generated_q['question_text'],
+                "tech_stack": tech_stack,
             })
             if validation_result['is_valid']:
-                st.toast(f"Generated a new question (Attempt {attempt + 1})", icon="✅")
-                return generated_q
-            else:
-                st.warning(f"Generated question was rejected. Reason: {validation_result['reasoning']}. Retrying...")
+                notes.append(f"Generated a new question (Attempt {attempt + 1})")
+                return generated_q, notes, time.perf_counter() - started
+            notes.append(f"Generated question was rejected. Reason: {validation_result['reasoning']}. Retrying...")
         except Exception as e:
-            st.error(f"An error occurred during question generation/validation: {e}")
-            continue
-    st.error("Failed to generate a valid question after multiple attempts. Please try different parameters.")
-    return None
+            notes.append(f"An error occurred during question generation/validation: {e}")
+    notes.append("Failed to generate a valid question after multiple attempts. Please try different parameters.")
+    return None, notes, time.perf_counter() - started
+
+def prefetch_question(difficulty: str, tech_stack: str) -> None:
+    """Start generating the next question in the background unless one is already on its way.
+
+    A prefetch for other controls is dropped if it hasn't started yet or has
+    finished. One that is already running can't be stopped, so it is left to
+    finish and replaced on a later rerun instead of piling up more LLM calls.
+    """
+    prefetch = st.session_state.prefetch
+    if prefetch is not None and prefetch[:2] == (difficulty, tech_stack):
+        return
+    if prefetch is not None and not prefetch[2].cancel() and not prefetch[2].done():
+        return
+    future = get_executor().submit(generate_question, difficulty, tech_stack)
+    st.session_state.prefetch = (difficulty, tech_stack, future)
+
+def get_new_interview_question(difficulty: str, tech_stack: str) -> Dict | None:
+    """The prefetched question if it matches the controls (waiting for it if needed), else a fresh one."""
+    started = time.perf_counter()
+    prefetch, st.session_state.prefetch = st.session_state.prefetch, None
+    if prefetch is not None and prefetch[:2] == (difficulty, tech_stack):
+        source = "prefetched" if prefetch[2].done() else "prefetch in progress"
+        future: Future = prefetch[2]
+    else:
+        # The candidate is waiting, so generate now; a stale prefetch that is
+        # already running can't be cancelled and its result is simply wasted.
+        if prefetch is not None:
+            prefetch[2].cancel()
+        source = "generated on demand"
+        future = get_executor().submit(generate_question, difficulty, tech_stack)
+    with st.spinner("Preparing the next question..."):
+        question, notes, generation_seconds = future.result()
+    wait_seconds = time.perf_counter() - started
+
+    for note in notes[:-1]:
+        st.warning(note)
+    if question is None:
+        st.error(notes[-1])
+        return None
+    st.toast(notes[-1], icon="✅")
+    st.session_state.timings.append(
+        f"Q{st.session_state.question_count + 1}: ready in {wait_seconds * 1000:.0f} ms "
+        f"({source}; generation took {generation_seconds:.1f} s)"
+    )
+    return question
+
+def evaluate_answer(question_text: str, answer: str, tech_stack: str) -> Tuple[Dict, float]:
+    started = time.perf_counter()
+    result = evaluation_chain.invoke({
+        "question": question_text,
+        "answer": answer,
+        "tech_stack": tech_stack,
+    })
+    return result, time.perf_counter() - started
+
+def show_log_entry(container, index: int, log: Dict) -> None:
+    container.write(f"**Q{index + 1}: {log['question']['question_text']}**")
+    container.write(f"**Your Answer:** {log['answer']}")
+    container.success(f"**Assessment:** {log['feedback']['overall_assessment']}")
+    container.write("---")
 
 st.set_page_config(layout="wide")
 st.title("Dynamic AI Technical Interviewer")
@@ -46,19 +131,23 @@ st.markdown("This AI generates unique questions on the fly and evaluates your an
 
 with st.sidebar:
     st.header("Interview Controls")
+    tech_stack = st.selectbox("Choose a tech stack:", TECH_STACKS)
     difficulty = st.selectbox("Choose a difficulty:", ["Easy", "Medium", "Hard"])
 
     if st.button("Start New Interview / Get New Question"):
-        st.session_state.current_question = get_new_interview_question(difficulty)
+        st.session_state.current_question = get_new_interview_question(difficulty, tech_stack)
         st.session_state.question_count += 1
 
 st.divider()
 
+evaluation = None
 if not st.session_state.current_question:
     st.info("Click 'Start New Interview' in the sidebar to begin.")
 else:
     current_q = st.session_state.current_question
-    
+    # The question is on screen: generate the next one while the candidate answers.
+    prefetch_question(difficulty, tech_stack)
+
     progress_text = f"Question #{st.session_state.question_count}"
     st.subheader(progress_text)
     st.info(f"**Difficulty:** {current_q['difficulty']}")
@@ -73,43 +162,60 @@ else:
         submit_button = st.form_submit_button(label='Submit Answer for Evaluation')
 
     if submit_button and user_answer.strip():
-        with st.spinner("AI is evaluating your answer..."):
-            try:
-                evaluation_result = evaluation_chain.invoke({
-                    "question": current_q['question_text'],
-                    "answer": user_answer
-                })
-                
-                st.session_state.interview_log.append({
-                    "question": current_q,
-                    "answer": user_answer,
-                    "feedback": evaluation_result
-                })
-
-                st.subheader("Evaluation Feedback")
-                st.success(f"**Overall Assessment:** {evaluation_result['overall_assessment']}")
-                
-                col1, col2, col3 = st.columns(3)
-                # Clamp scores to 0-5 and display as 0/5 to 5/5
-                score_correctness = max(0, min(5, int(evaluation_result.get('score_correctness', 0))))
-                score_efficiency = max(0, min(5, int(evaluation_result.get('score_efficiency', 0))))
-                score_clarity = max(0, min(5, int(evaluation_result.get('score_clarity', 0))))
-                col1.metric("Correctness", f"{score_correctness}/5", delta=None, delta_color="off")
-                col2.metric("Efficiency", f"{score_efficiency}/5", delta=None, delta_color="off")
-                col3.metric("Clarity", f"{score_clarity}/5", delta=None, delta_color="off")
-
-                st.info(f"**Detailed Feedback:**\n\n{evaluation_result['feedback']}")
-
-            except Exception as e:
-                st.error(f"An error occurred during evaluation: {e}")
+        # Evaluate on a worker thread while the history below is rendered; the
+        # result is filled into this placeholder afterwards.
+        evaluation = (
+            get_executor().submit(evaluate_answer, current_q['question_text'], user_answer, tech_stack),
+            st.empty(),
+            current_q,
+            user_answer,
+        )
     elif submit_button:
         st.warning("Please provide an answer before submitting.")
 
-if st.session_state.interview_log:
+history = None
+if st.session_state.interview_log or evaluation is not None:
     st.divider()
-    with st.expander("Show Full Interview History"):
-        for i, log in enumerate(st.session_state.interview_log):
-            st.write(f"**Q{i+1}: {log['question']['question_text']}**")
-            st.write(f"**Your Answer:** {log['answer']}")
-            st.success(f"**Assessment:** {log['feedback']['overall_assessment']}")
-            st.write("---")
+    history = st.expander("Show Full Interview History")
+    for i, log in enumerate(st.session_state.interview_log):
+        show_log_entry(history, i, log)
+
+if evaluation is not None:
+    future, placeholder, current_q, user_answer = evaluation
+    with placeholder.container():
+        try:
+            with st.spinner("AI is evaluating your answer..."):
+                evaluation_result, evaluation_seconds = future.result()
+
+            st.session_state.interview_log.append({
+                "question": current_q,
+                "answer": user_answer,
+                "feedback": evaluation_result
+            })
+            st.session_state.timings.append(
+                f"Q{st.session_state.question_count}: evaluated in {evaluation_seconds:.1f} s"
+            )
+
+            st.subheader("Evaluation Feedback")
+            st.success(f"**Overall Assessment:** {evaluation_result['overall_assessment']}")
+
+            col1, col2, col3 = st.columns(3)
+            # Clamp scores to 0-5 and display as 0/5 to 5/5
+            score_correctness = max(0, min(5, int(evaluation_result.get('score_correctness', 0))))
+            score_efficiency = max(0, min(5, int(evaluation_result.get('score_efficiency', 0))))
+            score_clarity = max(0, min(5, int(evaluation_result.get('score_clarity', 0))))
+            col1.metric("Correctness", f"{score_correctness}/5", delta=None, delta_color="off")
+            col2.metric("Efficiency", f"{score_efficiency}/5", delta=None, delta_color="off")
+            col3.metric("Clarity", f"{score_clarity}/5", delta=None, delta_color="off")
+
+            st.info(f"**Detailed Feedback:**\n\n{evaluation_result['feedback']}")
+            show_log_entry(history, len(st.session_state.interview_log) - 1, st.session_state.interview_log[-1])
+
+        except Exception as e:
+            st.error(f"An error occurred during evaluation: {e}")
+
+if st.session_state.timings:
+    with st.sidebar:
+        st.subheader("Timings")
+        for timing in reversed(st.session_state.timings[-10:]):
+            st.caption(timing)
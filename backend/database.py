@@ -1,10 +1,69 @@
 import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./interview_v2.db")
 
-engine = create_async_engine(SQLALCHEMY_DATABASE_URL, echo=False)
+# "auto" picks "sqlite" for SQLite URLs and "server" for anything else;
+# "basic" keeps SQLAlchemy's defaults.
+DB_ENGINE_PROFILE = os.getenv("DB_ENGINE_PROFILE", "auto")
+ENGINE_PROFILES = ("auto", "basic", "sqlite", "server")
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Recycle before typical server/proxy idle timeouts drop the connection.
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+
+def resolve_profile(url: str, profile: str = DB_ENGINE_PROFILE) -> str:
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_ENGINE_PROFILE {profile!r}, expected one of {ENGINE_PROFILES}")
+    if profile == "auto":
+        return "sqlite" if make_url(url).get_backend_name() == "sqlite" else "server"
+    return profile
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers proceed during a write and makes commits a single
+    # append; NORMAL sync is durable across app crashes in WAL mode.
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def create_engine_for_profile(url: str = SQLALCHEMY_DATABASE_URL, profile: str = DB_ENGINE_PROFILE, **kwargs):
+    """Create the async engine tuned for the given profile."""
+    profile = resolve_profile(url, profile)
+    options = {"echo": False}
+    if profile == "server":
+        options.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    options.update(kwargs)
+
+    new_engine = create_async_engine(url, **options)
+    if profile == "sqlite":
+        event.listen(new_engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return new_engine
+
+
+engine = create_engine_for_profile()
 
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
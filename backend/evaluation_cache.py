@@ -0,0 +1,199 @@
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+
+import xxhash
+from sqlalchemy import delete, select
+
+from core.prompts import EVALUATION_PROMPT_TEMPLATE
+from .database import AsyncSessionLocal
+from .models import EvaluationCacheEntry
+
+logger = logging.getLogger(__name__)
+
+EVALUATION_CACHE_ENABLED = os.getenv("EVALUATION_CACHE_ENABLED", "true").lower() in {"1", "true", "yes"}
+EVALUATION_CACHE_MEMORY_SIZE = int(os.getenv("EVALUATION_CACHE_MEMORY_SIZE", "1024"))
+EVALUATION_CACHE_MAX_ROWS = int(os.getenv("EVALUATION_CACHE_MAX_ROWS", "100000"))
+# Seconds an evaluation stays reusable; defaults to a week.
+EVALUATION_CACHE_TTL = float(os.getenv("EVALUATION_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+# Trim the persistent table every this many stores.
+TRIM_EVERY = 200
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form so trivially different answers share a key."""
+    return _WHITESPACE.sub(" ", (text or "").casefold()).strip().rstrip(".!?").strip()
+
+
+@lru_cache(maxsize=None)
+def prompt_version() -> str:
+    """Hash of what the evaluator is sent and who answers: the template, the
+    format instructions of the output mode, and the model.
+
+    Changing any of them changes the version and therefore every key. Computed
+    on first use, since the format instructions come from LangChain's parsers.
+    """
+    from core.chain import LLM_BACKEND, LLM_MODEL, create_output_parser
+    from core.parsers import InterviewEvaluation
+    format_instructions = create_output_parser(InterviewEvaluation).get_format_instructions()
+    return xxhash.xxh3_64_hexdigest("\x1f".join((
+        EVALUATION_PROMPT_TEMPLATE, format_instructions, LLM_BACKEND, LLM_MODEL,
+    )))
+
+
+def evaluation_cache_key(question_text: str, user_answer: str, tech_stack: str,
+                         version: Optional[str] = None) -> str:
+    payload = "\x1f".join((
+        version or prompt_version(),
+        normalize_text(tech_stack),
+        normalize_text(question_text),
+        normalize_text(user_answer),
+    ))
+    return xxhash.xxh3_128_hexdigest(payload.encode("utf-8"))
+
+
+class EvaluationCache:
+    """Content-addressed cache of evaluations.
+
+    A bounded in-process LRU sits in front of the ``evaluation_cache`` table so
+    hot answers ("I don't know", pasted reference answers) are served without a
+    database round-trip, and everything else survives restarts. Cache failures
+    are never fatal: the caller simply evaluates with the LLM.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, memory_size: int = EVALUATION_CACHE_MEMORY_SIZE,
+                 ttl: float = EVALUATION_CACHE_TTL, max_rows: int = EVALUATION_CACHE_MAX_ROWS,
+                 enabled: bool = EVALUATION_CACHE_ENABLED):
+        self._session_factory = session_factory
+        self.memory_size = memory_size
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self.enabled = enabled
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stores_since_trim = 0
+
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.errors = 0
+
+    def _remember(self, key: str, evaluation: dict, stored_at: float) -> None:
+        if self.memory_size <= 0:
+            return
+        self._memory[key] = (stored_at, evaluation)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    async def get(self, question_text: str, user_answer: str, tech_stack: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        key = evaluation_cache_key(question_text, user_answer, tech_stack)
+        now = time.time()
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            stored_at, evaluation = entry
+            if now - stored_at <= self.ttl:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return dict(evaluation)
+            del self._memory[key]
+
+        try:
+            async with self._session_factory() as db:
+                row = await db.get(EvaluationCacheEntry, key)
+        except Exception as e:
+            logger.warning("Error reading evaluation cache: %r", e)
+            self.errors += 1
+            row = None
+
+        if row is not None and row.prompt_version == prompt_version():
+            age = (datetime.utcnow() - row.created_at).total_seconds() if row.created_at else self.ttl + 1
+            if age <= self.ttl:
+                self._remember(key, row.evaluation, now - age)
+                self.db_hits += 1
+                return dict(row.evaluation)
+
+        self.misses += 1
+        return None
+
+    async def set(self, question_text: str, user_answer: str, tech_stack: str, evaluation: dict) -> None:
+        if not self.enabled:
+            return
+        key = evaluation_cache_key(question_text, user_answer, tech_stack)
+        self._remember(key, dict(evaluation), time.time())
+        self.stores += 1
+        try:
+            async with self._session_factory() as db:
+                await db.merge(EvaluationCacheEntry(
+                    key=key,
+                    prompt_version=prompt_version(),
+                    evaluation=evaluation,
+                    created_at=datetime.utcnow(),
+                ))
+                await db.commit()
+        except Exception as e:
+            logger.warning("Error writing evaluation cache: %r", e)
+            self.errors += 1
+            return
+
+        self._stores_since_trim += 1
+        if self._stores_since_trim >= TRIM_EVERY:
+            self._stores_since_trim = 0
+            await self.purge_stale()
+
+    async def purge_stale(self) -> None:
+        """Drop rows from older prompt versions, past their TTL, or beyond max_rows."""
+        if not self.enabled:
+            return
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+        try:
+            async with self._session_factory() as db:
+                await db.execute(
+                    delete(EvaluationCacheEntry).where(
+                        (EvaluationCacheEntry.prompt_version != prompt_version())
+                        | (EvaluationCacheEntry.created_at < cutoff)
+                    )
+                )
+                overflow = (
+                    select(EvaluationCacheEntry.key)
+                    .order_by(EvaluationCacheEntry.created_at.desc())
+                    .offset(self.max_rows)
+                )
+                await db.execute(delete(EvaluationCacheEntry).where(EvaluationCacheEntry.key.in_(overflow)))
+                await db.commit()
+        except Exception as e:
+            logger.warning("Error purging evaluation cache: %r", e)
+            self.errors += 1
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        hits = self.memory_hits + self.db_hits
+        return {
+            "enabled": self.enabled,
+            "prompt_version": prompt_version(),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "errors": self.errors,
+            "memory_entries": len(self._memory),
+            "memory_size": self.memory_size,
+            "max_rows": self.max_rows,
+            "ttl": self.ttl,
+        }
+
+
+evaluation_cache = EvaluationCache()
@@ -0,0 +1,125 @@
+"""Streaming NDJSON export of sessions with their questions and answers.
+
+One ordered outer-join query is read through a server-side cursor
+(``yield_per``), and rows are folded into one JSON line per session as they
+arrive, so memory holds a single session and one output chunk no matter
+how large the export is.
+"""
+import json
+import os
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+import zstandard
+from sqlalchemy import select
+
+from .database import engine
+from .models import InterviewSession, Question, Answer, evaluation_json, load_feedback
+
+# Rows fetched from the database cursor at a time.
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))
+# Output is sent in chunks of about this many bytes (before compression).
+EXPORT_FLUSH_BYTES = int(os.getenv("EXPORT_FLUSH_BYTES", str(64 * 1024)))
+EXPORT_ZSTD_LEVEL = int(os.getenv("EXPORT_ZSTD_LEVEL", "3"))
+
+SESSION_COLUMNS = (
+    InterviewSession.id, InterviewSession.created_at, InterviewSession.difficulty, InterviewSession.tech_stack,
+)
+QUESTION_COLUMNS = (Question.id, Question.question_text, Question.difficulty, Question.created_at)
+ANSWER_COLUMNS = (
+    Answer.id, Answer.user_answer, Answer.status, Answer.score_correctness, Answer.score_efficiency,
+    Answer.score_clarity, Answer.overall_assessment, Answer.created_at,
+)
+
+
+def export_query(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 tech_stack: Optional[str] = None, include_feedback: bool = True):
+    """Sessions (created in [since, until)) joined with their questions and answers, in export order."""
+    columns = [*SESSION_COLUMNS, *QUESTION_COLUMNS, *ANSWER_COLUMNS]
+    if include_feedback:
+        columns += [Answer.feedback_zstd, Answer.legacy_feedback_json]
+    query = (
+        select(*columns)
+        .outerjoin(Question, Question.session_id == InterviewSession.id)
+        .outerjoin(Answer, Answer.question_id == Question.id)
+        .order_by(InterviewSession.created_at, InterviewSession.id, Question.created_at, Question.id,
+                  Answer.created_at, Answer.id)
+    )
+    if since is not None:
+        query = query.where(InterviewSession.created_at >= since)
+    if until is not None:
+        query = query.where(InterviewSession.created_at < until)
+    if tech_stack is not None:
+        query = query.where(InterviewSession.tech_stack == tech_stack)
+    return query.execution_options(yield_per=EXPORT_CHUNK_ROWS)
+
+
+# Row layout of export_query: session columns, question columns, answer columns (+ the two feedback columns).
+SESSION_KEYS = tuple(column.key for column in SESSION_COLUMNS)
+QUESTION_KEYS = tuple(column.key for column in QUESTION_COLUMNS)
+ANSWER_KEYS = tuple(column.key for column in ANSWER_COLUMNS)
+QUESTION_START = len(SESSION_KEYS)
+ANSWER_START = QUESTION_START + len(QUESTION_KEYS)
+FEEDBACK_START = ANSWER_START + len(ANSWER_KEYS)
+
+
+async def export_sessions(query) -> AsyncIterator[dict]:
+    """Yield one dict per session, with ``questions`` and their ``answers`` nested."""
+    session = question = None
+    async with engine.connect() as connection:
+        result = await connection.stream(query)
+        async for rows in result.partitions():
+            for row in rows:
+                if session is None or row[0] != session["id"]:
+                    if session is not None:
+                        yield session
+                    session = dict(zip(SESSION_KEYS, row))
+                    session["questions"] = []
+                    question = None
+                if row[QUESTION_START] is None:
+                    continue
+                if question is None or row[QUESTION_START] != question["id"]:
+                    question = dict(zip(QUESTION_KEYS, row[QUESTION_START:ANSWER_START]))
+                    question["answers"] = []
+                    session["questions"].append(question)
+                if row[ANSWER_START] is not None:
+                    answer = dict(zip(ANSWER_KEYS, row[ANSWER_START:FEEDBACK_START]))
+                    if len(row) > FEEDBACK_START:
+                        answer["feedback_json"] = evaluation_json(
+                            answer["score_correctness"], answer["score_efficiency"], answer["score_clarity"],
+                            answer["overall_assessment"], load_feedback(*row[FEEDBACK_START:]),
+                        )
+                    question["answers"].append(answer)
+    if session is not None:
+        yield session
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+async def ndjson_chunks(records: AsyncIterator[dict], compress: bool = False,
+                        flush_bytes: int = EXPORT_FLUSH_BYTES) -> AsyncIterator[bytes]:
+    """Encode records as NDJSON in ~``flush_bytes`` chunks, optionally as one zstd stream.
+
+    Each compressed chunk ends on a zstd block boundary, so clients can
+    decompress the export as it arrives.
+    """
+    compressor = zstandard.ZstdCompressor(level=EXPORT_ZSTD_LEVEL).compressobj() if compress else None
+    buffer = bytearray()
+    async for record in records:
+        buffer += json.dumps(record, separators=(",", ":"), default=_encode).encode()
+        buffer += b"\n"
+        if len(buffer) >= flush_bytes:
+            if compressor is None:
+                yield bytes(buffer)
+            else:
+                yield compressor.compress(bytes(buffer)) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            buffer.clear()
+    if compressor is None:
+        if buffer:
+            yield bytes(buffer)
+    else:
+        yield compressor.compress(bytes(buffer)) + compressor.flush()
@@ -0,0 +1,90 @@
+"""ETags, conditional GET and an in-process response cache for session reads.
+
+A session's ETag is derived from its ``version`` and ``updated_at``, which
+every write to the session, its questions or its answers bumps
+(``InterviewSession.touch``). Reading them is a single-row lookup, so a
+client that already has the current representation gets a 304 without any
+questions being loaded, and a representation this process has already
+rendered is served from memory.
+"""
+import os
+from collections import OrderedDict
+from typing import Optional
+
+import xxhash
+from fastapi import Request, Response
+
+# Rendered responses kept in memory.
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "512"))
+# Clients may store session reads but must revalidate them (with If-None-Match) before reuse.
+SESSION_CACHE_CONTROL = os.getenv("SESSION_CACHE_CONTROL", "private, no-cache")
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag for a representation identified by ``parts``."""
+    return '"' + xxhash.xxh3_64_hexdigest("\x1f".join(map(str, parts)).encode()) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an ``If-None-Match`` header lists ``etag`` (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class ResponseCache:
+    """Bounded LRU of rendered JSON bodies keyed by ETag.
+
+    The ETag already encodes the version, so entries never need invalidating:
+    a write changes the ETag and the old entry simply ages out.
+    """
+
+    def __init__(self, size: int = SESSION_CACHE_SIZE, cache_control: str = SESSION_CACHE_CONTROL):
+        self.size = size
+        self.cache_control = cache_control
+        self._bodies: "OrderedDict[str, bytes]" = OrderedDict()
+
+        self.not_modified = 0
+        self.hits = 0
+        self.misses = 0
+
+    def headers(self, etag: str) -> dict:
+        return {"ETag": etag, "Cache-Control": self.cache_control}
+
+    def lookup(self, request: Request, etag: str) -> Optional[Response]:
+        """A 304 if the client has ``etag``, the cached body if this process has it, else None."""
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=self.headers(etag))
+        body = self._bodies.get(etag)
+        if body is None:
+            self.misses += 1
+            return None
+        self._bodies.move_to_end(etag)
+        self.hits += 1
+        return Response(content=body, media_type="application/json", headers=self.headers(etag))
+
+    def store(self, etag: str, body: bytes) -> Response:
+        """Cache a freshly rendered body and return it as the response."""
+        if self.size > 0:
+            self._bodies[etag] = body
+            self._bodies.move_to_end(etag)
+            while len(self._bodies) > self.size:
+                self._bodies.popitem(last=False)
+        return Response(content=body, media_type="application/json", headers=self.headers(etag))
+
+    def stats(self) -> dict:
+        lookups = self.not_modified + self.hits + self.misses
+        return {
+            "size": len(self._bodies),
+            "max_size": self.size,
+            "not_modified": self.not_modified,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.not_modified + self.hits) / lookups if lookups else 0.0,
+        }
+
+
+session_responses = ResponseCache()
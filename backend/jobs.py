@@ -0,0 +1,399 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import and_, or_, select, update
+
+from .database import AsyncSessionLocal
+from .llm_gateway import GatewayError
+from .models import (
+    Answer, EvaluationJob, InterviewSession, Question,
+    ANSWER_FAILED, ANSWER_PENDING, JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING,
+)
+from .services import interview_service
+
+logger = logging.getLogger(__name__)
+
+# Concurrent evaluations run by this process.
+EVALUATION_WORKERS = int(os.getenv("EVALUATION_WORKERS", "4"))
+EVALUATION_JOB_MAX_ATTEMPTS = int(os.getenv("EVALUATION_JOB_MAX_ATTEMPTS", "3"))
+# Seconds before a failed evaluation is retried.
+EVALUATION_JOB_RETRY_DELAY = float(os.getenv("EVALUATION_JOB_RETRY_DELAY", "5"))
+# A job left "running" for longer than this (e.g. the process died) is picked up again.
+# Workers renew the lease of jobs they are still evaluating every third of it.
+EVALUATION_JOB_LEASE = float(os.getenv("EVALUATION_JOB_LEASE", "300"))
+# Seconds evaluations already running get to finish when the process stops; the
+# rest are handed back to the queue rather than waiting out their lease.
+EVALUATION_DRAIN_TIMEOUT = float(os.getenv("EVALUATION_DRAIN_TIMEOUT", "10"))
+
+# (session, answer, evaluation) -> None; fills in the answer and the session's rolling scores.
+ApplyEvaluation = Callable[[InterviewSession, Answer, dict], None]
+
+
+class EvaluationJobQueue:
+    """In-process workers for answers submitted with ``mode=async``.
+
+    The evaluation_jobs table is the source of truth: a job row is committed
+    with its pending answer, and only its id travels through the in-memory
+    queue. Workers claim a job with a conditional UPDATE, so a job is never
+    evaluated twice even if several processes recovered it, and no DB session
+    is held while the LLM is working. A claim is identified by the job's
+    ``started_at``, which the worker renews while it evaluates; the result is
+    only stored if the claim still holds, so a run that lost its lease never
+    scores the answer a second time. On startup queued jobs are enqueued
+    again, and running jobs whose lease expired are, on startup and every half
+    lease, queued again by whichever process sees them first. On stop, running
+    jobs are drained for up to ``drain_timeout`` seconds and the unfinished
+    ones released, so the next process to start picks them up immediately.
+    """
+
+    def __init__(
+        self,
+        evaluate: Callable[[str, str, str], Awaitable[dict]],
+        workers: int = EVALUATION_WORKERS,
+        max_attempts: int = EVALUATION_JOB_MAX_ATTEMPTS,
+        retry_delay: float = EVALUATION_JOB_RETRY_DELAY,
+        lease: float = EVALUATION_JOB_LEASE,
+        drain_timeout: float = EVALUATION_DRAIN_TIMEOUT,
+    ):
+        self._evaluate = evaluate
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease = lease
+        self.drain_timeout = drain_timeout
+
+        self._apply: Optional[ApplyEvaluation] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._sweeper: Optional[asyncio.Task] = None
+        # Workers between taking a job id and finishing it, and the jobs this
+        # process claimed, with the started_at that identifies each claim.
+        self._busy: Set[asyncio.Task] = set()
+        self._claimed: Dict[int, datetime] = {}
+        self._stopping = False
+        self._retries: Dict[int, asyncio.TimerHandle] = {}
+        self._waiters: Dict[int, Set[asyncio.Event]] = {}
+
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.recovered = 0
+        self.released = 0
+        self.lost_leases = 0
+
+    async def start(self, apply: ApplyEvaluation) -> None:
+        self._apply = apply
+        self._queue = asyncio.Queue()
+        self._stopping = False
+        await self._recover_expired()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(EvaluationJob.id).where(EvaluationJob.status == JOB_QUEUED).order_by(EvaluationJob.id)
+            )
+            job_ids = result.scalars().all()
+        for job_id in job_ids:
+            self._queue.put_nowait(job_id)
+        self.recovered += len(job_ids)
+        if job_ids:
+            logger.info("Re-enqueued %d pending evaluation jobs", len(job_ids))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._sweeper = asyncio.create_task(self._sweep())
+
+    async def _recover_expired(self) -> List[int]:
+        """Queue again running jobs whose lease expired (their process died); returns their ids.
+
+        The conditional UPDATE ... RETURNING hands each job to exactly one process.
+        """
+        stale = datetime.utcnow() - timedelta(seconds=self.lease)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(EvaluationJob)
+                .where(EvaluationJob.status == JOB_RUNNING, EvaluationJob.started_at < stale)
+                .values(status=JOB_QUEUED)
+                .returning(EvaluationJob.id)
+            )
+            job_ids = result.scalars().all()
+            await db.commit()
+        return job_ids
+
+    async def _sweep(self) -> None:
+        """Recover expired leases every half lease, not only when a process starts.
+
+        Under several workers a killed worker is replaced within seconds, before
+        its jobs' leases run out, so the startup check alone would leave them running.
+        """
+        while True:
+            await asyncio.sleep(self.lease / 2)
+            try:
+                job_ids = await self._recover_expired()
+            except Exception as e:
+                logger.warning("Error recovering expired evaluation jobs: %r", e)
+                continue
+            for job_id in job_ids:
+                self.enqueue(job_id)
+            self.recovered += len(job_ids)
+            if job_ids:
+                logger.info("Re-enqueued %d evaluation jobs whose lease expired", len(job_ids))
+
+    async def stop(self) -> None:
+        """Stop the workers; unfinished jobs stay in the table, queued, for the next start.
+
+        Idle workers stop at once, busy ones get ``drain_timeout`` seconds to
+        finish their current job.
+        """
+        self._stopping = True
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        for handle in self._retries.values():
+            handle.cancel()
+        self._retries.clear()
+        for task in self._tasks:
+            if task not in self._busy:
+                task.cancel()
+        busy = [task for task in self._tasks if task in self._busy]
+        if busy and self.drain_timeout > 0:
+            logger.info("Draining %d running evaluation jobs", len(busy))
+            await asyncio.wait(busy, timeout=self.drain_timeout)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._claimed:
+            await self._release(self._claimed)
+            self._claimed.clear()
+
+    async def _release(self, claims: Dict[int, datetime]) -> None:
+        """Put jobs this process claimed but didn't finish back in the queue, refunding the attempt."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(EvaluationJob)
+                .where(
+                    EvaluationJob.status == JOB_RUNNING,
+                    or_(*(
+                        and_(EvaluationJob.id == job_id, EvaluationJob.started_at == started_at)
+                        for job_id, started_at in claims.items()
+                    )),
+                )
+                .values(status=JOB_QUEUED, attempts=EvaluationJob.attempts - 1, started_at=None)
+            )
+            await db.commit()
+        self.released += result.rowcount
+        logger.info("Released %d unfinished evaluation jobs", result.rowcount)
+
+    def enqueue(self, job_id: int) -> None:
+        self._retries.pop(job_id, None)
+        if self._queue is not None:
+            self._queue.put_nowait(job_id)
+
+    def _enqueue_later(self, job_id: int, delay: float) -> None:
+        self._retries[job_id] = asyncio.get_running_loop().call_later(delay, self.enqueue, job_id)
+
+    async def wait(self, answer_id: int, timeout: float) -> None:
+        """Wait up to ``timeout`` seconds for this process to finish the answer's job."""
+        event = asyncio.Event()
+        waiters = self._waiters.setdefault(answer_id, set())
+        waiters.add(event)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            waiters.discard(event)
+            if not waiters and self._waiters.get(answer_id) is waiters:
+                del self._waiters[answer_id]
+
+    def _notify(self, answer_id: int) -> None:
+        for event in self._waiters.pop(answer_id, ()):
+            event.set()
+
+    async def _worker(self) -> None:
+        task = asyncio.current_task()
+        while not self._stopping:
+            job_id = await self._queue.get()
+            self._busy.add(task)
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.warning("Error running evaluation job %s: %r", job_id, e)
+            finally:
+                self._busy.discard(task)
+                self._queue.task_done()
+
+    async def _claim(self, job_id: int):
+        """Mark the job running and return (answer_id, user_answer, question_text, tech_stack, started_at), or None."""
+        started_at = datetime.utcnow()
+        async with AsyncSessionLocal() as db:
+            claimed = await db.execute(
+                update(EvaluationJob)
+                .where(EvaluationJob.id == job_id, EvaluationJob.status == JOB_QUEUED)
+                .values(status=JOB_RUNNING, attempts=EvaluationJob.attempts + 1, started_at=started_at)
+            )
+            if claimed.rowcount != 1:
+                return None
+            result = await db.execute(
+                select(EvaluationJob.answer_id, Answer.user_answer, Question.question_text,
+                       InterviewSession.tech_stack)
+                .join(Answer, Answer.id == EvaluationJob.answer_id)
+                .join(Question, Question.id == Answer.question_id)
+                .join(InterviewSession, InterviewSession.id == Question.session_id)
+                .where(EvaluationJob.id == job_id)
+            )
+            row = result.first()
+            if row is None:
+                # The answer or its question is gone; retrying would fail the same way.
+                await db.execute(
+                    update(EvaluationJob)
+                    .where(EvaluationJob.id == job_id)
+                    .values(status=JOB_FAILED, finished_at=started_at, error="Answer or question not found")
+                )
+                await db.commit()
+                logger.warning("Evaluation job %s has no answer or question, marked failed", job_id)
+                self.failed += 1
+                return None
+            await db.commit()
+            return (*row, started_at)
+
+    async def _hold_lease(self, job_id: int, done: asyncio.Event) -> None:
+        """Renew the job's lease every third of a lease until ``done`` is set or the lease is lost."""
+        while True:
+            try:
+                await asyncio.wait_for(done.wait(), self.lease / 3)
+                return
+            except asyncio.TimeoutError:
+                pass
+            renewed_at = datetime.utcnow()
+            try:
+                async with AsyncSessionLocal() as db:
+                    result = await db.execute(
+                        update(EvaluationJob)
+                        .where(EvaluationJob.id == job_id, EvaluationJob.status == JOB_RUNNING,
+                               EvaluationJob.started_at == self._claimed[job_id])
+                        .values(started_at=renewed_at)
+                    )
+                    await db.commit()
+            except Exception as e:
+                logger.warning("Could not renew the lease of evaluation job %s: %r", job_id, e)
+                continue
+            if result.rowcount != 1:
+                return
+            self._claimed[job_id] = renewed_at
+
+    async def _evaluate_holding_lease(self, job_id: int, question_text: str, user_answer: str,
+                                      tech_stack: str) -> dict:
+        done = asyncio.Event()
+        heartbeat = asyncio.create_task(self._hold_lease(job_id, done))
+        try:
+            return await self._evaluate(question_text, user_answer, tech_stack)
+        finally:
+            # Let a renewal in flight complete, so _claimed holds the started_at in the database.
+            done.set()
+            await heartbeat
+
+    async def _run(self, job_id: int) -> None:
+        claimed = await self._claim(job_id)
+        if claimed is None:
+            return
+        _, user_answer, question_text, tech_stack, self._claimed[job_id] = claimed
+
+        try:
+            try:
+                evaluation = await self._evaluate_holding_lease(job_id, question_text, user_answer, tech_stack)
+            except GatewayError as e:
+                # Shed by the LLM gateway: not the job's fault, so it doesn't use up an attempt.
+                await self._finish(job_id, retry_after=max(self.retry_delay, e.retry_after), error=str(e),
+                                   refund_attempt=True)
+            except Exception as e:
+                logger.warning("Evaluation job %s failed: %r", job_id, e)
+                await self._finish(job_id, retry_after=self.retry_delay, error=str(e))
+            else:
+                await self._finish(job_id, evaluation=evaluation)
+        except Exception as e:
+            # The outcome couldn't be stored (e.g. the database was busy): hand the job back and retry it.
+            logger.warning("Could not finish evaluation job %s: %r", job_id, e)
+            try:
+                await self._release({job_id: self._claimed[job_id]})
+            except Exception as release_error:
+                logger.warning("Could not release evaluation job %s, its lease will expire: %r",
+                               job_id, release_error)
+            else:
+                self._enqueue_later(job_id, self.retry_delay)
+        # Not on cancellation: stop() releases the jobs still claimed.
+        del self._claimed[job_id]
+
+    async def _finish(self, job_id: int, evaluation: Optional[dict] = None, retry_after: float = 0.0,
+                      error: Optional[str] = None, refund_attempt: bool = False) -> None:
+        async with AsyncSessionLocal() as db:
+            # Store the outcome only if our claim still holds: a job whose lease
+            # expired may have been claimed, and scored, by another worker.
+            owned = await db.execute(
+                update(EvaluationJob)
+                .where(EvaluationJob.id == job_id, EvaluationJob.status == JOB_RUNNING,
+                       EvaluationJob.started_at == self._claimed[job_id])
+                .values(error=error, attempts=EvaluationJob.attempts - (1 if refund_attempt else 0))
+                .returning(EvaluationJob.id)
+            )
+            if owned.first() is None:
+                await db.rollback()
+                logger.warning("Evaluation job %s lost its lease, dropping this run's outcome", job_id)
+                self.lost_leases += 1
+                return
+            result = await db.execute(
+                select(EvaluationJob, Answer, InterviewSession)
+                .join(Answer, Answer.id == EvaluationJob.answer_id)
+                .join(Question, Question.id == Answer.question_id)
+                .join(InterviewSession, InterviewSession.id == Question.session_id)
+                .where(EvaluationJob.id == job_id)
+            )
+            job, answer, session = result.one()
+            if evaluation is not None:
+                self._apply(session, answer, evaluation)
+                job.status = JOB_DONE
+                job.finished_at = datetime.utcnow()
+                self.completed += 1
+            else:
+                if job.attempts < self.max_attempts:
+                    job.status = JOB_QUEUED
+                    self.retried += 1
+                else:
+                    job.status = JOB_FAILED
+                    job.finished_at = datetime.utcnow()
+                    answer.status = ANSWER_FAILED
+                    session.touch()
+                    self.failed += 1
+            await db.commit()
+
+        if job.status == JOB_QUEUED:
+            self._enqueue_later(job_id, retry_after)
+        else:
+            self._notify(answer.id)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "waiting_retry": len(self._retries),
+            "long_polls": sum(len(waiters) for waiters in self._waiters.values()),
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "recovered": self.recovered,
+            "released": self.released,
+            "lost_leases": self.lost_leases,
+        }
+
+
+def new_pending_answer(question_id: int, user_answer: str) -> Answer:
+    """An answer whose evaluation will be filled in by a job."""
+    return Answer(
+        question_id=question_id,
+        user_answer=user_answer,
+        status=ANSWER_PENDING,
+        job=EvaluationJob(),
+    )
+
+
+evaluation_jobs = EvaluationJobQueue(interview_service.evaluate_answer)
@@ -0,0 +1,476 @@
+import asyncio
+import logging
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from .metrics import LLM_GATEWAY_QUEUED, LLM_GATEWAY_REJECTIONS, LLM_GATEWAY_RETRIES, LLM_CIRCUIT_OPEN
+
+logger = logging.getLogger(__name__)
+
+# Calls running against the provider at once, across all chains.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+# Optional per-chain caps, e.g. "evaluation=8,generation=6".
+LLM_CHAIN_CONCURRENCY = {
+    name.strip(): int(limit)
+    for name, _, limit in (
+        item.partition("=") for item in os.getenv("LLM_CHAIN_CONCURRENCY", "").split(",") if "=" in item
+    )
+}
+# Calls allowed to wait for a slot; beyond this new calls are shed immediately.
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+# Seconds a call may wait for a slot before it is shed.
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+# Retries after a rate-limit/unavailable response, with full-jitter exponential backoff.
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+# Consecutive provider failures that open the circuit, and seconds it stays open.
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+# Directory of lock files through which every process using it shares the concurrency
+# limits above (set by gunicorn.conf.py for its workers). Empty: limits are per process.
+LLM_SHARED_LIMITS_DIR = os.getenv("LLM_SHARED_LIMITS_DIR", "")
+# Seconds between attempts to take a shared slot held by other processes.
+LLM_SHARED_POLL_INTERVAL = float(os.getenv("LLM_SHARED_POLL_INTERVAL", "0.02"))
+
+# HTTP statuses (as reported on provider exceptions) that mean "back off and retry".
+RETRYABLE_STATUSES = {429, 503}
+RETRYABLE_ERROR_NAMES = {"ResourceExhausted", "TooManyRequests", "RateLimitError", "ServiceUnavailable"}
+
+T = TypeVar("T")
+
+
+class GatewayError(Exception):
+    """The gateway refused or gave up on a call; maps to an HTTP error with Retry-After."""
+
+    status_code = 503
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class GatewayOverloaded(GatewayError):
+    """Too many calls are queued, or this one waited too long for a slot."""
+
+    status_code = 429
+
+
+class ProviderRateLimited(GatewayError):
+    """The provider kept rate limiting the call after every retry."""
+
+    status_code = 429
+
+
+class CircuitOpen(GatewayError):
+    """Recent calls kept failing, so the provider is not being called for now."""
+
+    status_code = 503
+
+
+def is_retryable(error: BaseException) -> bool:
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and code in RETRYABLE_STATUSES:
+        return True
+    if getattr(error, "status_code", None) in RETRYABLE_STATUSES:
+        return True
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` failures in a row the circuit opens and calls
+    fail fast for ``reset_timeout`` seconds. Then a single probe call is let
+    through (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, reset_timeout: float = LLM_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(1.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def check(self) -> None:
+        """Raise CircuitOpen unless a call may go through right now."""
+        state = self.state
+        if state == "open" or (state == "half_open" and self.probing):
+            raise CircuitOpen("LLM provider circuit is open", self.retry_after())
+
+    def before_call(self) -> None:
+        self.check()
+        if self.state == "half_open":
+            self.probing = True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.probing = False
+        if self.opened_at is not None:
+            logger.info("LLM circuit closed")
+            self.opened_at = None
+            LLM_CIRCUIT_OPEN.set(0)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self.probing:
+                logger.warning("LLM circuit opened after %d consecutive failures", self.failures)
+                self.times_opened += 1
+            self.probing = False
+            self.opened_at = time.monotonic()
+            LLM_CIRCUIT_OPEN.set(1)
+
+    def release_probe(self) -> None:
+        """The probe ended without a verdict (e.g. cancelled); let another one through."""
+        self.probing = False
+
+
+class SharedSlots:
+    """``limit`` slots shared by all processes using ``directory``: one flock()ed file per slot.
+
+    The kernel drops a process's locks when it exits, so a crashed worker
+    can't leak slots. Waiting is polling, as there is nothing to await across
+    processes; the files are opened on first use, i.e. after the fork.
+    """
+
+    def __init__(self, directory: str, name: str, limit: int, poll_interval: float = LLM_SHARED_POLL_INTERVAL):
+        self.directory = directory
+        self.name = name
+        self.limit = limit
+        self.poll_interval = poll_interval
+        self._fds: Optional[List[int]] = None
+        # Slots this process doesn't hold (flock() would grant a held one again).
+        self._free: List[int] = []
+
+    def _open(self) -> List[int]:
+        if self._fds is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._fds = [
+                os.open(os.path.join(self.directory, f"{self.name}-{index}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+                for index in range(self.limit)
+            ]
+            self._free = list(range(self.limit))
+        return self._fds
+
+    def try_acquire(self) -> Optional[int]:
+        """Take a free slot without waiting; returns its index, or None if all are taken."""
+        import fcntl
+        fds = self._open()
+        # Start at a random slot so processes don't all contend for the first one.
+        offset = random.randrange(len(self._free)) if self._free else 0
+        for index in self._free[offset:] + self._free[:offset]:
+            try:
+                fcntl.flock(fds[index], fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            self._free.remove(index)
+            return index
+        return None
+
+    async def acquire(self, deadline: float) -> Optional[int]:
+        """Take a slot, polling until ``deadline`` (time.monotonic()); None if none came free."""
+        while True:
+            index = self.try_acquire()
+            remaining = deadline - time.monotonic()
+            if index is not None or remaining <= 0:
+                return index
+            await asyncio.sleep(min(remaining, self.poll_interval * random.uniform(0.5, 1.5)))
+
+    def release(self, index: int) -> None:
+        import fcntl
+        fcntl.flock(self._open()[index], fcntl.LOCK_UN)
+        self._free.append(index)
+
+    def in_use(self) -> int:
+        """Slots currently held by any process."""
+        import fcntl
+        fds = self._open()
+        held = self.limit - len(self._free)
+        for index in self._free:
+            try:
+                fcntl.flock(fds[index], fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                held += 1
+            else:
+                fcntl.flock(fds[index], fcntl.LOCK_UN)
+        return held
+
+
+class LLMGateway:
+    """Admission control in front of every LLM chain call.
+
+    A call first checks the circuit breaker, then waits for a per-chain slot
+    (if that chain has a cap) and a global slot. At most ``max_queue`` calls
+    may wait at once and each waits at most ``queue_timeout`` seconds;
+    everything beyond that is shed with GatewayOverloaded rather than piling
+    up coroutines. Rate-limit/unavailable errors are retried with full-jitter
+    exponential backoff while keeping the slot, which slows the whole gateway
+    down during a rate limit instead of hammering the provider.
+
+    With ``shared_dir`` the global and per-chain limits also hold across all
+    processes using that directory (e.g. gunicorn workers): after its local
+    slots a call takes a SharedSlots slot, within the same queue timeout.
+    The queue bound and circuit breaker stay per process.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        chain_limits: Optional[Dict[str, int]] = None,
+        max_queue: int = LLM_MAX_QUEUE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT,
+        max_retries: int = LLM_MAX_RETRIES,
+        backoff_base: float = LLM_BACKOFF_BASE,
+        backoff_max: float = LLM_BACKOFF_MAX,
+        breaker: Optional[CircuitBreaker] = None,
+        shared_dir: str = LLM_SHARED_LIMITS_DIR,
+    ):
+        self.max_concurrency = max_concurrency
+        self.chain_limits = dict(LLM_CHAIN_CONCURRENCY if chain_limits is None else chain_limits)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._chains: Dict[str, asyncio.Semaphore] = {
+            name: asyncio.Semaphore(limit) for name, limit in self.chain_limits.items()
+        }
+        self.shared_dir = shared_dir or None
+        self._shared_global: Optional[SharedSlots] = None
+        self._shared_chains: Dict[str, SharedSlots] = {}
+        if self.shared_dir:
+            self._shared_global = SharedSlots(self.shared_dir, "llm", max_concurrency)
+            self._shared_chains = {
+                name: SharedSlots(self.shared_dir, f"llm-{name}", limit) for name, limit in self.chain_limits.items()
+            }
+        self.active = 0
+        self.waiting = 0
+        self.calls = 0
+        self.retries = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "queue_timeout": 0, "circuit_open": 0, "rate_limited": 0}
+
+    def _reject(self, reason: str, error: GatewayError, chain_name: str) -> GatewayError:
+        self.shed[reason] += 1
+        LLM_GATEWAY_REJECTIONS.inc(chain=chain_name, reason=reason)
+        return error
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def admit(self, chain_name: str) -> None:
+        """Fail fast if a call to ``chain_name`` would be shed right now.
+
+        Used before committing to a streamed response, whose status can't be
+        changed once it has started.
+        """
+        try:
+            self.breaker.check()
+        except CircuitOpen as e:
+            raise self._reject("circuit_open", e, chain_name)
+        if self.waiting >= self.max_queue:
+            raise self._reject(
+                "queue_full", GatewayOverloaded("Too many pending LLM calls", self.queue_timeout), chain_name
+            )
+
+    @asynccontextmanager
+    async def _slot(self, chain_name: str):
+        self.admit(chain_name)
+        deadline = time.monotonic() + self.queue_timeout
+        semaphores = [s for s in (self._chains.get(chain_name), self._global) if s is not None]
+        if not any(semaphore.locked() for semaphore in semaphores):
+            # A slot is free: take it without queueing (acquire() doesn't suspend here).
+            for semaphore in semaphores:
+                await semaphore.acquire()
+            acquired = semaphores
+        else:
+            acquired = await self._wait_for_slots(chain_name, semaphores, deadline)
+        try:
+            shared = await self._take_shared_slots(chain_name, deadline)
+        except BaseException:
+            for semaphore in reversed(acquired):
+                semaphore.release()
+            raise
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            for slots, index in reversed(shared):
+                slots.release(index)
+            for semaphore in reversed(acquired):
+                semaphore.release()
+
+    def _queue_timeout(self, chain_name: str) -> GatewayError:
+        return self._reject(
+            "queue_timeout", GatewayOverloaded("Timed out waiting for an LLM slot", self.queue_timeout), chain_name
+        )
+
+    async def _wait_for_slots(self, chain_name: str, semaphores, deadline: float):
+        acquired = []
+        self.waiting += 1
+        LLM_GATEWAY_QUEUED.inc()
+        try:
+            for semaphore in semaphores:
+                await asyncio.wait_for(semaphore.acquire(), max(0.0, deadline - time.monotonic()))
+                acquired.append(semaphore)
+        except asyncio.TimeoutError:
+            for semaphore in acquired:
+                semaphore.release()
+            raise self._queue_timeout(chain_name) from None
+        except BaseException:
+            for semaphore in acquired:
+                semaphore.release()
+            raise
+        finally:
+            self.waiting -= 1
+            LLM_GATEWAY_QUEUED.dec()
+        return acquired
+
+    async def _take_shared_slots(self, chain_name: str, deadline: float) -> List[Tuple[SharedSlots, int]]:
+        """The chain's and the global cross-process slots, as (SharedSlots, index) pairs."""
+        held = []
+        try:
+            for slots in (self._shared_chains.get(chain_name), self._shared_global):
+                if slots is None:
+                    continue
+                index = slots.try_acquire()
+                if index is None:
+                    self.waiting += 1
+                    LLM_GATEWAY_QUEUED.inc()
+                    try:
+                        index = await slots.acquire(deadline)
+                    finally:
+                        self.waiting -= 1
+                        LLM_GATEWAY_QUEUED.dec()
+                    if index is None:
+                        raise self._queue_timeout(chain_name)
+                held.append((slots, index))
+        except BaseException:
+            for slots, index in reversed(held):
+                slots.release(index)
+            raise
+        return held
+
+    def _before_attempt(self, chain_name: str) -> None:
+        try:
+            self.breaker.before_call()
+        except CircuitOpen as e:
+            raise self._reject("circuit_open", e, chain_name)
+
+    def _after_error(self, error: BaseException) -> None:
+        """Feed a failed attempt to the breaker; bad model output isn't a provider failure.
+
+        Rate-limit/unavailable responses are retried, and only a call that
+        exhausts its retries counts as a failure (see _retry_or_raise), so
+        ordinary throttling doesn't open the circuit.
+        """
+        from langchain_core.exceptions import OutputParserException
+        if isinstance(error, (asyncio.CancelledError, GeneratorExit)) or (
+            isinstance(error, Exception) and is_retryable(error)
+        ):
+            self.breaker.release_probe()
+        elif isinstance(error, (OutputParserException, GatewayError)):
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    async def _retry_or_raise(self, chain_name: str, attempt: int, error: Exception) -> None:
+        if not is_retryable(error):
+            raise error
+        if attempt >= self.max_retries:
+            self.breaker.record_failure()
+            raise self._reject(
+                "rate_limited", ProviderRateLimited("LLM provider is rate limiting requests", self.backoff_max),
+                chain_name,
+            ) from error
+        delay = self.backoff(attempt)
+        self.retries += 1
+        LLM_GATEWAY_RETRIES.inc(chain=chain_name)
+        logger.info("LLM %s call rate limited, retrying in %.2fs", chain_name, delay)
+        await asyncio.sleep(delay)
+
+    async def call(self, chain_name: str, make_call: Callable[[], Awaitable[T]]) -> T:
+        """Run ``make_call()`` (a fresh awaitable per attempt) under the gateway's limits."""
+        self.calls += 1
+        async with self._slot(chain_name):
+            attempt = 0
+            while True:
+                self._before_attempt(chain_name)
+                try:
+                    result = await make_call()
+                except BaseException as e:
+                    self._after_error(e)
+                    if not isinstance(e, Exception):
+                        raise
+                    await self._retry_or_raise(chain_name, attempt, e)
+                    attempt += 1
+                    continue
+                self.breaker.record_success()
+                return result
+
+    async def stream(self, chain_name: str, make_stream: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Streaming counterpart of call(); only retried until the first chunk arrives."""
+        self.calls += 1
+        async with self._slot(chain_name):
+            attempt = 0
+            while True:
+                self._before_attempt(chain_name)
+                started = False
+                try:
+                    async for chunk in make_stream():
+                        started = True
+                        yield chunk
+                except BaseException as e:
+                    self._after_error(e)
+                    if started or not isinstance(e, Exception):
+                        raise
+                    await self._retry_or_raise(chain_name, attempt, e)
+                    attempt += 1
+                    continue
+                self.breaker.record_success()
+                return
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "chain_limits": self.chain_limits,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "active": self.active,
+            "waiting": self.waiting,
+            "calls": self.calls,
+            "retries": self.retries,
+            "shed": dict(self.shed),
+            "circuit": {
+                "state": self.breaker.state,
+                "consecutive_failures": self.breaker.failures,
+                "times_opened": self.breaker.times_opened,
+            },
+            "shared": None if self._shared_global is None else {
+                "directory": self.shared_dir,
+                "in_use": self._shared_global.in_use(),
+                "chains_in_use": {name: slots.in_use() for name, slots in self._shared_chains.items()},
+            },
+        }
@@ -1,34 +1,89 @@
-from fastapi import FastAPI, Depends, HTTPException
+import asyncio
+import base64
+import json
+import logging
+import math
+import os
+import time
+from collections import Counter
+from contextlib import aclosing
+from datetime import datetime
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, exists, func, or_, update
 from sqlalchemy.future import select
-from typing import List, Optional
+from sqlalchemy.orm import joinedload, selectinload, undefer
+from typing import List, Literal, Optional
 
-from .database import engine, Base, get_db
-from .models import InterviewSession, Question, Answer
+from .database import get_db, AsyncSessionLocal
+from .models import (
+    InterviewSession, Question, Answer, EvaluationJob,
+    ANSWER_COMPLETED, ANSWER_FAILED, ANSWER_PENDING, DIFFICULTY_EMA_ALPHA, JOB_DONE, JOB_FAILED,
+)
 from .schemas import (
     SessionCreate, SessionResponse, QuestionResponse, 
-    AnswerCreate, AnswerResponse, EvaluationResponse
+    AnswerCreate, AnswerResponse, EvaluationResponse,
+    SessionDetailResponse, QuestionDetailResponse,
+    SessionSummaryResponse, SessionPageResponse,
+    AnswerStatusResponse, EvaluationJobResponse,
+    SessionEvaluateRequest, SessionEvaluationResponse, BatchEvaluationResult,
+)
+from .services import interview_service, LLM_WARMUP, BATCH_EVALUATION_CONCURRENCY
+from .llm_gateway import GatewayError
+from .jobs import evaluation_jobs, new_pending_answer
+from .question_pool import question_pool, QUESTION_POOL_ENABLED
+from .evaluation_cache import evaluation_cache
+from .similarity import question_index, DEDUP_ENABLED
+from .prevalidation import prevalidator
+from .migrations import create_schema
+from .export import export_query, export_sessions, ndjson_chunks
+from .http_cache import session_responses, make_etag
+from .metrics import (
+    registry, HTTP_REQUEST_SECONDS, HTTP_IN_FLIGHT, WS_CONNECTIONS, QUESTION_PREFETCH, NEXT_QUESTION_WAIT,
 )
-from .services import interview_service
+
+logger = logging.getLogger(__name__)
 
 
-def determine_next_difficulty(session: InterviewSession, last_answer: Optional[Answer]) -> str:
-    """Determine the next question difficulty based on the latest answer scores.
+DIFFICULTY_POLICIES = ("last", "ema")
+# "last" adapts to the most recent answer only; "ema" to an exponential moving
+# average of all answers in the session.
+DIFFICULTY_POLICY = os.getenv("DIFFICULTY_POLICY", "last")
+# Upper bound for GET /answers/{id}?wait=..., in seconds.
+ANSWER_POLL_MAX_WAIT = float(os.getenv("ANSWER_POLL_MAX_WAIT", "30"))
+# While long-polling, re-read the answer this often in case another process finished it.
+ANSWER_POLL_INTERVAL = float(os.getenv("ANSWER_POLL_INTERVAL", "1"))
+# Create/upgrade the schema on startup. gunicorn.conf.py does it once before
+# forking and turns this off for its workers, which would otherwise race.
+DB_CREATE_SCHEMA = os.getenv("DB_CREATE_SCHEMA", "true").lower() in {"1", "true", "yes"}
+
+
+def determine_next_difficulty(session: InterviewSession, policy: str = DIFFICULTY_POLICY) -> str:
+    """Determine the next question difficulty from the session's rolling scores.
 
     This implements a simple adaptive rule so stronger performance leads to harder
-    questions and weaker performance dials difficulty down.
+    questions and weaker performance dials difficulty down. Everything it needs
+    is denormalized onto the session row, so no answers need to be loaded.
     """
     base_difficulty = session.difficulty or "Medium"
 
-    if not last_answer:
+    if not session.answer_count:
         return base_difficulty
 
-    scores = [
-        last_answer.score_correctness,
-        last_answer.score_efficiency,
-        last_answer.score_clarity,
-    ]
+    if policy == "ema":
+        scores = [
+            session.ema_score_correctness,
+            session.ema_score_efficiency,
+            session.ema_score_clarity,
+        ]
+    else:
+        scores = [
+            session.last_score_correctness,
+            session.last_score_efficiency,
+            session.last_score_clarity,
+        ]
 
     # If we don't have complete scores yet, fall back to the stored difficulty.
     if any(score is None for score in scores):
@@ -43,6 +98,172 @@ def determine_next_difficulty(session: InterviewSession, last_answer: Optional[A
     return "Easy"
 
 
+def choose_difficulty(session: InterviewSession, difficulty: Optional[str] = None,
+                      policy: Optional[str] = None) -> str:
+    """The requested difficulty if it is a valid one, else the adaptive one."""
+    normalized = difficulty.capitalize() if difficulty else None
+    if normalized in {"Easy", "Medium", "Hard"}:
+        return normalized
+    # Adapt to the rolling scores stored on the session row.
+    return determine_next_difficulty(session, policy or DIFFICULTY_POLICY)
+
+
+def predict_next_difficulty(session: InterviewSession, scores: dict, policy: Optional[str] = None) -> str:
+    """The adaptive difficulty the session will have once an answer with ``scores`` is recorded."""
+    preview = InterviewSession(
+        difficulty=session.difficulty,
+        answer_count=session.answer_count,
+        ema_score_correctness=session.ema_score_correctness,
+        ema_score_efficiency=session.ema_score_efficiency,
+        ema_score_clarity=session.ema_score_clarity,
+    )
+    preview.record_scores(
+        scores['score_correctness'], scores['score_efficiency'], scores['score_clarity'], DIFFICULTY_EMA_ALPHA
+    )
+    return determine_next_difficulty(preview, policy or DIFFICULTY_POLICY)
+
+
+async def pick_question(session_id: int, tech_stack: str, difficulty: str) -> dict:
+    """A pre-validated question from the pool when there is one; generated live otherwise."""
+    if QUESTION_POOL_ENABLED:
+        generated_q = question_pool.take(
+            tech_stack,
+            difficulty,
+            accept=lambda q: not DEDUP_ENABLED
+            or question_index.find_duplicate(q['question_text'], session_id) is None,
+        )
+        if generated_q is not None:
+            return generated_q
+    return await interview_service.generate_question(difficulty, tech_stack, session_id=session_id)
+
+
+async def store_question(db: AsyncSession, session: InterviewSession, difficulty: str, generated_q: dict) -> Question:
+    # Persist the latest difficulty so clients can display it.
+    session.difficulty = difficulty
+    session.touch()
+    db.add(session)
+
+    new_question = Question(
+        session_id=session.id,
+        question_text=generated_q['question_text'],
+        difficulty=generated_q['difficulty']
+    )
+    db.add(new_question)
+    # One commit updates the session (difficulty, version) and inserts the question;
+    # the new id and defaults are already on the instance, so no refresh is needed.
+    await db.commit()
+    question_index.add(new_question.id, session.id, new_question.question_text)
+    return new_question
+
+
+def score_answer(session: InterviewSession, answer: Answer, evaluation: dict) -> None:
+    """Store the evaluation on the answer and fold its scores into the session aggregates."""
+    session.record_scores(
+        evaluation['score_correctness'],
+        evaluation['score_efficiency'],
+        evaluation['score_clarity'],
+        DIFFICULTY_EMA_ALPHA,
+    )
+    session.touch()
+    answer.apply_evaluation(evaluation)
+
+
+def record_answer(session: InterviewSession, question_id: int, user_answer: str, evaluation: dict) -> Answer:
+    """Build the Answer row and fold its scores into the session aggregates.
+
+    The caller adds both to the same DB session so they commit together.
+    """
+    answer = Answer(question_id=question_id, user_answer=user_answer)
+    score_answer(session, answer, evaluation)
+    return answer
+
+
+EVALUATION_FIELDS = (
+    "score_correctness",
+    "score_efficiency",
+    "score_clarity",
+    "feedback",
+    "overall_assessment",
+)
+
+
+def encode_session_cursor(created_at: datetime, session_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{session_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_session_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, session_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(session_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def evaluation_events(question_id: int, session_id: int, question_text: str, user_answer: str,
+                            tech_stack: str):
+    """``(event, data)`` pairs for a streamed evaluation, persisting the Answer at the end.
+
+    Emits ``field`` once a scalar field (scores, overall assessment) is complete,
+    ``feedback`` with the newly generated text as the feedback grows, then
+    ``done`` with the stored answer, or ``error`` if the evaluation failed.
+    """
+    evaluation = {}
+    sent_fields = set()
+    feedback_sent = 0
+    try:
+        async for partial in interview_service.stream_evaluation(question_text, user_answer, tech_stack):
+            if not isinstance(partial, dict):
+                continue
+            evaluation = partial
+
+            feedback = partial.get("feedback")
+            if isinstance(feedback, str) and len(feedback) > feedback_sent:
+                yield ("feedback", {"delta": feedback[feedback_sent:]})
+                feedback_sent = len(feedback)
+
+            # A scalar value is only final once the model has moved on to a later key.
+            keys = list(partial.keys())
+            for field in keys[:-1]:
+                if field != "feedback" and field in EVALUATION_FIELDS and field not in sent_fields:
+                    sent_fields.add(field)
+                    yield ("field", {"field": field, "value": partial[field]})
+
+        missing = [field for field in EVALUATION_FIELDS if field not in evaluation]
+        if missing:
+            raise ValueError(f"Incomplete evaluation, missing: {', '.join(missing)}")
+        for field in EVALUATION_FIELDS:
+            if field != "feedback" and field not in sent_fields:
+                yield ("field", {"field": field, "value": evaluation[field]})
+
+        # The request's DB session may already be closed once streaming starts.
+        async with AsyncSessionLocal() as db:
+            session = await db.get(InterviewSession, session_id)
+            new_answer = record_answer(session, question_id, user_answer, evaluation)
+            db.add(session)
+            db.add(new_answer)
+            await db.commit()
+            await db.refresh(new_answer)
+        yield ("done", AnswerResponse.model_validate(new_answer).model_dump(mode="json"))
+    except GatewayError as e:
+        yield ("error", {"detail": str(e), "retry_after": math.ceil(e.retry_after)})
+    except Exception as e:
+        logger.warning("Error streaming evaluation: %r", e)
+        yield ("error", {"detail": str(e)})
+
+
+async def stream_answer_evaluation(question_id: int, session_id: int, question_text: str, user_answer: str,
+                                   tech_stack: str):
+    """Server-Sent Events for a streamed evaluation (see evaluation_events)."""
+    async for event, data in evaluation_events(question_id, session_id, question_text, user_answer, tech_stack):
+        yield sse_event(event, data)
+
+
 app = FastAPI(title="AI Interviewer API")
 
 app.add_middleware(
@@ -51,17 +272,107 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the frontend see ETags (the browser revalidates with If-None-Match itself).
+    expose_headers=["ETag"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    # Label by route template ("/sessions/{session_id}") so ids don't explode cardinality.
+    HTTP_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status,
+        )
+
+@app.exception_handler(GatewayError)
+async def llm_gateway_error_handler(request: Request, exc: GatewayError):
+    # Overload and provider outages get a fast 429/503 the client can back off from.
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+def log_warmup_failure(future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("LLM warm-up failed: %r", future.exception())
+
 @app.on_event("startup")
 async def startup():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # LLM client/chains are built lazily; warm them up off the request path.
+    if LLM_WARMUP == "startup":
+        await asyncio.to_thread(interview_service.warm_up)
+    elif LLM_WARMUP == "background":
+        app.state.llm_warmup = asyncio.get_running_loop().run_in_executor(None, interview_service.warm_up)
+        app.state.llm_warmup.add_done_callback(log_warmup_failure)
+    if DB_CREATE_SCHEMA:
+        await create_schema()
+    await evaluation_cache.purge_stale()
+    if DEDUP_ENABLED:
+        await question_index.warm()
+    if QUESTION_POOL_ENABLED:
+        question_pool.start()
+    await evaluation_jobs.start(score_answer)
+
+@app.on_event("shutdown")
+async def shutdown():
+    # Runs once uvicorn has drained open connections; running evaluation jobs
+    # then get EVALUATION_DRAIN_TIMEOUT seconds before they are handed back.
+    await question_pool.stop()
+    await evaluation_jobs.stop()
 
 @app.get("/", tags=["Health"])
 async def health_check():
     return {"status": "ok", "message": "AI Interviewer API is running"}
 
+@app.get("/metrics", tags=["Stats"], response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/pool", tags=["Stats"])
+async def question_pool_stats():
+    return question_pool.stats()
+
+@app.get("/stats/generation", tags=["Stats"])
+async def question_generation_stats():
+    return interview_service.generation_stats()
+
+@app.get("/stats/evaluation-cache", tags=["Stats"])
+async def evaluation_cache_stats():
+    return evaluation_cache.stats()
+
+@app.get("/stats/dedup", tags=["Stats"])
+async def question_dedup_stats():
+    return question_index.stats()
+
+@app.get("/stats/prevalidation", tags=["Stats"])
+async def prevalidation_stats():
+    return prevalidator.stats()
+
+@app.get("/stats/llm-gateway", tags=["Stats"])
+async def llm_gateway_stats():
+    return interview_service.gateway.stats()
+
+@app.get("/stats/session-cache", tags=["Stats"])
+async def session_cache_stats():
+    return session_responses.stats()
+
+@app.get("/stats/evaluation-jobs", tags=["Stats"])
+async def evaluation_job_stats():
+    return evaluation_jobs.stats()
+
 @app.post("/sessions", response_model=SessionResponse)
 async def create_session(session_data: SessionCreate, db: AsyncSession = Depends(get_db)):
     new_session = InterviewSession(
@@ -79,37 +390,146 @@ async def create_session(session_data: SessionCreate, db: AsyncSession = Depends
         questions=[]
     )
 
-@app.get("/sessions", response_model=List[SessionResponse])
-async def list_sessions(skip: int = 0, limit: int = 20, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(InterviewSession).offset(skip).limit(limit).order_by(InterviewSession.created_at.desc()))
-    return [
-        SessionResponse(
-            id=s.id, created_at=s.created_at, difficulty=s.difficulty, tech_stack=s.tech_stack, questions=[]
-        ) for s in result.scalars().all()
-    ]
+@app.get("/sessions", response_model=SessionPageResponse)
+async def list_sessions(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """Newest-first sessions with per-session progress, keyset paginated on (created_at, id).
+
+    Pass the returned ``next_cursor`` back as ``cursor`` to get the next page;
+    every page costs the same no matter how deep it is. The ETag changes
+    whenever any session does, so unchanged pages cost one index lookup.
+    """
+    last_update = await db.scalar(select(func.max(InterviewSession.updated_at)))
+    etag = make_etag("sessions", last_update, cursor, limit)
+    cached = session_responses.lookup(request, etag)
+    if cached is not None:
+        return cached
+
+    page = select(InterviewSession)
+    if cursor:
+        created_at, session_id = decode_session_cursor(cursor)
+        page = page.where(or_(
+            InterviewSession.created_at < created_at,
+            and_(InterviewSession.created_at == created_at, InterviewSession.id < session_id),
+        ))
+    # Fetch one extra row to know whether there is a next page.
+    page = (
+        page.order_by(InterviewSession.created_at.desc(), InterviewSession.id.desc())
+        .limit(limit + 1)
+        .subquery()
+    )
+
+    # Aggregate only over the page's sessions, in the same statement.
+    result = await db.execute(
+        select(
+            page.c.id,
+            page.c.created_at,
+            page.c.difficulty,
+            page.c.tech_stack,
+            func.count(func.distinct(Question.id)).label("question_count"),
+            func.count(func.distinct(Answer.question_id)).label("answered_count"),
+            func.avg(Answer.score_correctness).label("avg_score_correctness"),
+            func.avg(Answer.score_efficiency).label("avg_score_efficiency"),
+            func.avg(Answer.score_clarity).label("avg_score_clarity"),
+        )
+        .select_from(page)
+        .outerjoin(Question, Question.session_id == page.c.id)
+        # Pending (async) answers count once their evaluation is in.
+        .outerjoin(Answer, and_(Answer.question_id == Question.id, Answer.status == ANSWER_COMPLETED))
+        .group_by(page.c.id, page.c.created_at, page.c.difficulty, page.c.tech_stack)
+        .order_by(page.c.created_at.desc(), page.c.id.desc())
+    )
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_session_cursor(rows[-1].created_at, rows[-1].id)
+    body = SessionPageResponse(
+        items=[SessionSummaryResponse.model_validate(row._asdict()) for row in rows],
+        next_cursor=next_cursor,
+    ).model_dump_json()
+    return session_responses.store(etag, body.encode())
+
+@app.get("/export", tags=["Export"])
+async def export(
+    request: Request,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    tech_stack: Optional[str] = None,
+    include_feedback: bool = True,
+    compression: Optional[Literal["zstd", "none"]] = None,
+):
+    """Stream every session created in [since, until) as NDJSON, one line per session.
+
+    Questions and answers are nested as in ``GET /sessions/{id}?include=answers``.
+    The body is zstd-encoded when asked for with ``compression=zstd`` or
+    ``Accept-Encoding: zstd``.
+    """
+    if compression is None:
+        accepted = {encoding.split(";")[0].strip() for encoding in request.headers.get("accept-encoding", "").split(",")}
+        compression = "zstd" if "zstd" in accepted else "none"
+    headers = {"Cache-Control": "no-store", "X-Accel-Buffering": "no", "Vary": "Accept-Encoding"}
+    if compression == "zstd":
+        headers["Content-Encoding"] = "zstd"
+    query = export_query(since, until, tech_stack, include_feedback)
+    return StreamingResponse(
+        ndjson_chunks(export_sessions(query), compress=compression == "zstd"),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
+
+@app.get("/sessions/{session_id}", response_model=SessionDetailResponse, response_model_exclude_unset=True)
+async def get_session(
+    session_id: int,
+    request: Request,
+    include: Optional[Literal["answers"]] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """A session with its questions (and their answers with ``include=answers``).
 
-@app.get("/sessions/{session_id}", response_model=SessionResponse)
-async def get_session(session_id: int, db: AsyncSession = Depends(get_db)):
+    Responses carry an ETag from the session's version: ``If-None-Match``
+    gets a 304, and representations already rendered by this process are
+    served from memory, both after loading just the session row.
+    """
     result = await db.execute(select(InterviewSession).where(InterviewSession.id == session_id))
     session = result.scalars().first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
-    
-    result_q = await db.execute(select(Question).where(Question.session_id == session_id))
-    questions = result_q.scalars().all()
-    
-    return SessionResponse(
+    etag = make_etag("session", session.id, session.version, session.updated_at, include)
+    cached = session_responses.lookup(request, etag)
+    if cached is not None:
+        return cached
+
+    # Answers are eager loaded with one SELECT ... IN instead of a query per question.
+    load_questions = select(Question).where(Question.session_id == session_id).order_by(Question.created_at)
+    if include == "answers":
+        load_questions = load_questions.options(selectinload(Question.answer))
+    result = await db.execute(load_questions)
+
+    if include == "answers":
+        questions = [QuestionDetailResponse.model_validate(q) for q in result.scalars()]
+    else:
+        questions = [QuestionResponse.model_validate(q).model_dump() for q in result.scalars()]
+
+    body = SessionDetailResponse(
         id=session.id,
         created_at=session.created_at,
         difficulty=session.difficulty,
         tech_stack=session.tech_stack,
         questions=questions
-    )
+    ).model_dump_json(exclude_unset=True)
+    return session_responses.store(etag, body.encode())
 
 @app.post("/sessions/{session_id}/questions", response_model=QuestionResponse)
 async def generate_question_endpoint(
     session_id: int,
     difficulty: Optional[str] = None,
+    difficulty_policy: Optional[Literal["last", "ema"]] = None,
     db: AsyncSession = Depends(get_db),
 ):
     # Load session so we can adapt difficulty and respect tech stack.
@@ -118,56 +538,57 @@ async def generate_question_endpoint(
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    # If the caller explicitly requested a difficulty, respect it.
-    normalized = difficulty.capitalize() if difficulty else None
-    if normalized not in {"Easy", "Medium", "Hard"}:
-        # Look up the most recent answer for this session to drive adaptive difficulty.
-        result_last = await db.execute(
-            select(Answer)
-            .join(Question, Answer.question_id == Question.id)
-            .where(Question.session_id == session_id)
-            .order_by(Answer.created_at.desc())
-        )
-        last_answer = result_last.scalars().first()
-        next_difficulty = determine_next_difficulty(session, last_answer)
-    else:
-        next_difficulty = normalized
-
+    next_difficulty = choose_difficulty(session, difficulty, difficulty_policy)
     try:
-        generated_q = await interview_service.generate_question(next_difficulty, session.tech_stack)
+        generated_q = await pick_question(session_id, session.tech_stack, next_difficulty)
+    except GatewayError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return await store_question(db, session, next_difficulty, generated_q)
 
-    # Persist the latest difficulty so clients can display it.
-    session.difficulty = next_difficulty
-    db.add(session)
-
-    new_question = Question(
-        session_id=session_id,
-        question_text=generated_q['question_text'],
-        difficulty=generated_q['difficulty']
-    )
-    db.add(new_question)
-    await db.commit()
-    await db.refresh(new_question)
-    return new_question
-
-@app.post("/questions/{question_id}/answer", response_model=AnswerResponse)
-async def submit_answer(question_id: int, answer_data: AnswerCreate, db: AsyncSession = Depends(get_db)):
-    # Fetch question and associated session to get tech_stack
+async def load_question_with_session(db: AsyncSession, question_id: int):
+    # Fetch question and its session (for tech_stack) in a single joined query.
     result = await db.execute(
-        select(Question).where(Question.id == question_id)
+        select(Question).options(joinedload(Question.session)).where(Question.id == question_id)
     )
     question = result.scalars().first()
     if not question:
         raise HTTPException(status_code=404, detail="Question not found")
-        
-    # We need the session to get the tech_stack
-    # Since we didn't eager load, we fetch it now
-    result_s = await db.execute(select(InterviewSession).where(InterviewSession.id == question.session_id))
-    session = result_s.scalars().first()
+
+    session = question.session
     if not session:
          raise HTTPException(status_code=404, detail="Session not found for this question")
+    return question, session
+
+@app.post(
+    "/questions/{question_id}/answer",
+    response_model=AnswerResponse,
+    responses={202: {"model": EvaluationJobResponse}},
+)
+async def submit_answer(
+    question_id: int,
+    answer_data: AnswerCreate,
+    mode: Literal["sync", "async"] = "sync",
+    db: AsyncSession = Depends(get_db),
+):
+    question, session = await load_question_with_session(db, question_id)
+
+    if mode == "async":
+        # Store the answer now and evaluate it in the background; poll GET /answers/{id}.
+        new_answer = new_pending_answer(question_id, answer_data.user_answer)
+        session.touch()
+        db.add(session)
+        db.add(new_answer)
+        await db.commit()
+        evaluation_jobs.enqueue(new_answer.job.id)
+        job = EvaluationJobResponse(
+            job_id=new_answer.job.id,
+            answer_id=new_answer.id,
+            status=new_answer.job.status,
+            poll_url=f"/answers/{new_answer.id}?wait={int(ANSWER_POLL_MAX_WAIT)}",
+        )
+        return JSONResponse(status_code=202, content=job.model_dump())
 
     evaluation = await interview_service.evaluate_answer(
         question.question_text, 
@@ -175,17 +596,379 @@ async def submit_answer(question_id: int, answer_data: AnswerCreate, db: AsyncSe
         session.tech_stack
     )
 
-    new_answer = Answer(
-        question_id=question_id,
-        user_answer=answer_data.user_answer,
-        feedback_json=evaluation,
-        score_correctness=evaluation['score_correctness'],
-        score_efficiency=evaluation['score_efficiency'],
-        score_clarity=evaluation['score_clarity'],
-        overall_assessment=evaluation['overall_assessment']
-    )
+    new_answer = record_answer(session, question_id, answer_data.user_answer, evaluation)
+    db.add(session)
     db.add(new_answer)
     await db.commit()
     await db.refresh(new_answer)
     
     return new_answer
+
+async def load_answer_status(answer_id: int) -> AnswerStatusResponse:
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Answer)
+            .options(joinedload(Answer.job), undefer(Answer.feedback_zstd), undefer(Answer.legacy_feedback_json))
+            .where(Answer.id == answer_id)
+        )
+        answer = result.scalars().first()
+    if not answer:
+        raise HTTPException(status_code=404, detail="Answer not found")
+    response = AnswerStatusResponse.model_validate(answer)
+    if answer.job is not None and answer.status != ANSWER_COMPLETED:
+        response.error = answer.job.error
+    return response
+
+@app.get("/answers/{answer_id}", response_model=AnswerStatusResponse)
+async def get_answer(answer_id: int, response: Response, wait: float = Query(0, ge=0)):
+    """Fetch an answer; with ``wait`` > 0 a pending answer is long-polled until evaluated.
+
+    Uses short-lived DB sessions so no connection is held while waiting.
+    """
+    deadline = time.monotonic() + min(wait, ANSWER_POLL_MAX_WAIT)
+    answer = await load_answer_status(answer_id)
+    while answer.status == ANSWER_PENDING:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            response.headers["Retry-After"] = str(math.ceil(ANSWER_POLL_INTERVAL))
+            break
+        await evaluation_jobs.wait(answer_id, min(remaining, ANSWER_POLL_INTERVAL))
+        answer = await load_answer_status(answer_id)
+    return answer
+
+@app.post("/questions/{question_id}/answer/stream")
+async def submit_answer_stream(question_id: int, answer_data: AnswerCreate, db: AsyncSession = Depends(get_db)):
+    """Streaming variant of submit_answer using Server-Sent Events."""
+    question, session = await load_question_with_session(db, question_id)
+    # Shed before the 200 is sent; afterwards errors can only be reported in-stream.
+    interview_service.gateway.admit("evaluation")
+    return StreamingResponse(
+        stream_answer_evaluation(
+            question.id, session.id, question.question_text, answer_data.user_answer, session.tech_stack
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+SCORE_FIELDS = ("score_correctness", "score_efficiency", "score_clarity")
+
+
+def _discard(task: asyncio.Task) -> None:
+    """Cancel a background task, retrieving its exception if it already failed."""
+    if task.done():
+        if not task.cancelled():
+            task.exception()
+    else:
+        task.cancel()
+
+
+class QuestionPrefetch:
+    """A session's next question, generated in the background while its last answer is evaluated."""
+
+    def __init__(self, session_id: int, tech_stack: str):
+        self.session_id = session_id
+        self.tech_stack = tech_stack
+        self.difficulty: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, difficulty: str) -> None:
+        """Generate a question of ``difficulty``, replacing one being generated for another difficulty."""
+        if self._task is not None:
+            if self.difficulty == difficulty:
+                return
+            _discard(self._task)
+            QUESTION_PREFETCH.inc(outcome="retargeted")
+        self.difficulty = difficulty
+        self._task = asyncio.create_task(pick_question(self.session_id, self.tech_stack, difficulty))
+
+    async def take(self, difficulty: str) -> Optional[dict]:
+        """The prefetched question if there is one for ``difficulty`` (waiting for it if needed)."""
+        task, self._task = self._task, None
+        if task is None:
+            return None
+        if self.difficulty != difficulty:
+            _discard(task)
+            QUESTION_PREFETCH.inc(outcome="discarded")
+            return None
+        try:
+            return await task
+        except Exception as e:
+            logger.warning("Prefetching a question for session %s failed: %r", self.session_id, e)
+            QUESTION_PREFETCH.inc(outcome="failed")
+            return None
+
+    def cancel(self) -> None:
+        if self._task is not None:
+            _discard(self._task)
+            self._task = None
+
+
+class InterviewChannel:
+    """One WebSocket carrying a whole interview; see ``interview_websocket`` for the protocol."""
+
+    def __init__(self, websocket: WebSocket, session: InterviewSession, difficulty: Optional[str],
+                 difficulty_policy: Optional[str], prefetch: bool):
+        self.websocket = websocket
+        self.session_id = session.id
+        self.tech_stack = session.tech_stack
+        self.difficulty = difficulty
+        self.difficulty_policy = difficulty_policy
+        self.prefetch = prefetch
+        self.prefetcher = QuestionPrefetch(session.id, session.tech_stack)
+
+    async def send(self, event: str, data: dict, **extra) -> None:
+        await self.websocket.send_json({"type": event, "data": data, **extra})
+
+    async def send_error(self, e: Exception, context: str) -> None:
+        data = {"detail": e.detail if isinstance(e, HTTPException) else str(e), "context": context}
+        if isinstance(e, GatewayError):
+            data["retry_after"] = math.ceil(e.retry_after)
+        await self.send("error", data)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                message = json.loads(await self.websocket.receive_text())
+                kind = message.get("type") if isinstance(message, dict) else None
+            except ValueError:
+                await self.send("error", {"detail": "Messages must be JSON objects", "context": "message"})
+                continue
+            if kind == "next_question":
+                await self.next_question(message.get("difficulty"))
+            elif kind == "answer":
+                await self.answer(message.get("question_id"), message.get("user_answer"))
+            elif kind == "ping":
+                await self.send("pong", {})
+            else:
+                await self.send("error", {"detail": f"Unknown message type: {kind!r}", "context": "message"})
+
+    async def next_question(self, difficulty: Optional[str] = None, evaluated_at: Optional[float] = None) -> None:
+        """Store and push the next question, the prefetched one if it has the right difficulty."""
+        try:
+            async with AsyncSessionLocal() as db:
+                session = await db.get(InterviewSession, self.session_id)
+                next_difficulty = choose_difficulty(session, difficulty or self.difficulty, self.difficulty_policy)
+                generated_q = await self.prefetcher.take(next_difficulty)
+                prefetched = generated_q is not None
+                if not prefetched:
+                    generated_q = await pick_question(self.session_id, self.tech_stack, next_difficulty)
+                question = await store_question(db, session, next_difficulty, generated_q)
+        except Exception as e:
+            await self.send_error(e, "question")
+            return
+        source = "prefetched" if prefetched else "live"
+        QUESTION_PREFETCH.inc(outcome=source)
+        if evaluated_at is not None:
+            NEXT_QUESTION_WAIT.observe(time.perf_counter() - evaluated_at, source=source)
+        await self.send("question", QuestionResponse.model_validate(question).model_dump(mode="json"),
+                        prefetched=prefetched)
+
+    async def answer(self, question_id, user_answer) -> None:
+        """Stream the answer's evaluation, then push the next question (generated meanwhile)."""
+        if not isinstance(question_id, int) or not isinstance(user_answer, str):
+            await self.send("error", {"detail": "answer needs an integer question_id and a user_answer string",
+                                      "context": "answer"})
+            return
+        try:
+            async with AsyncSessionLocal() as db:
+                question, session = await load_question_with_session(db, question_id)
+            if session.id != self.session_id:
+                raise HTTPException(status_code=404, detail="Question not found in this session")
+            interview_service.gateway.admit("evaluation")
+        except Exception as e:
+            await self.send_error(e, "answer")
+            return
+
+        if self.prefetch:
+            # Start on the difficulty the session has now; once the scores are in,
+            # switch if they move it.
+            self.prefetcher.start(choose_difficulty(session, self.difficulty, self.difficulty_policy))
+        scores = {}
+        failed = False
+        events = evaluation_events(question.id, session.id, question.question_text, user_answer, session.tech_stack)
+        async with aclosing(events):
+            async for event, data in events:
+                await self.send(event, data)
+                failed |= event == "error"
+                if event == "field" and data["field"] in SCORE_FIELDS:
+                    scores[data["field"]] = data["value"]
+                    if self.prefetch and not self.difficulty and len(scores) == len(SCORE_FIELDS):
+                        self.prefetcher.start(predict_next_difficulty(session, scores, self.difficulty_policy))
+        if self.prefetch and not failed:
+            await self.next_question(evaluated_at=time.perf_counter())
+
+    def close(self) -> None:
+        self.prefetcher.cancel()
+
+
+@app.websocket("/ws/sessions/{session_id}")
+async def interview_websocket(
+    websocket: WebSocket,
+    session_id: int,
+    difficulty: Optional[str] = None,
+    difficulty_policy: Optional[Literal["last", "ema"]] = None,
+    prefetch: bool = True,
+):
+    """Run an interview over one WebSocket instead of a POST per step.
+
+    Every message is a JSON object with a ``type``. The client sends
+    ``{"type": "next_question", "difficulty": ...}`` (difficulty optional),
+    ``{"type": "answer", "question_id": ..., "user_answer": ...}`` or
+    ``{"type": "ping"}``. The server replies ``{"type": ..., "data": ...}``:
+    ``question`` (with ``prefetched``), the evaluation events of the SSE
+    endpoint (``field``, ``feedback``, ``done``), ``pong``, or ``error`` (with
+    a ``context``; the connection stays open).
+
+    With ``prefetch`` (the default) the next question is generated while an
+    answer is evaluated and pushed right after ``done``, so clients only ask
+    for the first question. ``difficulty`` pins the difficulty for the whole
+    connection; otherwise it adapts as over HTTP.
+    """
+    async with AsyncSessionLocal() as db:
+        session = await db.get(InterviewSession, session_id)
+    if session is None:
+        # 1008: policy violation, the closest standard code to a 404.
+        await websocket.close(code=1008, reason="Session not found")
+        return
+    await websocket.accept()
+    channel = InterviewChannel(websocket, session, difficulty, difficulty_policy, prefetch)
+    WS_CONNECTIONS.inc()
+    try:
+        await channel.run()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        channel.close()
+        WS_CONNECTIONS.dec()
+
+def summarize_batch(session_id: int, mode: str, results: List[BatchEvaluationResult],
+                    started: float) -> SessionEvaluationResponse:
+    evaluated = [result.feedback_json for result in results if result.feedback_json is not None]
+    assessments = {}
+    for evaluation in evaluated:
+        assessments[evaluation.overall_assessment] = assessments.get(evaluation.overall_assessment, 0) + 1
+
+    def average(field: str) -> Optional[float]:
+        return sum(getattr(e, field) for e in evaluated) / len(evaluated) if evaluated else None
+
+    return SessionEvaluationResponse(
+        session_id=session_id,
+        mode=mode,
+        evaluated=len(evaluated),
+        failed=len(results) - len(evaluated),
+        avg_score_correctness=average("score_correctness"),
+        avg_score_efficiency=average("score_efficiency"),
+        avg_score_clarity=average("score_clarity"),
+        assessments=assessments,
+        elapsed_ms=(time.perf_counter() - started) * 1000.0,
+        results=results,
+    )
+
+@app.post("/sessions/{session_id}/evaluate", response_model=SessionEvaluationResponse)
+async def evaluate_session(session_id: int, request: SessionEvaluateRequest, db: AsyncSession = Depends(get_db)):
+    """Grade many answers of a session at once.
+
+    With ``answers`` each one is evaluated and stored as the question's answer
+    (questions that already have one are rejected with 409); without,
+    the session's stored answers are re-graded (pending ones are left to their
+    jobs) and the rolling scores rebuilt. Evaluations run concurrently and all
+    results are written in one transaction; failed items are reported, not stored.
+    """
+    started = time.perf_counter()
+    result = await db.execute(select(InterviewSession).where(InterviewSession.id == session_id))
+    session = result.scalars().first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    max_concurrency = min(request.max_concurrency or BATCH_EVALUATION_CONCURRENCY, BATCH_EVALUATION_CONCURRENCY)
+
+    if request.answers:
+        counts = Counter(item.question_id for item in request.answers)
+        duplicates = sorted(question_id for question_id, count in counts.items() if count > 1)
+        if duplicates:
+            raise HTTPException(status_code=400, detail=f"Duplicate question ids: {duplicates}")
+        question_ids = set(counts)
+        result = await db.execute(
+            select(Question, exists().where(Answer.question_id == Question.id))
+            .where(Question.id.in_(question_ids), Question.session_id == session_id)
+        )
+        questions, answered = {}, []
+        for question, has_answer in result:
+            questions[question.id] = question
+            if has_answer:
+                answered.append(question.id)
+        missing = sorted(question_ids - questions.keys())
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Questions not found in this session: {missing}")
+        # A question has one answer (Question.answer); stored answers are re-graded without ``answers``.
+        if answered:
+            raise HTTPException(status_code=409, detail=f"Questions already answered: {sorted(answered)}")
+
+        evaluations = await interview_service.evaluate_answers(
+            [(questions[item.question_id].question_text, item.user_answer, session.tech_stack)
+             for item in request.answers],
+            max_concurrency=max_concurrency,
+            use_cache=not request.fresh,
+        )
+        new_answers = []
+        for item, evaluation in zip(request.answers, evaluations):
+            if isinstance(evaluation, Exception):
+                new_answers.append((item, None, evaluation))
+            else:
+                new_answers.append((item, record_answer(session, item.question_id, item.user_answer, evaluation), None))
+        db.add(session)
+        db.add_all(answer for _, answer, _ in new_answers if answer is not None)
+        await db.commit()
+        results = [
+            BatchEvaluationResult(
+                question_id=item.question_id,
+                answer_id=answer.id if answer is not None else None,
+                status=answer.status if answer is not None else ANSWER_FAILED,
+                feedback_json=answer.feedback_json if answer is not None else None,
+                error=str(error) if error is not None else None,
+            )
+            for item, answer, error in new_answers
+        ]
+        return summarize_batch(session_id, "new", results, started)
+
+    result = await db.execute(
+        select(Answer, Question.question_text)
+        .join(Question, Question.id == Answer.question_id)
+        .where(Question.session_id == session_id, Answer.status != ANSWER_PENDING)
+        .order_by(Answer.created_at, Answer.id)
+    )
+    rows = result.all()
+    evaluations = await interview_service.evaluate_answers(
+        [(question_text, answer.user_answer, session.tech_stack) for answer, question_text in rows],
+        max_concurrency=max_concurrency,
+        use_cache=not request.fresh,
+    )
+    results, recovered = [], []
+    for (answer, _), evaluation in zip(rows, evaluations):
+        if isinstance(evaluation, Exception):
+            results.append(BatchEvaluationResult(
+                question_id=answer.question_id, answer_id=answer.id, status=ANSWER_FAILED, error=str(evaluation),
+            ))
+        else:
+            if answer.status == ANSWER_FAILED:
+                recovered.append(answer.id)
+            answer.apply_evaluation(evaluation)
+            results.append(BatchEvaluationResult(
+                question_id=answer.question_id, answer_id=answer.id, status=answer.status, feedback_json=evaluation,
+            ))
+    # Replay every graded answer, oldest first, so the rolling scores match the new grades.
+    session.touch()
+    session.reset_scores()
+    for answer, _ in rows:
+        if answer.status == ANSWER_COMPLETED:
+            session.record_scores(
+                answer.score_correctness, answer.score_efficiency, answer.score_clarity, DIFFICULTY_EMA_ALPHA
+            )
+    if recovered:
+        # Answers whose background job gave up are graded now; close their jobs to match.
+        await db.execute(
+            update(EvaluationJob)
+            .where(EvaluationJob.answer_id.in_(recovered), EvaluationJob.status == JOB_FAILED)
+            .values(status=JOB_DONE, finished_at=datetime.utcnow(), error=None)
+        )
+    await db.commit()
+    return summarize_batch(session_id, "regrade", results, started)
@@ -0,0 +1,172 @@
+"""Small Prometheus-compatible metrics registry.
+
+Only what the app needs (counters, gauges and fixed-bucket histograms with
+labels) so recording a sample is a dict lookup and a few additions, cheap
+enough to leave on in production. ``render()`` produces the Prometheus text
+exposition format served on ``/metrics``.
+"""
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+LLM_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32, 64)
+HTTP_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+ATTEMPT_BUCKETS = (1, 2, 3, 4, 5, 8)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        registry.register(self)
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def collect(self) -> List[str]:
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = HTTP_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def collect(self) -> List[str]:
+        lines = self.header()
+        for key, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# LLM chains
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_duration_seconds", "Latency of LLM chain calls.", ("chain", "outcome"),
+    buckets=LLM_LATENCY_BUCKETS,
+)
+LLM_IN_FLIGHT = Gauge("llm_requests_in_flight", "LLM chain calls currently running.", ("chain",))
+LLM_TOKENS = Counter("llm_tokens_total", "Tokens reported by the model.", ("chain", "kind"))
+LLM_PARSER_FAILURES = Counter(
+    "llm_parser_failures_total", "LLM responses that could not be parsed into the expected JSON.", ("chain",)
+)
+LLM_GATEWAY_QUEUED = Gauge("llm_gateway_queued", "LLM calls waiting for a gateway slot.")
+LLM_GATEWAY_REJECTIONS = Counter(
+    "llm_gateway_rejections_total", "LLM calls shed by the gateway.", ("chain", "reason")
+)
+LLM_GATEWAY_RETRIES = Counter(
+    "llm_gateway_retries_total", "LLM calls retried after a rate-limit or unavailable error.", ("chain",)
+)
+LLM_CIRCUIT_OPEN = Gauge("llm_circuit_open", "1 while the LLM circuit breaker is open.")
+
+# Question generation
+QUESTION_CANDIDATES = Counter(
+    "question_candidates_total",
+    "Generated question candidates by outcome (accepted or why they were rejected).",
+    ("pipeline", "outcome"),
+)
+QUESTION_ATTEMPTS = Histogram(
+    "question_generation_attempts", "Candidates tried per generate_question call.", ("strategy",),
+    buckets=ATTEMPT_BUCKETS,
+)
+
+# HTTP
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time until the response starts, per route.", ("method", "route", "status"),
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being handled.")
+
+
+# WebSocket interviews
+WS_CONNECTIONS = Gauge("ws_interview_connections", "Open WebSocket interview channels.")
+QUESTION_PREFETCH = Counter(
+    "question_prefetch_total",
+    "Next questions of WebSocket interviews by outcome (prefetched, live, retargeted, discarded, failed).",
+    ("outcome",),
+)
+NEXT_QUESTION_WAIT = Histogram(
+    "ws_next_question_wait_seconds", "Time from an evaluation finishing to the next question being pushed.",
+    ("source",), buckets=HTTP_LATENCY_BUCKETS,
+)
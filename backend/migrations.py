@@ -0,0 +1,166 @@
+"""Minimal in-place schema upgrades for existing databases.
+
+``Base.metadata.create_all`` only creates missing tables, so columns added to
+existing models never reach databases created by an older release. The
+helpers here run after ``create_all`` (inside the same ``run_sync``) and add
+whatever is missing, backfilling derived data where needed.
+
+``python -m backend.migrations`` runs the same steps as app startup on their
+own, e.g. once before starting several workers (see gunicorn.conf.py).
+"""
+import asyncio
+
+from sqlalchemy import JSON, bindparam, inspect, select, text
+
+from .database import Base, engine
+from .models import InterviewSession, Question, Answer, DIFFICULTY_EMA_ALPHA, compress_feedback
+
+# Answers read per batch when moving feedback into feedback_zstd.
+MIGRATION_BATCH_ROWS = 5000
+# Indexes older releases created that a composite index now covers (same
+# leading column); dropped so writes stop maintaining them.
+SUPERSEDED_INDEXES = (
+    "ix_questions_session_id",  # ix_questions_session_id_created_at
+    "ix_interview_sessions_created_at",  # ix_interview_sessions_created_at_id
+)
+
+
+def _add_missing_columns(connection) -> dict:
+    """ALTER TABLE ... ADD COLUMN for model columns absent from the database.
+
+    Returns ``{table_name: [column_name, ...]}`` of what was added.
+    """
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    added = {}
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=connection.dialect)
+            ddl = f"ALTER TABLE {preparer.quote(table.name)} ADD COLUMN {preparer.quote(column.name)} {column_type}"
+            if column.server_default is not None:
+                default = column.server_default.arg
+                if isinstance(default, str):
+                    default = "'" + default.replace("'", "''") + "'"
+                else:
+                    default = default.text
+                ddl += f" DEFAULT {default}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+            connection.execute(text(ddl))
+            added.setdefault(table.name, []).append(column.name)
+    return added
+
+
+def _backfill_session_scores(connection) -> None:
+    """Rebuild rolling score aggregates from the answers table, oldest answer first."""
+    rows = connection.execute(
+        select(
+            Question.session_id,
+            Answer.score_correctness,
+            Answer.score_efficiency,
+            Answer.score_clarity,
+        )
+        .join(Question, Answer.question_id == Question.id)
+        .where(Answer.score_correctness.is_not(None))
+        .order_by(Question.session_id, Answer.created_at, Answer.id)
+    )
+    stats = {}
+    for session_id, correctness, efficiency, clarity in rows:
+        session = stats.get(session_id)
+        if session is None:
+            session = stats[session_id] = InterviewSession()
+        session.record_scores(correctness, efficiency, clarity, DIFFICULTY_EMA_ALPHA)
+
+    table = InterviewSession.__table__
+    for session_id, session in stats.items():
+        connection.execute(
+            table.update().where(table.c.id == session_id).values(
+                answer_count=session.answer_count,
+                last_score_correctness=session.last_score_correctness,
+                last_score_efficiency=session.last_score_efficiency,
+                last_score_clarity=session.last_score_clarity,
+                ema_score_correctness=session.ema_score_correctness,
+                ema_score_efficiency=session.ema_score_efficiency,
+                ema_score_clarity=session.ema_score_clarity,
+            )
+        )
+
+
+def _compress_legacy_feedback(connection, batch_rows: int = MIGRATION_BATCH_ROWS) -> int:
+    """Move the feedback of stored evaluation JSONs into feedback_zstd, in id order.
+
+    The JSON is replaced by JSON null; the scores already have their own
+    columns. Returns the number of answers moved. The space freed is only
+    returned to the OS by a ``VACUUM``.
+    """
+    table = Answer.__table__
+    move = (
+        table.update()
+        .where(table.c.id == bindparam("answer_id"))
+        .values(feedback_zstd=bindparam("compressed"), feedback_json=JSON.NULL)
+    )
+    last_id, moved = 0, 0
+    while True:
+        rows = connection.execute(
+            select(table.c.id, table.c.feedback_json)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(batch_rows)
+        ).all()
+        if not rows:
+            return moved
+        last_id = rows[-1][0]
+        batch = [
+            {"answer_id": answer_id, "compressed": compress_feedback(evaluation["feedback"])}
+            for answer_id, evaluation in rows
+            if isinstance(evaluation, dict) and isinstance(evaluation.get("feedback"), str)
+        ]
+        if batch:
+            connection.execute(move, batch)
+            moved += len(batch)
+
+
+def _create_missing_indexes(connection) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def _drop_superseded_indexes(connection) -> None:
+    preparer = connection.dialect.identifier_preparer
+    for name in SUPERSEDED_INDEXES:
+        connection.execute(text(f"DROP INDEX IF EXISTS {preparer.quote(name)}"))
+
+
+def upgrade_schema(connection) -> None:
+    added = _add_missing_columns(connection)
+    _create_missing_indexes(connection)
+    _drop_superseded_indexes(connection)
+    if "answer_count" in added.get(InterviewSession.__tablename__, []):
+        _backfill_session_scores(connection)
+    if "updated_at" in added.get(InterviewSession.__tablename__, []):
+        table = InterviewSession.__table__
+        connection.execute(table.update().values(updated_at=table.c.created_at))
+    if "feedback_zstd" in added.get(Answer.__tablename__, []):
+        _compress_legacy_feedback(connection)
+
+
+async def create_schema() -> None:
+    """Create missing tables, then upgrade existing ones."""
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        await connection.run_sync(upgrade_schema)
+
+
+async def _main() -> None:
+    await create_schema()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -1,41 +1,185 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, JSON
-from sqlalchemy.orm import relationship
+import os
+from typing import Optional
+
+import zstandard
+from sqlalchemy import Column, Integer, Float, String, Text, ForeignKey, DateTime, JSON, Index, LargeBinary, inspect
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from .database import Base
 
+# zstd level for stored evaluation feedback.
+FEEDBACK_ZSTD_LEVEL = int(os.getenv("FEEDBACK_ZSTD_LEVEL", "3"))
+# Weight of the newest answer in the per-dimension moving average (see record_scores).
+DIFFICULTY_EMA_ALPHA = float(os.getenv("DIFFICULTY_EMA_ALPHA", "0.5"))
+
 class InterviewSession(Base):
     __tablename__ = "interview_sessions"
+    __table_args__ = (
+        # Keyset pagination order for the session list.
+        Index("ix_interview_sessions_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     difficulty = Column(String, default="Medium")
     tech_stack = Column(String, default="General")
+
+    # Rolling score aggregates, updated in the same transaction as each answer
+    # so adaptive difficulty never has to scan the answers table.
+    answer_count = Column(Integer, default=0, nullable=False, server_default="0")
+    last_score_correctness = Column(Integer)
+    last_score_efficiency = Column(Integer)
+    last_score_clarity = Column(Integer)
+    ema_score_correctness = Column(Float)
+    ema_score_efficiency = Column(Float)
+    ema_score_clarity = Column(Float)
+
+    # Bumped by every write to the session, its questions or answers (see
+    # touch); session reads derive their ETag from them.
+    version = Column(Integer, default=0, nullable=False, server_default="0")
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
     
-    questions = relationship("Question", back_populates="session")
+    questions = relationship("Question", back_populates="session", order_by="Question.created_at")
+
+    def record_scores(self, correctness: int, efficiency: int, clarity: int, alpha: float) -> None:
+        """Fold one answer's scores into the rolling aggregates."""
+        def ema(previous, score):
+            return float(score) if previous is None else alpha * score + (1 - alpha) * previous
+
+        self.answer_count = (self.answer_count or 0) + 1
+        self.last_score_correctness = correctness
+        self.last_score_efficiency = efficiency
+        self.last_score_clarity = clarity
+        self.ema_score_correctness = ema(self.ema_score_correctness, correctness)
+        self.ema_score_efficiency = ema(self.ema_score_efficiency, efficiency)
+        self.ema_score_clarity = ema(self.ema_score_clarity, clarity)
+
+    def touch(self) -> None:
+        """Mark the session changed, so cached reads of it are no longer served."""
+        self.version = (self.version or 0) + 1
+        self.updated_at = datetime.utcnow()
+
+    def reset_scores(self) -> None:
+        """Clear the rolling aggregates, e.g. before replaying re-graded answers."""
+        self.answer_count = 0
+        self.last_score_correctness = self.last_score_efficiency = self.last_score_clarity = None
+        self.ema_score_correctness = self.ema_score_efficiency = self.ema_score_clarity = None
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        # Serves "questions of a session in order" without a sort.
+        Index("ix_questions_session_id_created_at", "session_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(Integer, ForeignKey("interview_sessions.id"))
     question_text = Column(Text, nullable=False)
     difficulty = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     session = relationship("InterviewSession", back_populates="questions")
     answer = relationship("Answer", back_populates="question", uselist=False)
 
+ANSWER_PENDING = "pending"
+ANSWER_COMPLETED = "completed"
+ANSWER_FAILED = "failed"
+
+def compress_feedback(feedback: str) -> bytes:
+    return zstandard.compress(feedback.encode(), FEEDBACK_ZSTD_LEVEL)
+
+def load_feedback(feedback_zstd: Optional[bytes], legacy_feedback_json) -> Optional[str]:
+    """Feedback text from the compressed column, or from an evaluation JSON stored before it existed."""
+    if feedback_zstd is not None:
+        return zstandard.decompress(feedback_zstd).decode()
+    if isinstance(legacy_feedback_json, dict):
+        return legacy_feedback_json.get("feedback")
+    return None
+
+def evaluation_json(score_correctness, score_efficiency, score_clarity, overall_assessment,
+                    feedback: Optional[str]) -> Optional[dict]:
+    """The evaluation as the API returns it; None for answers without one (pending or failed)."""
+    if score_correctness is None:
+        return None
+    return {
+        "score_correctness": score_correctness,
+        "score_efficiency": score_efficiency,
+        "score_clarity": score_clarity,
+        "feedback": feedback,
+        "overall_assessment": overall_assessment,
+    }
+
 class Answer(Base):
     __tablename__ = "answers"
 
     id = Column(Integer, primary_key=True, index=True)
-    question_id = Column(Integer, ForeignKey("questions.id"))
+    question_id = Column(Integer, ForeignKey("questions.id"), index=True)
     user_answer = Column(Text, nullable=False)
-    feedback_json = Column(JSON, nullable=False) # Stores the full evaluation JSON
+    # The full evaluation JSON of answers stored before feedback_zstd existed (the
+    # startup migration moves it there); JSON null for every other answer.
+    legacy_feedback_json = deferred(Column("feedback_json", JSON, nullable=False, default=JSON.NULL))
+    # Feedback text, zstd-compressed. Deferred like the column above, so list and
+    # aggregate queries never read it; undefer both to get the feedback.
+    feedback_zstd = deferred(Column(LargeBinary))
     score_correctness = Column(Integer)
     score_efficiency = Column(Integer)
     score_clarity = Column(Integer)
     overall_assessment = Column(String)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    status = Column(String, default=ANSWER_COMPLETED, nullable=False, server_default=ANSWER_COMPLETED)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     question = relationship("Question", back_populates="answer")
+    job = relationship("EvaluationJob", back_populates="answer", uselist=False)
+
+    @property
+    def feedback(self) -> Optional[str]:
+        """The feedback text, or None if it wasn't loaded (see ``feedback_zstd``)."""
+        if "_feedback" not in self.__dict__:
+            unloaded = inspect(self).unloaded
+            if "feedback_zstd" in unloaded or "legacy_feedback_json" in unloaded:
+                return None
+            self._feedback = load_feedback(self.feedback_zstd, self.legacy_feedback_json)
+        return self._feedback
+
+    @property
+    def feedback_json(self) -> Optional[dict]:
+        return evaluation_json(self.score_correctness, self.score_efficiency, self.score_clarity,
+                               self.overall_assessment, self.feedback)
+
+    def apply_evaluation(self, evaluation: dict) -> None:
+        self.feedback_zstd = compress_feedback(evaluation['feedback'])
+        self.legacy_feedback_json = None
+        self._feedback = evaluation['feedback']
+        self.score_correctness = evaluation['score_correctness']
+        self.score_efficiency = evaluation['score_efficiency']
+        self.score_clarity = evaluation['score_clarity']
+        self.overall_assessment = evaluation['overall_assessment']
+        self.status = ANSWER_COMPLETED
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+class EvaluationJob(Base):
+    """Durable record of an answer waiting for (or being given) its evaluation."""
+    __tablename__ = "evaluation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    answer_id = Column(Integer, ForeignKey("answers.id"), unique=True, nullable=False)
+    status = Column(String, default=JOB_QUEUED, nullable=False, index=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    answer = relationship("Answer", back_populates="job")
+
+class EvaluationCacheEntry(Base):
+    __tablename__ = "evaluation_cache"
+
+    key = Column(String, primary_key=True)  # xxh3-128 of the normalized inputs + prompt version
+    prompt_version = Column(String, index=True)
+    evaluation = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
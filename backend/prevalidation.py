@@ -0,0 +1,188 @@
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Callable, NamedTuple, Optional
+
+PREVALIDATION_ENABLED = os.getenv("PREVALIDATION_ENABLED", "true").lower() in {"1", "true", "yes"}
+# Confidence mode: candidates that pass every rule with at least this confidence
+# skip the LLM validation call entirely. Disabled unless explicitly turned on.
+PREVALIDATION_SKIP_LLM = os.getenv("PREVALIDATION_SKIP_LLM", "false").lower() in {"1", "true", "yes"}
+PREVALIDATION_CONFIDENCE_THRESHOLD = float(os.getenv("PREVALIDATION_CONFIDENCE_THRESHOLD", "0.9"))
+
+MIN_QUESTION_CHARS = int(os.getenv("PREVALIDATION_MIN_CHARS", "20"))
+MAX_QUESTION_CHARS = int(os.getenv("PREVALIDATION_MAX_CHARS", "600"))
+SPOKEN_WORDS_PER_MINUTE = float(os.getenv("SPOKEN_WORDS_PER_MINUTE", "150"))
+MAX_SPOKEN_SECONDS = float(os.getenv("MAX_SPOKEN_SECONDS", "45"))
+
+_WORD = re.compile(r"[a-z0-9+#]+")
+# Stack terms this short ("c", "r", "go", "js") are also everyday words or
+# fragments, so a match only counts as weak evidence.
+SHORT_TERM_CHARS = 2
+
+INTERROGATIVE_OPENERS = (
+    "what", "why", "how", "when", "where", "which", "who", "can", "could", "would", "should",
+    "is", "are", "do", "does", "explain", "describe", "design", "walk", "compare", "implement",
+    "write", "imagine", "suppose", "given", "tell", "discuss", "outline", "contrast", "identify",
+)
+
+# Words that don't identify a stack on their own.
+GENERIC_STACK_WORDS = {"general", "and", "the", "of", "for", "with", "development", "engineering"}
+
+# Terms that show a question is on-topic even when the stack name itself isn't used.
+STACK_ALIASES = {
+    "dsa": ("algorithm", "data structure", "array", "linked list", "tree", "graph", "hash", "heap",
+            "stack", "queue", "sort", "search", "complexity", "recursion", "dynamic programming"),
+    "javascript": ("js", "node", "promise", "closure", "event loop", "async", "dom", "prototype"),
+    "node.js": ("node", "npm", "express", "event loop", "stream", "module"),
+    "react": ("component", "hook", "jsx", "state", "props", "render"),
+    "python": ("pythonic", "django", "flask", "fastapi", "pandas", "gil", "decorator", "generator"),
+    "sql": ("query", "join", "index", "table", "database", "transaction", "select"),
+    "devops": ("ci", "cd", "pipeline", "docker", "kubernetes", "terraform", "deployment", "monitoring"),
+    "cloud": ("aws", "azure", "gcp", "serverless", "kubernetes", "s3", "lambda", "region"),
+    "system design": ("scalable", "scalability", "scaling", "architecture", "load balancer", "cache",
+                      "database", "throughput", "latency", "design"),
+}
+
+
+class RuleResult(NamedTuple):
+    passed: bool
+    confidence: float
+    reason: str = ""
+
+
+class PreValidationVerdict(NamedTuple):
+    passed: bool
+    confidence: float
+    rule: Optional[str] = None
+    reason: str = ""
+
+
+PreValidationRule = Callable[[str, str], RuleResult]
+
+
+def length_rule(question_text: str, tech_stack: str) -> RuleResult:
+    length = len(question_text.strip())
+    if length == 0:
+        return RuleResult(False, 1.0, "empty question")
+    if length < MIN_QUESTION_CHARS:
+        return RuleResult(False, 1.0, f"too short ({length} chars)")
+    if length > MAX_QUESTION_CHARS:
+        return RuleResult(False, 1.0, f"too long ({length} chars)")
+    return RuleResult(True, 1.0)
+
+
+def question_form_rule(question_text: str, tech_stack: str) -> RuleResult:
+    text = question_text.strip()
+    if text.endswith("?"):
+        return RuleResult(True, 1.0)
+    words = _WORD.findall(text.lower())
+    if words and words[0] in INTERROGATIVE_OPENERS:
+        return RuleResult(True, 0.8)
+    return RuleResult(False, 0.8, "not phrased as a question or task")
+
+
+@lru_cache(maxsize=256)
+def _alias_pattern(stack: str) -> Optional[re.Pattern]:
+    """Whole-word (plurals and -ing/-ed forms included) match of any alias of ``stack``."""
+    aliases = STACK_ALIASES.get(stack)
+    if not aliases:
+        return None
+    alternatives = "|".join(re.escape(alias) for alias in aliases)
+    return re.compile(rf"(?<![a-z0-9+#])(?:{alternatives})(?:s|es|ing|ed)?(?![a-z0-9+#])")
+
+
+def tech_stack_rule(question_text: str, tech_stack: str) -> RuleResult:
+    stack = " ".join((tech_stack or "").lower().split())
+    terms = [word for word in _WORD.findall(stack) if word not in GENERIC_STACK_WORDS]
+    if not terms:
+        # "General" interviews can be about anything.
+        return RuleResult(True, 1.0)
+
+    text = question_text.lower()
+    words = set(_WORD.findall(text))
+    matched = [term for term in terms if term in words]
+    if any(len(term) > SHORT_TERM_CHARS for term in matched):
+        return RuleResult(True, 1.0)
+    if matched:
+        return RuleResult(True, 0.7)
+    alias_pattern = _alias_pattern(stack)
+    if alias_pattern is not None and alias_pattern.search(text):
+        return RuleResult(True, 0.7)
+    return RuleResult(False, 0.7, f"mentions no {tech_stack} terms")
+
+
+def spoken_length_rule(question_text: str, tech_stack: str) -> RuleResult:
+    seconds = len(question_text.split()) / SPOKEN_WORDS_PER_MINUTE * 60.0
+    if seconds > MAX_SPOKEN_SECONDS:
+        return RuleResult(False, 1.0, f"takes ~{seconds:.0f}s to read aloud")
+    # Questions close to the limit are technically fine but a judgement call.
+    return RuleResult(True, 1.0 if seconds <= 0.75 * MAX_SPOKEN_SECONDS else 0.7)
+
+
+DEFAULT_RULES = {
+    "length": length_rule,
+    "question_form": question_form_rule,
+    "tech_stack": tech_stack_rule,
+    "spoken_length": spoken_length_rule,
+}
+
+
+class PreValidator:
+    """Cheap rule-based checks that run before the LLM validation chain.
+
+    Rules are plain callables ``(question_text, tech_stack) -> RuleResult`` and
+    run in registration order; the first failing rule rejects the candidate.
+    The verdict's confidence is the lowest confidence of all rules, which the
+    caller can use to skip LLM validation for clearly good candidates.
+    """
+
+    def __init__(self, rules: Optional[dict] = None,
+                 confidence_threshold: float = PREVALIDATION_CONFIDENCE_THRESHOLD):
+        self.rules = dict(DEFAULT_RULES if rules is None else rules)
+        self.confidence_threshold = confidence_threshold
+        self.checked = 0
+        self.confident = 0
+        self.llm_skipped = 0
+        self.rejections: Counter = Counter()
+
+    def register(self, name: str, rule: PreValidationRule) -> None:
+        self.rules[name] = rule
+
+    def check(self, question_text: str, tech_stack: str) -> PreValidationVerdict:
+        self.checked += 1
+        confidence = 1.0
+        for name, rule in self.rules.items():
+            result = rule(question_text or "", tech_stack or "")
+            if not result.passed:
+                self.rejections[name] += 1
+                return PreValidationVerdict(False, result.confidence, name, result.reason)
+            confidence = min(confidence, result.confidence)
+        if confidence >= self.confidence_threshold:
+            self.confident += 1
+        return PreValidationVerdict(True, confidence)
+
+    def is_confident(self, verdict: PreValidationVerdict) -> bool:
+        return verdict.passed and verdict.confidence >= self.confidence_threshold
+
+    def should_skip_llm(self, verdict: PreValidationVerdict) -> bool:
+        """Whether confidence mode lets ``verdict``'s candidate skip LLM validation; counts the skips."""
+        if not (PREVALIDATION_SKIP_LLM and self.is_confident(verdict)):
+            return False
+        self.llm_skipped += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "enabled": PREVALIDATION_ENABLED,
+            "skip_llm": PREVALIDATION_SKIP_LLM,
+            "confidence_threshold": self.confidence_threshold,
+            "checked": self.checked,
+            "confident": self.confident,
+            "llm_skipped": self.llm_skipped,
+            "rejected": sum(self.rejections.values()),
+            "rejections_by_rule": {name: self.rejections[name] for name in self.rules},
+        }
+
+
+prevalidator = PreValidator()
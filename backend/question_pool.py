@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from .services import interview_service
+from .similarity import DEDUP_ENABLED, jaccard, question_index, shingles
+
+logger = logging.getLogger(__name__)
+
+QUESTION_POOL_ENABLED = os.getenv("QUESTION_POOL_ENABLED", "true").lower() in {"1", "true", "yes"}
+QUESTION_POOL_LOW_WATERMARK = int(os.getenv("QUESTION_POOL_LOW_WATERMARK", "2"))
+QUESTION_POOL_HIGH_WATERMARK = int(os.getenv("QUESTION_POOL_HIGH_WATERMARK", "5"))
+# Seconds to wait before retrying a refill after the generator failed.
+QUESTION_POOL_RETRY_DELAY = float(os.getenv("QUESTION_POOL_RETRY_DELAY", "30"))
+# Comma separated tech stacks to pre-fill at startup, e.g. "Python,React,SQL".
+QUESTION_POOL_STACKS = [
+    stack.strip() for stack in os.getenv("QUESTION_POOL_STACKS", "").split(",") if stack.strip()
+]
+
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+PoolKey = Tuple[str, str]
+
+
+def normalize_tech_stack(tech_stack: Optional[str]) -> str:
+    """Collapse whitespace and case so "React ", "react" and "REACT" share a pool."""
+    return " ".join((tech_stack or "General").split()).lower()
+
+
+class QuestionPool:
+    """Background-filled pool of already validated questions.
+
+    Questions are bucketed by (normalized tech stack, difficulty). Taking a
+    question is a deque pop; whenever a bucket drops to the low watermark the
+    refill task is woken up and tops it back up to the high watermark using the
+    regular generate+validate pipeline. Each new question is checked again when
+    it is added, against the stored questions and everything already pooled,
+    so one refill can't fill a bucket with near-identical questions.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[str, str], Awaitable[dict]],
+        low_watermark: int = QUESTION_POOL_LOW_WATERMARK,
+        high_watermark: int = QUESTION_POOL_HIGH_WATERMARK,
+        retry_delay: float = QUESTION_POOL_RETRY_DELAY,
+    ):
+        if low_watermark < 0 or low_watermark >= high_watermark:
+            raise ValueError("Question pool watermarks must satisfy 0 <= low < high")
+        self._generate = generate
+        self.low_watermark = low_watermark
+        self.high_watermark = high_watermark
+        self.retry_delay = retry_delay
+
+        self._buckets: Dict[PoolKey, Deque[dict]] = {}
+        # Keep the first spelling we saw so prompts use "React" rather than "react".
+        self._display_stacks: Dict[str, str] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.refilled = 0
+        self.refill_failures = 0
+        self.duplicates = 0
+
+    def _key(self, tech_stack: str, difficulty: str) -> PoolKey:
+        normalized = normalize_tech_stack(tech_stack)
+        self._display_stacks.setdefault(normalized, " ".join((tech_stack or "General").split()))
+        return normalized, difficulty
+
+    def register(self, tech_stack: str, difficulty: str) -> None:
+        """Start tracking a bucket so the refill task keeps it warm."""
+        key = self._key(tech_stack, difficulty)
+        if key not in self._buckets:
+            self._buckets[key] = deque()
+            self._wakeup.set()
+
+    def take(self, tech_stack: str, difficulty: str,
+             accept: Optional[Callable[[dict], bool]] = None) -> Optional[dict]:
+        """Pop a pooled question, or return None so the caller generates live.
+
+        ``accept`` lets the caller skip questions it can't use (e.g. ones the
+        session has already seen); skipped questions stay in the pool.
+        """
+        key = self._key(tech_stack, difficulty)
+        bucket = self._buckets.get(key)
+        for _ in range(len(bucket) if bucket else 0):
+            question = bucket.popleft()
+            if accept is not None and not accept(question):
+                bucket.append(question)
+                continue
+            self.hits += 1
+            if len(bucket) <= self.low_watermark:
+                self._wakeup.set()
+            return question
+
+        self.misses += 1
+        if bucket is None:
+            self._buckets[key] = deque()
+        self._wakeup.set()
+        return None
+
+    def _is_duplicate(self, question: dict) -> bool:
+        """Whether ``question`` repeats a stored question or one already in the pool."""
+        if not DEDUP_ENABLED:
+            return False
+        text = question['question_text']
+        if question_index.find_duplicate(text) is not None:
+            return True
+        shingle_set = shingles(text)
+        return any(
+            jaccard(shingle_set, shingles(pooled['question_text'])) >= question_index.global_threshold
+            for bucket in self._buckets.values()
+            for pooled in bucket
+        )
+
+    def start(self) -> None:
+        for tech_stack in QUESTION_POOL_STACKS:
+            for difficulty in DIFFICULTIES:
+                self.register(tech_stack, difficulty)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _refill_loop(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            failed = False
+            for key, bucket in list(self._buckets.items()):
+                if len(bucket) > self.low_watermark:
+                    continue
+                tech_stack, difficulty = key
+                duplicates = 0
+                while len(bucket) < self.high_watermark:
+                    try:
+                        question = await self._generate(difficulty, self._display_stacks[tech_stack])
+                    except Exception as e:
+                        logger.warning("Error refilling question pool for %s: %r", key, e)
+                        self.refill_failures += 1
+                        failed = True
+                        break
+                    if self._is_duplicate(question):
+                        self.duplicates += 1
+                        duplicates += 1
+                        if duplicates >= self.high_watermark:
+                            # The generator keeps repeating itself; leave the bucket for now.
+                            failed = True
+                            break
+                        continue
+                    bucket.append(question)
+                    self.refilled += 1
+
+            if failed:
+                # Don't hammer the provider; try again later.
+                await asyncio.sleep(self.retry_delay)
+                self._wakeup.set()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": QUESTION_POOL_ENABLED,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "refilled": self.refilled,
+            "refill_failures": self.refill_failures,
+            "duplicates": self.duplicates,
+            "low_watermark": self.low_watermark,
+            "high_watermark": self.high_watermark,
+            "buckets": {
+                f"{tech_stack}:{difficulty}": len(bucket)
+                for (tech_stack, difficulty), bucket in self._buckets.items()
+            },
+        }
+
+
+question_pool = QuestionPool(interview_service.generate_question)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Literal, Optional, List
+from typing import Dict, Literal, Optional, List
 from datetime import datetime
 
 class QuestionCreate(BaseModel):
@@ -22,18 +22,60 @@ class EvaluationResponse(BaseModel):
     score_correctness: int
     score_efficiency: int
     score_clarity: int
-    feedback: str
+    # Only loaded for single-answer responses; None in lists such as GET /sessions/{id}?include=answers.
+    feedback: Optional[str] = None
     overall_assessment: str
 
 class AnswerResponse(BaseModel):
     id: int
     user_answer: str
-    feedback_json: EvaluationResponse
+    status: str = "completed"
+    feedback_json: Optional[EvaluationResponse] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+class AnswerStatusResponse(AnswerResponse):
+    question_id: int
+    error: Optional[str] = None
+
+class EvaluationJobResponse(BaseModel):
+    job_id: int
+    answer_id: int
+    status: str
+    poll_url: str
+
+class BatchAnswer(BaseModel):
+    question_id: int
+    user_answer: str
+
+class SessionEvaluateRequest(BaseModel):
+    # New answers to grade; when empty, the session's stored answers are re-graded.
+    answers: List[BatchAnswer] = []
+    # Ignore cached evaluations (fresh results still refresh the cache).
+    fresh: bool = False
+    max_concurrency: Optional[int] = Field(None, ge=1)
+
+class BatchEvaluationResult(BaseModel):
+    question_id: int
+    answer_id: Optional[int] = None
+    status: str
+    feedback_json: Optional[EvaluationResponse] = None
+    error: Optional[str] = None
+
+class SessionEvaluationResponse(BaseModel):
+    session_id: int
+    mode: Literal["new", "regrade"]
+    evaluated: int
+    failed: int
+    avg_score_correctness: Optional[float] = None
+    avg_score_efficiency: Optional[float] = None
+    avg_score_clarity: Optional[float] = None
+    assessments: Dict[str, int] = {}
+    elapsed_ms: float
+    results: List[BatchEvaluationResult]
+
 class SessionCreate(BaseModel):
     difficulty: str = "Medium"
     tech_stack: str = "General"
@@ -47,3 +89,24 @@ class SessionResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class QuestionDetailResponse(QuestionResponse):
+    answer: Optional[AnswerResponse] = None
+
+class SessionDetailResponse(SessionResponse):
+    questions: List[QuestionDetailResponse] = []
+
+class SessionSummaryResponse(BaseModel):
+    id: int
+    created_at: datetime
+    difficulty: str
+    tech_stack: str
+    question_count: int = 0
+    answered_count: int = 0
+    avg_score_correctness: Optional[float] = None
+    avg_score_efficiency: Optional[float] = None
+    avg_score_clarity: Optional[float] = None
+
+class SessionPageResponse(BaseModel):
+    items: List[SessionSummaryResponse]
+    next_cursor: Optional[str] = None
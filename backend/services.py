@@ -1,68 +1,417 @@
+import asyncio
+import logging
 import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple, Union
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.prompts import PromptTemplate
 from .schemas import EvaluationResponse
-from core.prompts import evaluation_prompt, generation_prompt, validation_prompt
-from core.parsers import InterviewEvaluation, GeneratedQuestion, QuestionValidationResult
+from .evaluation_cache import evaluation_cache
+from .similarity import question_index, DEDUP_ENABLED
+from .prevalidation import prevalidator, PREVALIDATION_ENABLED
+from .llm_gateway import LLMGateway, GatewayError
+from .metrics import (
+    LLM_REQUEST_SECONDS, LLM_IN_FLIGHT, LLM_PARSER_FAILURES, QUESTION_CANDIDATES, QUESTION_ATTEMPTS,
+)
+from core.chain import CHAIN_FACTORIES, get_llm
+from core.parsers import InterviewEvaluation
 
 load_dotenv()
 
-# Initialize LLM
-llm = ChatGoogleGenerativeAI(
-    model="models/gemini-2.0-flash",
-    google_api_key=os.environ.get("GOOGLE_API_KEY"),
-    temperature=0.7,
-    max_output_tokens=2048
-)
+logger = logging.getLogger(__name__)
+
+# "background" builds the LLM client and chains in a thread right after
+# startup, "startup" does it before serving, "off" waits for the first call.
+LLM_WARMUP = os.getenv("LLM_WARMUP", "background")
+
+MAX_ATTEMPTS = 3
+# "sequential" tries one candidate at a time; "speculative" races several.
+QUESTION_GENERATION_STRATEGY = os.getenv("QUESTION_GENERATION_STRATEGY", "sequential")
+SPECULATIVE_CANDIDATES = int(os.getenv("SPECULATIVE_CANDIDATES", "3"))
+# Upper bound in seconds for one generate+validate attempt.
+GENERATION_ATTEMPT_TIMEOUT = float(os.getenv("GENERATION_ATTEMPT_TIMEOUT", "30"))
+
+GENERATION_STRATEGIES = ("sequential", "speculative")
+# "two_stage" generates then validates with a second call; "fused" asks the
+# model for the question and its self-check in one structured response.
+QUESTION_PIPELINE = os.getenv("QUESTION_PIPELINE", "two_stage")
+QUESTION_PIPELINES = ("two_stage", "fused")
+# Evaluations run at once by one batch grading request (POST /sessions/{id}/evaluate).
+BATCH_EVALUATION_CONCURRENCY = int(os.getenv("BATCH_EVALUATION_CONCURRENCY", "8"))
+
+
+def percentile(sorted_samples, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, min(len(sorted_samples) - 1, int(round(pct / 100.0 * len(sorted_samples) + 0.5)) - 1))
+    return sorted_samples[rank]
+
+
+class LatencyTracker:
+    """Keeps the most recent latency samples so tail percentiles can be reported."""
+
+    def __init__(self, max_samples: int = 1000):
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+        self.failures = 0
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def summary(self) -> dict:
+        ordered = sorted(self.samples)
+        return {
+            "count": len(ordered),
+            "failures": self.failures,
+            "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+            "p50": percentile(ordered, 50),
+            "p95": percentile(ordered, 95),
+            "p99": percentile(ordered, 99),
+        }
+
+
+class _LazyChain:
+    """Chain attribute built on first access from core.chain's factories.
+
+    Assignable, so benchmarks can swap a chain for a stub.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, service, owner=None):
+        if service is None:
+            return self
+        chain = service._chains.get(self.name)
+        if chain is None:
+            with service._lock:
+                chain = service._chains.get(self.name)
+                if chain is None:
+                    chain = service._chains[self.name] = CHAIN_FACTORIES[self.name](service.llm)
+        return chain
+
+    def __set__(self, service, chain):
+        service._chains[self.name] = chain
+
 
 class InterviewService:
-    def __init__(self):
-        self.generation_chain = self._create_generation_chain()
-        self.validation_chain = self._create_validation_chain()
-        self.evaluation_chain = self._create_evaluation_chain()
-
-    def _create_generation_chain(self):
-        parser = JsonOutputParser(pydantic_object=GeneratedQuestion)
-        prompt = generation_prompt.partial(format_instructions=parser.get_format_instructions())
-        return prompt | llm | parser
-
-    def _create_validation_chain(self):
-        parser = JsonOutputParser(pydantic_object=QuestionValidationResult)
-        prompt = validation_prompt.partial(format_instructions=parser.get_format_instructions())
-        return prompt | llm | parser
-
-    def _create_evaluation_chain(self):
-        parser = JsonOutputParser(pydantic_object=InterviewEvaluation)
-        prompt = evaluation_prompt.partial(format_instructions=parser.get_format_instructions())
-        return prompt | llm | parser
-
-    async def generate_question(self, difficulty: str, tech_stack: str):
-        MAX_ATTEMPTS = 3
-        for _ in range(MAX_ATTEMPTS):
+    generation_chain = _LazyChain()
+    validation_chain = _LazyChain()
+    evaluation_chain = _LazyChain()
+    fused_generation_chain = _LazyChain()
+
+    def __init__(self, chat_model=None):
+        # Any LangChain chat model works; defaults to core.chain's shared client.
+        self._chat_model = chat_model
+        self._chains: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self.generation_latency: Dict[str, LatencyTracker] = {
+            strategy: LatencyTracker() for strategy in GENERATION_STRATEGIES
+        }
+        self.pipeline_latency: Dict[str, LatencyTracker] = {
+            pipeline: LatencyTracker() for pipeline in QUESTION_PIPELINES
+        }
+        self._token_callbacks: Dict[str, object] = {}
+        # Every chain call goes through the gateway's concurrency limits,
+        # backoff and circuit breaker.
+        self.gateway = LLMGateway()
+
+    @property
+    def llm(self):
+        return self._chat_model if self._chat_model is not None else get_llm()
+
+    def warm_up(self) -> None:
+        """Build the LLM client and every chain now (thread-safe)."""
+        for name in CHAIN_FACTORIES:
+            getattr(self, name)
+
+    def _llm_config(self, chain_name: str) -> dict:
+        callback = self._token_callbacks.get(chain_name)
+        if callback is None:
+            from .token_usage import TokenUsageCallback
+            callback = self._token_callbacks[chain_name] = TokenUsageCallback(chain_name)
+        return {"callbacks": [callback], "run_name": chain_name}
+
+    async def _ainvoke(self, chain_name: str, chain, inputs: dict):
+        """Invoke a chain through the gateway, recording latency, in-flight calls, tokens and parser failures."""
+        from langchain_core.exceptions import OutputParserException
+        outcome = "error"
+        config = self._llm_config(chain_name)
+        LLM_IN_FLIGHT.inc(chain=chain_name)
+        started = time.perf_counter()
+        try:
+            result = await self.gateway.call(chain_name, lambda: chain.ainvoke(inputs, config=config))
+            outcome = "ok"
+            return result
+        except GatewayError:
+            outcome = "shed"
+            raise
+        except OutputParserException:
+            outcome = "parser_error"
+            LLM_PARSER_FAILURES.inc(chain=chain_name)
+            raise
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            LLM_IN_FLIGHT.dec(chain=chain_name)
+            LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, chain=chain_name, outcome=outcome)
+
+    async def _astream(self, chain_name: str, chain, inputs: dict):
+        """Streaming counterpart of _ainvoke; latency is measured until the stream ends."""
+        from langchain_core.exceptions import OutputParserException
+        outcome = "error"
+        config = self._llm_config(chain_name)
+        LLM_IN_FLIGHT.inc(chain=chain_name)
+        started = time.perf_counter()
+        try:
+            async for chunk in self.gateway.stream(chain_name, lambda: chain.astream(inputs, config=config)):
+                yield chunk
+            outcome = "ok"
+        except GatewayError:
+            outcome = "shed"
+            raise
+        except OutputParserException:
+            outcome = "parser_error"
+            LLM_PARSER_FAILURES.inc(chain=chain_name)
+            raise
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = "cancelled"
+            raise
+        finally:
+            LLM_IN_FLIGHT.dec(chain=chain_name)
+            LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, chain=chain_name, outcome=outcome)
+
+    def _is_repeat(self, question_text: str, session_id: Optional[int]) -> bool:
+        if not DEDUP_ENABLED:
+            return False
+        return question_index.find_duplicate(question_text, session_id) is not None
+
+    async def _generate_two_stage(self, difficulty: str, tech_stack: str, session_id: Optional[int]) -> Optional[dict]:
+        generated = await self._ainvoke("generation", self.generation_chain, {
+            "difficulty": difficulty,
+            "tech_stack": tech_stack
+        })
+        # Repeats and obviously bad candidates are rejected locally, before
+        # paying for the validation call.
+        if self._is_repeat(generated['question_text'], session_id):
+            QUESTION_CANDIDATES.inc(pipeline="two_stage", outcome="duplicate")
+            return None
+        if PREVALIDATION_ENABLED:
+            verdict = prevalidator.check(generated['question_text'], tech_stack)
+            if not verdict.passed:
+                QUESTION_CANDIDATES.inc(pipeline="two_stage", outcome="prevalidation_rejected")
+                return None
+            if prevalidator.should_skip_llm(verdict):
+                QUESTION_CANDIDATES.inc(pipeline="two_stage", outcome="accepted_without_llm")
+                return generated
+        validation = await self._ainvoke("validation", self.validation_chain, {
+            "question_text": generated['question_text'],
+            "tech_stack": tech_stack
+        })
+        if not validation['is_valid']:
+            QUESTION_CANDIDATES.inc(pipeline="two_stage", outcome="llm_rejected")
+            return None
+        QUESTION_CANDIDATES.inc(pipeline="two_stage", outcome="accepted")
+        return generated
+
+    async def _generate_fused(self, difficulty: str, tech_stack: str, session_id: Optional[int]) -> Optional[dict]:
+        result = await self._ainvoke("fused_generation", self.fused_generation_chain, {
+            "difficulty": difficulty,
+            "tech_stack": tech_stack
+        })
+        if not result.get('is_valid'):
+            QUESTION_CANDIDATES.inc(pipeline="fused", outcome="llm_rejected")
+            return None
+        if self._is_repeat(result['question_text'], session_id):
+            QUESTION_CANDIDATES.inc(pipeline="fused", outcome="duplicate")
+            return None
+        if PREVALIDATION_ENABLED and not prevalidator.check(result['question_text'], tech_stack).passed:
+            QUESTION_CANDIDATES.inc(pipeline="fused", outcome="prevalidation_rejected")
+            return None
+        QUESTION_CANDIDATES.inc(pipeline="fused", outcome="accepted")
+        return {
+            "question_text": result['question_text'],
+            "difficulty": result['difficulty'],
+        }
+
+    async def _generate_candidate(self, difficulty: str, tech_stack: str, session_id: Optional[int] = None) -> Optional[dict]:
+        """Produce one validated candidate; returns None if the candidate was rejected."""
+        pipeline = QUESTION_PIPELINE if QUESTION_PIPELINE in QUESTION_PIPELINES else "two_stage"
+        started = time.perf_counter()
+        if pipeline == "fused":
+            candidate = await self._generate_fused(difficulty, tech_stack, session_id)
+        else:
+            candidate = await self._generate_two_stage(difficulty, tech_stack, session_id)
+        self.pipeline_latency[pipeline].record(time.perf_counter() - started)
+        return candidate
+
+    async def _generate_sequential(self, difficulty: str, tech_stack: str, session_id: Optional[int]):
+        for attempt in range(1, MAX_ATTEMPTS + 1):
             try:
-                generated = await self.generation_chain.ainvoke({
-                    "difficulty": difficulty,
-                    "tech_stack": tech_stack
-                })
-                validation = await self.validation_chain.ainvoke({
-                    "question_text": generated['question_text'],
-                    "tech_stack": tech_stack
-                })
-                
-                if validation['is_valid']:
-                    return generated
+                candidate = await asyncio.wait_for(
+                    self._generate_candidate(difficulty, tech_stack, session_id), GENERATION_ATTEMPT_TIMEOUT
+                )
+            except GatewayError:
+                # Retrying straight away would only add to the overload.
+                QUESTION_ATTEMPTS.observe(attempt, strategy="sequential")
+                raise
             except Exception as e:
-                print(f"Error generating question: {e}")
+                logger.warning("Error generating question: %r", e)
                 continue
+            if candidate:
+                QUESTION_ATTEMPTS.observe(attempt, strategy="sequential")
+                return candidate
+        QUESTION_ATTEMPTS.observe(MAX_ATTEMPTS, strategy="sequential")
+        raise Exception("Failed to generate a valid question")
+
+    async def _generate_speculative(self, difficulty: str, tech_stack: str, session_id: Optional[int]):
+        """Race several candidates; the first one that passes validation wins."""
+        attempts = [
+            asyncio.create_task(
+                asyncio.wait_for(
+                    self._generate_candidate(difficulty, tech_stack, session_id), GENERATION_ATTEMPT_TIMEOUT
+                )
+            )
+            for _ in range(max(1, SPECULATIVE_CANDIDATES))
+        ]
+        QUESTION_ATTEMPTS.observe(len(attempts), strategy="speculative")
+        shed = None
+        try:
+            for next_done in asyncio.as_completed(attempts):
+                try:
+                    candidate = await next_done
+                except GatewayError as e:
+                    shed = e
+                    continue
+                except Exception as e:
+                    logger.warning("Error generating question: %r", e)
+                    continue
+                if candidate:
+                    return candidate
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+            await asyncio.gather(*attempts, return_exceptions=True)
+        if shed is not None:
+            raise shed
         raise Exception("Failed to generate a valid question")
 
+    async def generate_question(self, difficulty: str, tech_stack: str, strategy: Optional[str] = None,
+                                session_id: Optional[int] = None):
+        strategy = strategy or QUESTION_GENERATION_STRATEGY
+        if strategy not in GENERATION_STRATEGIES:
+            raise ValueError(f"Unknown question generation strategy: {strategy}")
+
+        tracker = self.generation_latency[strategy]
+        started = time.perf_counter()
+        try:
+            if strategy == "speculative":
+                generated = await self._generate_speculative(difficulty, tech_stack, session_id)
+            else:
+                generated = await self._generate_sequential(difficulty, tech_stack, session_id)
+        except Exception:
+            tracker.failures += 1
+            raise
+        tracker.record(time.perf_counter() - started)
+        return generated
+
+    def generation_stats(self) -> dict:
+        """End-to-end generate_question latency per strategy, for side-by-side comparison."""
+        return {
+            "strategy": QUESTION_GENERATION_STRATEGY,
+            "speculative_candidates": SPECULATIVE_CANDIDATES,
+            "attempt_timeout": GENERATION_ATTEMPT_TIMEOUT,
+            "pipeline": QUESTION_PIPELINE,
+            "latency": {
+                strategy: tracker.summary() for strategy, tracker in self.generation_latency.items()
+            },
+            # Latency of a single candidate attempt, i.e. one (fused) or two (two-stage) LLM calls.
+            "attempt_latency": {
+                pipeline: tracker.summary() for pipeline, tracker in self.pipeline_latency.items()
+            },
+        }
+
     async def evaluate_answer(self, question_text: str, user_answer: str, tech_stack: str):
-        return await self.evaluation_chain.ainvoke({
+        cached = await evaluation_cache.get(question_text, user_answer, tech_stack)
+        if cached is not None:
+            return cached
+        evaluation = await self._ainvoke("evaluation", self.evaluation_chain, {
             "question": question_text,
             "answer": user_answer,
             "tech_stack": tech_stack
         })
+        await evaluation_cache.set(question_text, user_answer, tech_stack, evaluation)
+        return evaluation
+
+    async def evaluate_answers(
+        self,
+        items: Sequence[Tuple[str, str, str]],
+        max_concurrency: int = BATCH_EVALUATION_CONCURRENCY,
+        use_cache: bool = True,
+    ) -> List[Union[dict, Exception]]:
+        """Evaluate (question_text, user_answer, tech_stack) items concurrently.
+
+        Returns the evaluation, or the exception that item failed with, in
+        input order. Cached evaluations are looked up first; the remaining
+        distinct items go through one ``abatch`` capped at ``max_concurrency``,
+        so the batch takes about as long as its slowest evaluation. Each item
+        is still a separate gateway call (limits, retries, breaker).
+        """
+        from langchain_core.runnables import RunnableLambda
+
+        results: List[Union[dict, Exception, None]] = [None] * len(items)
+        if use_cache:
+            cached = await asyncio.gather(*(evaluation_cache.get(*item) for item in items))
+            for index, evaluation in enumerate(cached):
+                results[index] = evaluation
+
+        pending: Dict[Tuple[str, str, str], List[int]] = {}
+        for index, item in enumerate(items):
+            if results[index] is None:
+                pending.setdefault(tuple(item), []).append(index)
+        if not pending:
+            return results
+
+        chain = self.evaluation_chain
+
+        async def evaluate(inputs: dict) -> dict:
+            return await self._ainvoke("evaluation", chain, inputs)
+
+        keys = list(pending)
+        evaluations = await RunnableLambda(evaluate, name="evaluation_batch").abatch(
+            [{"question": question, "answer": answer, "tech_stack": stack} for question, answer, stack in keys],
+            config={"max_concurrency": max(1, max_concurrency)},
+            return_exceptions=True,
+        )
+        for key, evaluation in zip(keys, evaluations):
+            if not isinstance(evaluation, Exception):
+                await evaluation_cache.set(*key, evaluation)
+            for index in pending[key]:
+                results[index] = evaluation
+        return results
+
+    async def stream_evaluation(self, question_text: str, user_answer: str, tech_stack: str):
+        """Yield the evaluation as a growing dict while the model is still writing it.
+
+        JsonOutputParser parses the partial JSON on every chunk, so each yielded
+        dict contains every field seen so far; the last one is the full evaluation.
+        A cached evaluation is yielded once, complete.
+        """
+        cached = await evaluation_cache.get(question_text, user_answer, tech_stack)
+        if cached is not None:
+            yield cached
+            return
+        evaluation = None
+        async for partial in self._astream("evaluation", self.evaluation_chain, {
+            "question": question_text,
+            "answer": user_answer,
+            "tech_stack": tech_stack
+        }):
+            evaluation = partial
+            yield partial
+        if isinstance(evaluation, dict) and all(field in evaluation for field in InterviewEvaluation.model_fields):
+            await evaluation_cache.set(question_text, user_answer, tech_stack, evaluation)
 
 interview_service = InterviewService()
@@ -0,0 +1,19 @@
+"""Gunicorn worker class for serving the app with several processes (see gunicorn.conf.py)."""
+import os
+
+from uvicorn.workers import UvicornWorker as BaseUvicornWorker
+
+# Seconds a stopping worker waits for open connections (SSE streams, long polls,
+# WebSockets) to finish before closing them and running the shutdown hooks.
+HTTP_DRAIN_TIMEOUT = float(os.getenv("HTTP_DRAIN_TIMEOUT", "15"))
+
+
+class UvicornWorker(BaseUvicornWorker):
+    """Uvicorn's worker with a bounded graceful shutdown.
+
+    Gunicorn kills a worker that hasn't exited ``graceful_timeout`` seconds
+    after SIGTERM; bounding the connection drain leaves the rest of that time
+    to the shutdown hooks (the evaluation job drain).
+    """
+
+    CONFIG_KWARGS = {**BaseUvicornWorker.CONFIG_KWARGS, "timeout_graceful_shutdown": HTTP_DRAIN_TIMEOUT}
@@ -0,0 +1,165 @@
+import os
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+import xxhash
+from sqlalchemy import select
+
+from .database import AsyncSessionLocal
+from .models import Question
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() in {"1", "true", "yes"}
+# Jaccard similarity (over word shingles) at which a candidate counts as a repeat.
+DEDUP_SESSION_THRESHOLD = float(os.getenv("DEDUP_SESSION_THRESHOLD", "0.5"))
+DEDUP_GLOBAL_THRESHOLD = float(os.getenv("DEDUP_GLOBAL_THRESHOLD", "0.8"))
+
+SHINGLE_SIZE = 2
+# One-permutation MinHash: each shingle hash lands in one of NUM_BINS bins and
+# only the per-bin minimum is kept, so a sketch costs O(shingles) not O(k*shingles).
+NUM_BINS = 32
+# 8 bands of 4 rows: pairs at 0.8 similarity share a bucket with ~98.5%
+# probability, pairs at 0.2 with ~1.3%.
+LSH_BANDS = 8
+
+_BIN_BITS = NUM_BINS.bit_length() - 1
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def shingles(text: str) -> Set[int]:
+    """32-bit hashes of the overlapping word shingles of the normalized text."""
+    words = _NON_WORD.sub(" ", (text or "").lower()).split()
+    if len(words) <= SHINGLE_SIZE:
+        return {xxhash.xxh32_intdigest(" ".join(words))}
+    return {
+        xxhash.xxh32_intdigest(" ".join(words[i:i + SHINGLE_SIZE]))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash(shingle_set: Set[int]) -> Tuple[int, ...]:
+    """One-permutation MinHash sketch with rotation densification for empty bins."""
+    bins = [None] * NUM_BINS
+    for h in shingle_set:
+        index = h & (NUM_BINS - 1)
+        value = h >> _BIN_BITS
+        current = bins[index]
+        if current is None or value < current:
+            bins[index] = value
+    if None not in bins:
+        return tuple(bins)
+
+    sketch = list(bins)
+    for index, value in enumerate(bins):
+        if value is not None:
+            continue
+        # Borrow the next non-empty bin, offset by the distance so borrowed
+        # values from different positions don't look identical.
+        offset = 1
+        while bins[(index + offset) % NUM_BINS] is None:
+            offset += 1
+        sketch[index] = bins[(index + offset) % NUM_BINS] + (offset << 32)
+    return tuple(sketch)
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class QuestionIndex:
+    """In-process MinHash/LSH index over question texts.
+
+    Sessions only hold a handful of questions, so the per-session check compares
+    exact shingle Jaccard similarity against each of them. The global check
+    uses LSH buckets to narrow the whole corpus to a few candidates whose exact
+    similarity is then compared with the global threshold.
+    """
+
+    def __init__(self, session_threshold: float = DEDUP_SESSION_THRESHOLD,
+                 global_threshold: float = DEDUP_GLOBAL_THRESHOLD, bands: int = LSH_BANDS):
+        if NUM_BINS % bands:
+            raise ValueError("LSH bands must evenly divide the number of bins")
+        self.session_threshold = session_threshold
+        self.global_threshold = global_threshold
+        self.bands = bands
+        self.rows = NUM_BINS // bands
+
+        self._shingles: Dict[int, Set[int]] = {}
+        self._by_session: Dict[int, List[int]] = defaultdict(list)
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[int]] = defaultdict(set)
+
+        self.lookups = 0
+        self.session_duplicates = 0
+        self.global_duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self._shingles)
+
+    def _bands(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def add(self, question_id: int, session_id: Optional[int], text: str) -> None:
+        if question_id in self._shingles:
+            return
+        shingle_set = shingles(text)
+        self._shingles[question_id] = shingle_set
+        if session_id is not None:
+            self._by_session[session_id].append(question_id)
+        for key in self._bands(minhash(shingle_set)):
+            self._buckets[key].add(question_id)
+
+    def find_duplicate(self, text: str, session_id: Optional[int] = None) -> Optional[Tuple[int, float, str]]:
+        """Return (question_id, similarity, scope) of a repeat of ``text``, or None."""
+        self.lookups += 1
+        if not self._shingles:
+            return None
+        shingle_set = shingles(text)
+
+        if session_id is not None:
+            for question_id in self._by_session.get(session_id, ()):
+                similarity = jaccard(shingle_set, self._shingles[question_id])
+                if similarity >= self.session_threshold:
+                    self.session_duplicates += 1
+                    return question_id, similarity, "session"
+
+        candidates: Set[int] = set()
+        for key in self._bands(minhash(shingle_set)):
+            bucket = self._buckets.get(key)
+            if bucket:
+                candidates |= bucket
+
+        best = None
+        for question_id in candidates:
+            similarity = jaccard(shingle_set, self._shingles[question_id])
+            if similarity >= self.global_threshold and (best is None or similarity > best[1]):
+                best = (question_id, similarity, "global")
+        if best is not None:
+            self.global_duplicates += 1
+        return best
+
+    async def warm(self, session_factory=AsyncSessionLocal, chunk_size: int = 1000) -> None:
+        """Index every stored question; called once at startup."""
+        async with session_factory() as db:
+            result = await db.stream(
+                select(Question.id, Question.session_id, Question.question_text)
+                .execution_options(yield_per=chunk_size)
+            )
+            async for question_id, session_id, text in result:
+                self.add(question_id, session_id, text)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": DEDUP_ENABLED,
+            "indexed": len(self._shingles),
+            "lookups": self.lookups,
+            "session_duplicates": self.session_duplicates,
+            "global_duplicates": self.global_duplicates,
+            "session_threshold": self.session_threshold,
+            "global_threshold": self.global_threshold,
+        }
+
+
+question_index = QuestionIndex()
@@ -0,0 +1,36 @@
+"""LangChain callback feeding token usage into the metrics registry.
+
+Kept out of metrics.py so recording metrics doesn't require importing
+LangChain; services imports it when the first chain is called.
+"""
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .metrics import LLM_TOKENS
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Adds the model's reported prompt/completion token usage to LLM_TOKENS.
+
+    Only ``on_llm_end`` does anything, so the handler runs inline and opts out
+    of chain, agent, retriever and chat-model events: on the async path
+    LangChain would otherwise dispatch every event, streamed tokens included,
+    to a thread pool.
+    """
+
+    run_inline = True
+    ignore_chain = True
+    ignore_agent = True
+    ignore_retriever = True
+    ignore_chat_model = True
+
+    def __init__(self, chain: str):
+        self.chain = chain
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if not usage:
+                    continue
+                LLM_TOKENS.inc(usage.get("input_tokens", 0), chain=self.chain, kind="prompt")
+                LLM_TOKENS.inc(usage.get("output_tokens", 0), chain=self.chain, kind="completion")
@@ -0,0 +1,112 @@
+"""Committed answers per second under concurrent writers, per engine profile.
+
+Each writer repeatedly runs the database part of ``submit_answer``: load the
+question with its session, fold the scores into the session aggregates,
+insert the Answer and commit. SQLite profiles run against a fresh temporary
+file; pass ``--server-url`` to also measure a Postgres (or other server)
+database with the "server" profile.
+
+    python -m benchmarks.db_write_contention --writers 32 --answers 2000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("GOOGLE_API_KEY", "offline")
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, sessionmaker
+
+from backend.database import Base, create_engine_for_profile
+from backend.main import record_answer
+from backend.models import InterviewSession, Question
+
+EVALUATION = {
+    "score_correctness": 4,
+    "score_efficiency": 3,
+    "score_clarity": 5,
+    "feedback": "Solid answer. " * 40,
+    "overall_assessment": "Good",
+}
+
+
+async def run_profile(url: str, profile: str, writers: int, answers: int, sessions: int) -> dict:
+    engine = create_engine_for_profile(url, profile)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with factory() as db:
+        question_ids = []
+        for i in range(sessions):
+            session = InterviewSession(tech_stack="Python", difficulty="Medium")
+            question = Question(session=session, question_text=f"Question {i}?", difficulty="Medium")
+            db.add_all([session, question])
+            await db.flush()
+            question_ids.append(question.id)
+        await db.commit()
+
+    remaining = iter(range(answers))
+    committed = 0
+    failures = 0
+
+    async def writer():
+        nonlocal committed, failures
+        for i in remaining:
+            question_id = question_ids[i % len(question_ids)]
+            try:
+                async with factory() as db:
+                    result = await db.execute(
+                        select(Question).options(joinedload(Question.session)).where(Question.id == question_id)
+                    )
+                    question = result.scalars().first()
+                    db.add(record_answer(question.session, question.id, "An answer", EVALUATION))
+                    await db.commit()
+                committed += 1
+            except Exception as e:
+                failures += 1
+                if failures <= 3:
+                    print(f"  [{profile}] write failed: {e!r:.120}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(writers)))
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+    return {
+        "profile": profile,
+        "committed": committed,
+        "failures": failures,
+        "seconds": elapsed,
+        "answers_per_second": committed / elapsed if elapsed else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=32, help="concurrent writers")
+    parser.add_argument("--answers", type=int, default=2000, help="answers to commit per profile")
+    parser.add_argument("--sessions", type=int, default=50, help="distinct sessions written to")
+    parser.add_argument("--server-url", help="async URL of a server database to benchmark with the 'server' profile")
+    args = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in ("basic", "sqlite"):
+            url = f"sqlite+aiosqlite:///{tmp}/{profile}.db"
+            runs.append(await run_profile(url, profile, args.writers, args.answers, args.sessions))
+    if args.server_url:
+        for profile in ("basic", "server"):
+            runs.append(await run_profile(args.server_url, profile, args.writers, args.answers, args.sessions))
+
+    print(f"{'profile':10} {'committed':>10} {'failed':>7} {'seconds':>8} {'answers/s':>10}")
+    for run in runs:
+        print(f"{run['profile']:10} {run['committed']:>10} {run['failures']:>7} "
+              f"{run['seconds']:>8.2f} {run['answers_per_second']:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
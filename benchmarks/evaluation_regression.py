@@ -0,0 +1,352 @@
+"""Re-grade stored answers with a candidate evaluation chain and measure drift.
+
+Streams (question, answer, tech stack, stored grades) from the answers table
+in id order, ``--chunk-size`` rows at a time (``yield_per``), re-evaluates
+each with the candidate chain (``--prompt-file``, ``--model``,
+``--output-mode``) at most ``--concurrency`` at a time, and appends one NDJSON
+record per answer to ``--output``. Reports the score delta per dimension, the
+agreement rate on ``overall_assessment`` and throughput.
+
+Progress is checkpointed next to the output (``<output>.checkpoint.json``):
+the highest answer id below which everything is done, the few finished ids
+above it, the output size and the running totals. Running the same command
+again resumes; ``--restart`` starts over. Memory use is bounded by the chunk
+size and the concurrency, not by the number of answers.
+
+    python -m benchmarks.evaluation_regression --prompt-file candidate.txt --output drift.ndjson
+    python -m benchmarks.evaluation_regression --model models/gemini-2.5-flash --concurrency 16
+    LLM_BACKEND=fake python -m benchmarks.evaluation_regression --limit 1000 --min-agreement 0.8
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Optional
+
+DIMENSIONS = ("score_correctness", "score_efficiency", "score_clarity")
+# Times a call shed by the LLM gateway (rate limits, open circuit) is retried after its Retry-After.
+SHED_RETRIES = 5
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./interview_v2.db"))
+    parser.add_argument("--output", default="evaluation_regression.ndjson", help="NDJSON file with one record per answer.")
+    parser.add_argument("--report", help="Also write the summary as JSON to this file.")
+    parser.add_argument("--prompt-file", help="Candidate evaluation prompt template (default: the current one).")
+    parser.add_argument("--model", help="Candidate model (default: LLM_MODEL).")
+    parser.add_argument("--backend", choices=("gemini", "fake"), help="Default: LLM_BACKEND.")
+    parser.add_argument("--output-mode", choices=("schema", "compact"), help="Default: LLM_OUTPUT_MODE.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--chunk-size", type=int, default=500, help="Rows fetched from the database at a time.")
+    parser.add_argument("--limit", type=int, help="Evaluate at most this many answers in this run.")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="Save progress every N answers.")
+    parser.add_argument("--restart", action="store_true", help="Discard previous output and checkpoint.")
+    parser.add_argument("--min-agreement", type=float, help="Exit non-zero if overall_assessment agreement is lower.")
+    parser.add_argument("--max-mean-abs-delta", type=float,
+                        help="Exit non-zero if any dimension's mean absolute delta is higher.")
+    return parser.parse_args(argv)
+
+
+class DriftTotals:
+    """Running totals that fit in the checkpoint, whatever the corpus size."""
+
+    def __init__(self, data: Optional[dict] = None):
+        data = data or {}
+        self.evaluated = data.get("evaluated", 0)
+        self.errors = data.get("errors", 0)
+        self.elapsed = data.get("elapsed", 0.0)
+        self.latency_sum = data.get("latency_sum", 0.0)
+        self.agreements = data.get("agreements", 0)
+        self.dimensions = data.get("dimensions") or {
+            dimension: {"delta_sum": 0, "abs_delta_sum": 0, "exact": 0, "within_one": 0} for dimension in DIMENSIONS
+        }
+        self.changes = data.get("changes", {})
+
+    def record(self, baseline: dict, candidate: dict, latency: float) -> dict:
+        self.evaluated += 1
+        self.latency_sum += latency
+        deltas = {}
+        for dimension in DIMENSIONS:
+            delta = candidate[dimension] - baseline[dimension]
+            deltas[dimension] = delta
+            totals = self.dimensions[dimension]
+            totals["delta_sum"] += delta
+            totals["abs_delta_sum"] += abs(delta)
+            totals["exact"] += delta == 0
+            totals["within_one"] += abs(delta) <= 1
+        if candidate["overall_assessment"] == baseline["overall_assessment"]:
+            self.agreements += 1
+        else:
+            change = f"{baseline['overall_assessment']} -> {candidate['overall_assessment']}"
+            self.changes[change] = self.changes.get(change, 0) + 1
+        return deltas
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+    def summary(self) -> dict:
+        evaluated = self.evaluated or 1
+        return {
+            "evaluated": self.evaluated,
+            "errors": self.errors,
+            "elapsed_seconds": self.elapsed,
+            "answers_per_minute": self.evaluated / self.elapsed * 60.0 if self.elapsed else 0.0,
+            "mean_latency_ms": self.latency_sum / evaluated * 1000.0,
+            "agreement_rate": self.agreements / evaluated,
+            "dimensions": {
+                dimension: {
+                    "mean_delta": totals["delta_sum"] / evaluated,
+                    "mean_abs_delta": totals["abs_delta_sum"] / evaluated,
+                    "exact_rate": totals["exact"] / evaluated,
+                    "within_one_rate": totals["within_one"] / evaluated,
+                }
+                for dimension, totals in self.dimensions.items()
+            },
+            "assessment_changes": dict(sorted(self.changes.items(), key=lambda item: -item[1])),
+        }
+
+
+class Checkpoint:
+    """Resume point: every answer id <= watermark is done, plus the ids in ``done_above``."""
+
+    def __init__(self, path: str, config: dict):
+        self.path = path
+        self.config = config
+        self.watermark = 0
+        self.done_above = set()
+        self.output_bytes = 0
+        self.totals = DriftTotals()
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            data = json.load(f)
+        if data["config"] != self.config:
+            raise SystemExit(
+                f"{self.path} was written for a different candidate ({data['config']}); use --restart to start over"
+            )
+        self.watermark = data["watermark"]
+        self.done_above = set(data["done_above"])
+        self.output_bytes = data["output_bytes"]
+        self.totals = DriftTotals(data["totals"])
+        return True
+
+    def save(self) -> None:
+        temporary = self.path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump({
+                "config": self.config,
+                "watermark": self.watermark,
+                "done_above": sorted(self.done_above),
+                "output_bytes": self.output_bytes,
+                "totals": self.totals.to_dict(),
+            }, f)
+        os.replace(temporary, self.path)
+
+
+def candidate_config(args) -> dict:
+    from core.chain import LLM_BACKEND, LLM_MODEL, LLM_OUTPUT_MODE
+
+    prompt_hash = None
+    if args.prompt_file:
+        with open(args.prompt_file, "rb") as f:
+            prompt_hash = hashlib.sha256(f.read()).hexdigest()[:16]
+    return {
+        "backend": args.backend or LLM_BACKEND,
+        "model": args.model or LLM_MODEL,
+        "output_mode": args.output_mode or LLM_OUTPUT_MODE,
+        "prompt_sha256": prompt_hash,
+    }
+
+
+def build_chain(args, config: dict):
+    from core.chain import create_evaluation_chain, create_llm
+
+    template = None
+    if args.prompt_file:
+        with open(args.prompt_file) as f:
+            template = f.read()
+    llm = create_llm(model=config["model"], backend=config["backend"])
+    return create_evaluation_chain(llm, output_mode=config["output_mode"], template=template)
+
+
+class RegressionRun:
+    def __init__(self, args, checkpoint: Checkpoint, chain, output):
+        from backend.llm_gateway import LLMGateway
+
+        self.args = args
+        self.checkpoint = checkpoint
+        self.chain = chain
+        self.output = output
+        self.gateway = LLMGateway(max_concurrency=args.concurrency)
+        self.in_flight = set()
+        self.last_started = checkpoint.watermark
+        self.since_save = 0
+
+    async def evaluate(self, inputs: dict) -> dict:
+        from backend.llm_gateway import GatewayError
+
+        for attempt in range(SHED_RETRIES + 1):
+            try:
+                return await self.gateway.call("evaluation", lambda: self.chain.ainvoke(inputs))
+            except GatewayError as e:
+                if attempt == SHED_RETRIES:
+                    raise
+                await asyncio.sleep(e.retry_after)
+
+    async def run_one(self, row) -> None:
+        baseline = {dimension: getattr(row, dimension) for dimension in DIMENSIONS}
+        baseline["overall_assessment"] = row.overall_assessment
+        record = {"answer_id": row.id, "question_id": row.question_id, "tech_stack": row.tech_stack,
+                  "baseline": baseline}
+        started = time.perf_counter()
+        try:
+            candidate = await self.evaluate(
+                {"question": row.question_text, "answer": row.user_answer, "tech_stack": row.tech_stack}
+            )
+            latency = time.perf_counter() - started
+            record.update(
+                candidate={field: candidate[field] for field in (*DIMENSIONS, "overall_assessment")},
+                delta=self.checkpoint.totals.record(baseline, candidate, latency),
+                agree=candidate["overall_assessment"] == baseline["overall_assessment"],
+                latency_ms=round(latency * 1000.0, 1),
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.checkpoint.totals.errors += 1
+            record.update(error=f"{type(e).__name__}: {e}")
+        self.output.write((json.dumps(record) + "\n").encode())
+        self.in_flight.discard(row.id)
+        self.checkpoint.done_above.add(row.id)
+        self.since_save += 1
+        if self.since_save >= self.args.checkpoint_every:
+            self.save()
+
+    def save(self) -> None:
+        checkpoint = self.checkpoint
+        checkpoint.watermark = min(self.in_flight) - 1 if self.in_flight else self.last_started
+        checkpoint.done_above = {answer_id for answer_id in checkpoint.done_above if answer_id > checkpoint.watermark}
+        self.output.flush()
+        checkpoint.output_bytes = self.output.tell()
+        checkpoint.save()
+        self.since_save = 0
+
+    async def run(self, engine) -> None:
+        from sqlalchemy import select
+        from backend.models import Answer, InterviewSession, Question, ANSWER_COMPLETED
+
+        query = (
+            select(Answer.id, Answer.question_id, Answer.user_answer, Question.question_text,
+                   InterviewSession.tech_stack, Answer.overall_assessment, *(getattr(Answer, d) for d in DIMENSIONS))
+            .join(Question, Question.id == Answer.question_id)
+            .join(InterviewSession, InterviewSession.id == Question.session_id)
+            .where(Answer.id > self.checkpoint.watermark, Answer.status == ANSWER_COMPLETED,
+                   Answer.score_correctness.is_not(None))
+            .order_by(Answer.id)
+            .execution_options(yield_per=self.args.chunk_size)
+        )
+        slots = asyncio.Semaphore(self.args.concurrency)
+        tasks = set()
+        started = time.perf_counter()
+        scheduled = 0
+
+        def finished(task):
+            tasks.discard(task)
+            slots.release()
+
+        try:
+            async with engine.connect() as connection:
+                result = await connection.stream(query)
+                async for row in result:
+                    if row.id in self.checkpoint.done_above:
+                        continue
+                    if self.args.limit is not None and scheduled >= self.args.limit:
+                        break
+                    await slots.acquire()
+                    self.in_flight.add(row.id)
+                    self.last_started = row.id
+                    task = asyncio.create_task(self.run_one(row))
+                    tasks.add(task)
+                    task.add_done_callback(finished)
+                    scheduled += 1
+                await result.close()
+            await asyncio.gather(*tasks)
+        finally:
+            # Interrupted: unfinished answers stay in in_flight, below the saved watermark's reach.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.checkpoint.totals.elapsed += time.perf_counter() - started
+            self.save()
+
+
+def print_summary(summary: dict) -> None:
+    print(f"answers: {summary['evaluated']} evaluated, {summary['errors']} errors, "
+          f"{summary['answers_per_minute']:.1f} answers/min "
+          f"({summary['elapsed_seconds']:.1f}s, mean latency {summary['mean_latency_ms']:.0f}ms)")
+    print(f"{'dimension':20} {'mean delta':>10} {'mean |delta|':>13} {'exact':>7} {'within 1':>9}")
+    for dimension, stats in summary["dimensions"].items():
+        print(f"{dimension:20} {stats['mean_delta']:+10.2f} {stats['mean_abs_delta']:13.2f} "
+              f"{stats['exact_rate']:7.1%} {stats['within_one_rate']:9.1%}")
+    print(f"overall_assessment agreement: {summary['agreement_rate']:.1%}")
+    for change, count in list(summary["assessment_changes"].items())[:8]:
+        print(f"  {change:34} {count}")
+
+
+async def main_async(args) -> dict:
+    from backend.database import create_engine_for_profile
+
+    config = candidate_config(args)
+    checkpoint = Checkpoint(args.output + ".checkpoint.json", config)
+    if args.restart:
+        for path in (args.output, checkpoint.path):
+            if os.path.exists(path):
+                os.remove(path)
+    elif checkpoint.load():
+        print(f"resuming after answer {checkpoint.watermark} ({checkpoint.totals.evaluated} evaluated so far)")
+
+    # Drop records written after the last checkpoint; those answers are evaluated again.
+    with open(args.output, "ab") as f:
+        f.truncate(checkpoint.output_bytes)
+    engine = create_engine_for_profile(args.database_url)
+    try:
+        with open(args.output, "ab") as output:
+            await RegressionRun(args, checkpoint, build_chain(args, config), output).run(engine)
+    finally:
+        await engine.dispose()
+    return checkpoint.totals.summary()
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    os.environ.setdefault("GOOGLE_API_KEY", os.getenv("GEMINI_API_KEY", "offline"))
+    try:
+        summary = asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        print("interrupted; progress saved, run the same command again to resume")
+        return 130
+    print_summary(summary)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    failed = False
+    if args.min_agreement is not None and summary["agreement_rate"] < args.min_agreement:
+        failed = True
+        print(f"FAIL: agreement {summary['agreement_rate']:.1%} is below {args.min_agreement:.1%}")
+    if args.max_mean_abs_delta is not None:
+        for dimension, stats in summary["dimensions"].items():
+            if stats["mean_abs_delta"] > args.max_mean_abs_delta:
+                failed = True
+                print(f"FAIL: {dimension} mean |delta| {stats['mean_abs_delta']:.2f} is over {args.max_mean_abs_delta}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Check that ``GET /export`` streams in constant memory.
+
+Seeds a temporary database with ``--sessions`` sessions (each with
+``--questions`` answered questions and a ``--feedback-bytes`` evaluation),
+then drains the export generator for a small and the full data set and
+reports rows/s, output size and the peak memory traced while exporting.
+Fails if the peak for the full set exceeds the small set's by more than
+``--max-growth`` (a factor), i.e. if memory grows with the export size.
+
+The generator is drained directly: httpx's in-process ASGI transport
+buffers whole responses, which would hide what the server holds.
+
+    python -m benchmarks.export_memory
+    python -m benchmarks.export_memory --sessions 50000 --compress
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_dir}/export.db"
+os.environ.setdefault("GOOGLE_API_KEY", "offline")
+
+from backend.database import engine, Base
+from backend.export import export_query, export_sessions, ndjson_chunks
+from backend.models import InterviewSession, Question, Answer, compress_feedback
+
+TECH_STACKS = ("Python", "React", "SQL", "System Design")
+# Rows inserted per statement while seeding.
+SEED_BATCH = 2000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--questions", type=int, default=5, help="Answered questions per session.")
+    parser.add_argument("--feedback-bytes", type=int, default=1500, help="Size of each stored evaluation's feedback.")
+    parser.add_argument("--compress", action="store_true", help="Export zstd-compressed.")
+    parser.add_argument("--max-growth", type=float, default=2.0)
+    return parser.parse_args(argv)
+
+
+async def seed(sessions: int, questions: int, feedback_bytes: int) -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    started = datetime(2025, 1, 1)
+    feedback = compress_feedback(("The answer covers the main idea but misses the failure modes. " * 64)[:feedback_bytes])
+    for first in range(1, sessions + 1, SEED_BATCH):
+        ids = range(first, min(first + SEED_BATCH, sessions + 1))
+        session_rows, question_rows, answer_rows = [], [], []
+        for session_id in ids:
+            created_at = started + timedelta(minutes=session_id)
+            session_rows.append({"id": session_id, "created_at": created_at, "difficulty": "Medium",
+                                 "tech_stack": TECH_STACKS[session_id % len(TECH_STACKS)]})
+            for index in range(questions):
+                question_id = (session_id - 1) * questions + index + 1
+                question_rows.append({"id": question_id, "session_id": session_id, "difficulty": "Medium",
+                                      "question_text": f"Question {question_id}: how would you profile it?",
+                                      "created_at": created_at + timedelta(seconds=index)})
+                answer_rows.append({"id": question_id, "question_id": question_id, "user_answer": "An answer.",
+                                    "feedback_json": None, "feedback_zstd": feedback, "score_correctness": 4, "score_efficiency": 3,
+                                    "score_clarity": 4, "overall_assessment": "Good", "status": "completed",
+                                    "created_at": created_at + timedelta(seconds=index, milliseconds=500)})
+        async with engine.begin() as connection:
+            await connection.execute(InterviewSession.__table__.insert(), session_rows)
+            await connection.execute(Question.__table__.insert(), question_rows)
+            await connection.execute(Answer.__table__.insert(), answer_rows)
+
+
+async def measure(until, compress: bool) -> dict:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    sessions = size = 0
+
+    async def counted(records):
+        nonlocal sessions
+        async for record in records:
+            sessions += 1
+            yield record
+
+    async for chunk in ndjson_chunks(counted(export_sessions(export_query(until=until))), compress=compress):
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"sessions": sessions, "bytes": size, "seconds": elapsed, "peak_kb": peak / 1024.0}
+
+
+async def run(args) -> int:
+    await seed(args.sessions, args.questions, args.feedback_bytes)
+    small_until = datetime(2025, 1, 1) + timedelta(minutes=max(1, args.sessions // 20) + 0.5)
+    results = [await measure(small_until, args.compress), await measure(None, args.compress)]
+    await engine.dispose()
+
+    for result in results:
+        rows = result["sessions"] * args.questions
+        print(f"{result['sessions']:8d} sessions  {result['bytes'] / 1e6:8.1f} MB  {result['seconds']:6.2f}s  "
+              f"{rows / result['seconds']:9.0f} rows/s  peak {result['peak_kb']:8.0f} KB")
+    growth = results[1]["peak_kb"] / results[0]["peak_kb"]
+    print(f"peak memory grew {growth:.2f}x for {results[1]['sessions'] / results[0]['sessions']:.0f}x the sessions")
+    if results[1]["sessions"] != args.sessions:
+        print(f"FAIL: exported {results[1]['sessions']} sessions, expected {args.sessions}")
+        return 1
+    if growth > args.max_growth:
+        print(f"FAIL: memory grew more than {args.max_growth}x")
+        return 1
+    return 0
+
+
+def main(argv=None) -> int:
+    return asyncio.run(run(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
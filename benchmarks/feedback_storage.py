@@ -0,0 +1,229 @@
+"""Database size and read latency of evaluation feedback, inline JSON vs ``feedback_zstd``.
+
+Seeds ``--answers`` answers (10 per session) in the layout of older releases,
+with the full evaluation JSON (``--feedback-bytes`` of feedback) inline in
+``answers.feedback_json``, and times three reads:
+
+- aggregate: answer count and average scores per overall assessment (a full scan);
+- list: one session's answers loaded as ORM objects (``GET /sessions/{id}?include=answers``);
+- detail: one answer loaded with its feedback (``GET /answers/{id}``).
+
+Then it runs the startup migration, which moves the feedback into the
+deferred, zstd-compressed ``feedback_zstd`` column, VACUUMs and times the
+same reads again. Before the migration the list read loads the JSON, as
+every Answer query did then. Reports file sizes, migration time and the
+median and p95 of each read.
+
+    python -m benchmarks.feedback_storage
+    python -m benchmarks.feedback_storage --answers 100000 --feedback-bytes 800
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_db_dir = tempfile.mkdtemp()
+_db_path = os.path.join(_db_dir, "feedback.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_path}"
+os.environ.setdefault("GOOGLE_API_KEY", "offline")
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import undefer
+
+from backend.database import engine, Base, AsyncSessionLocal
+from backend.migrations import upgrade_schema
+from backend.models import InterviewSession, Question, Answer
+
+ANSWERS_PER_SESSION = 10
+# Rows inserted per statement while seeding.
+SEED_BATCH = 5000
+ASSESSMENTS = ("Excellent", "Good", "Average", "Needs Improvement")
+WORDS = (
+    "the answer covers main idea but misses failure modes consider what happens when input is empty or very "
+    "large explain complexity of each step index lookup would avoid full scan cache invalidation is hard "
+    "mention trade offs between memory and latency good use of standard library concrete example helps "
+    "clarity could improve by naming variables structure your reasoning first then detail edge cases such "
+    "as concurrent writes retries timeouts network partitions idempotent requests database transactions "
+    "locking contention profiling shows hot path allocation garbage collector generator streaming batch "
+    "pagination cursor offset sorting hashing collisions recursion depth iterative approach queue stack "
+    "heap binary search tree balanced rotation amortized constant time worst case logarithmic linear "
+    "quadratic you correctly identified bottleneck however proposed fix does not address root cause tests "
+    "should cover boundary values overall solid response with room for more precise terminology"
+).split()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answers", type=int, default=1_000_000)
+    parser.add_argument("--feedback-bytes", type=int, default=1200, help="Mean feedback length.")
+    parser.add_argument("--list-queries", type=int, default=500)
+    parser.add_argument("--detail-queries", type=int, default=2000)
+    parser.add_argument("--aggregate-queries", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def make_feedback(rng: random.Random, mean_bytes: int) -> str:
+    target = rng.randint(mean_bytes // 2, mean_bytes * 3 // 2)
+    words, size = [], 0
+    while size < target:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words).capitalize() + "."
+
+
+async def seed(args) -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+        # The answers table as created by releases without feedback_zstd.
+        await connection.execute(text("ALTER TABLE answers DROP COLUMN feedback_zstd"))
+    rng = random.Random(args.seed)
+    sessions = -(-args.answers // ANSWERS_PER_SESSION)
+    started = datetime(2025, 1, 1)
+    for first in range(1, sessions + 1, SEED_BATCH // ANSWERS_PER_SESSION):
+        session_rows, question_rows, answer_rows = [], [], []
+        for session_id in range(first, min(first + SEED_BATCH // ANSWERS_PER_SESSION, sessions + 1)):
+            created_at = started + timedelta(minutes=session_id)
+            session_rows.append({"id": session_id, "created_at": created_at, "difficulty": "Medium",
+                                 "tech_stack": "Python"})
+            for index in range(ANSWERS_PER_SESSION):
+                answer_id = (session_id - 1) * ANSWERS_PER_SESSION + index + 1
+                if answer_id > args.answers:
+                    break
+                scores = [rng.randint(1, 5) for _ in range(3)]
+                assessment = rng.choice(ASSESSMENTS)
+                evaluation = {"score_correctness": scores[0], "score_efficiency": scores[1],
+                              "score_clarity": scores[2], "feedback": make_feedback(rng, args.feedback_bytes),
+                              "overall_assessment": assessment}
+                question_rows.append({"id": answer_id, "session_id": session_id, "difficulty": "Medium",
+                                      "question_text": f"Question {answer_id}: how would you profile it?",
+                                      "created_at": created_at + timedelta(seconds=index)})
+                answer_rows.append({"id": answer_id, "question_id": answer_id, "user_answer": "An answer.",
+                                    "feedback_json": evaluation, "score_correctness": scores[0],
+                                    "score_efficiency": scores[1], "score_clarity": scores[2],
+                                    "overall_assessment": assessment, "status": "completed",
+                                    "created_at": created_at + timedelta(seconds=index, milliseconds=500)})
+        async with engine.begin() as connection:
+            await connection.execute(InterviewSession.__table__.insert(), session_rows)
+            await connection.execute(Question.__table__.insert(), question_rows)
+            await connection.execute(Answer.__table__.insert(), answer_rows)
+
+
+async def db_size() -> int:
+    async with engine.connect() as connection:
+        await connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    return sum(os.path.getsize(path) for path in (_db_path, _db_path + "-wal") if os.path.exists(path))
+
+
+async def vacuum() -> None:
+    async with engine.execution_options(isolation_level="AUTOCOMMIT").connect() as connection:
+        await connection.exec_driver_sql("VACUUM")
+
+
+async def timed(queries: int, query) -> dict:
+    latencies = []
+    for index in range(queries):
+        started = time.perf_counter()
+        await query(index)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {"p50_ms": statistics.median(latencies) * 1000.0,
+            "p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000.0}
+
+
+async def measure_reads(args, migrated: bool) -> dict:
+    rng = random.Random(args.seed + 1)
+    sessions = -(-args.answers // ANSWERS_PER_SESSION)
+    session_ids = [rng.randint(1, sessions) for _ in range(args.list_queries)]
+    answer_ids = [rng.randint(1, args.answers) for _ in range(args.detail_queries)]
+    # Before the migration every Answer query loaded the evaluation JSON.
+    list_options = () if migrated else (undefer(Answer.legacy_feedback_json),)
+    detail_options = (
+        (undefer(Answer.feedback_zstd), undefer(Answer.legacy_feedback_json)) if migrated
+        else (undefer(Answer.legacy_feedback_json),)
+    )
+
+    async def aggregate(_):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Answer.overall_assessment, func.count(), func.avg(Answer.score_correctness),
+                       func.avg(Answer.score_efficiency), func.avg(Answer.score_clarity))
+                .group_by(Answer.overall_assessment)
+            )
+            assert sum(row[1] for row in result) == args.answers
+
+    async def list_answers(index):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(Answer).options(*list_options)
+                .join(Question, Question.id == Answer.question_id)
+                .where(Question.session_id == session_ids[index])
+            )
+            assert all(answer.feedback_json is not None for answer in result.scalars())
+
+    async def detail(index):
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Answer).options(*detail_options).where(Answer.id == answer_ids[index]))
+            answer = result.scalars().one()
+            feedback = answer.feedback if migrated else answer.legacy_feedback_json["feedback"]
+            assert feedback
+
+    return {
+        "aggregate": await timed(args.aggregate_queries, aggregate),
+        "list": await timed(args.list_queries, list_answers),
+        "detail": await timed(args.detail_queries, detail),
+    }
+
+
+async def run(args) -> int:
+    started = time.perf_counter()
+    await seed(args)
+    print(f"seeded {args.answers} answers in {time.perf_counter() - started:.1f}s")
+    sizes = {"inline JSON": await db_size()}
+    before = await measure_reads(args, migrated=False)
+
+    started = time.perf_counter()
+    async with engine.begin() as connection:
+        await connection.run_sync(upgrade_schema)
+    migration_seconds = time.perf_counter() - started
+    async with engine.connect() as connection:
+        stored = (await connection.execute(
+            select(func.count(Answer.feedback_zstd), func.avg(func.length(Answer.feedback_zstd)))
+        )).one()
+    sizes["migrated"] = await db_size()
+    await vacuum()
+    sizes["migrated + VACUUM"] = await db_size()
+    after = await measure_reads(args, migrated=True)
+    await engine.dispose()
+
+    print(f"migration: {stored[0]} answers in {migration_seconds:.1f}s "
+          f"({stored[0] / migration_seconds:.0f}/s), {stored[1]:.0f} compressed bytes per feedback")
+    for name, size in sizes.items():
+        print(f"{name:20} {size / 1e6:10.1f} MB")
+    print(f"{'read':10} {'inline p50':>11} {'p95':>8} {'zstd p50':>9} {'p95':>8} {'change':>7}")
+    for read in before:
+        old, new = before[read], after[read]
+        print(f"{read:10} {old['p50_ms']:9.2f}ms {old['p95_ms']:6.2f}ms {new['p50_ms']:7.2f}ms "
+              f"{new['p95_ms']:6.2f}ms {(new['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100.0:+6.0f}%")
+    if stored[0] != args.answers:
+        print(f"FAIL: migrated {stored[0]} answers, expected {args.answers}")
+        return 1
+    return 0
+
+
+def main(argv=None) -> int:
+    try:
+        return asyncio.run(run(parse_args(argv)))
+    finally:
+        shutil.rmtree(_db_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""Check how long ``import backend.main`` takes and what it pulls in.
+
+Runs a fresh interpreter with ``-X importtime`` several times and reports
+the median cumulative import time, the heaviest top-level packages, and
+how long the deferred LLM client/chain construction (``warm_up``) takes.
+Fails if the median exceeds the budget or if any module that should only
+load on first LLM use (LangChain, the Google client) is imported eagerly.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --budget-ms 1200 --runs 7
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+TARGET = "backend.main"
+# Modules that must not be imported until the first LLM call or warm-up.
+DEFERRED_MODULES = ("langchain_core", "langchain_google_genai", "google.generativeai")
+
+WARM_UP_SNIPPET = """
+import time
+import backend.main
+from backend.services import interview_service
+started = time.perf_counter()
+interview_service.warm_up()
+print(time.perf_counter() - started)
+"""
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("GOOGLE_API_KEY", "offline")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    return env
+
+
+def profile_import(target: str = TARGET):
+    """Return ({module: cumulative microseconds}, {top-level package: cumulative us}) for one run."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, env=_env(), check=True,
+    )
+    modules = {}
+    packages = defaultdict(int)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        try:
+            cumulative_us = int(cumulative)
+        except ValueError:  # header line
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        modules[name] = cumulative_us
+        if depth == 1:
+            packages[name.split(".")[0]] += cumulative_us
+    return modules, packages
+
+
+def time_warm_up() -> float:
+    result = subprocess.run(
+        [sys.executable, "-c", WARM_UP_SNIPPET], capture_output=True, text=True, env=_env(), check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0,
+                        help="Fail if the median import time of backend.main exceeds this.")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest top-level packages to list.")
+    parser.add_argument("--skip-warm-up", action="store_true", help="Don't time the deferred LLM construction.")
+    args = parser.parse_args(argv)
+
+    totals = []
+    for _ in range(args.runs):
+        modules, packages = profile_import()
+        totals.append(modules[TARGET] / 1000.0)
+    median = statistics.median(totals)
+
+    print(f"import {TARGET}: median {median:.0f}ms over {args.runs} runs "
+          f"(min {min(totals):.0f}ms, max {max(totals):.0f}ms, budget {args.budget_ms:.0f}ms)")
+    print("heaviest packages (last run):")
+    for name, cumulative in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {name:30} {cumulative / 1000.0:7.0f}ms")
+
+    if not args.skip_warm_up:
+        print(f"deferred LLM client + chain construction (warm_up): {time_warm_up() * 1000.0:.0f}ms")
+
+    failed = False
+    eager = sorted(
+        name for name in modules
+        if any(name == deferred or name.startswith(deferred + ".") for deferred in DEFERRED_MODULES)
+    )
+    if eager:
+        failed = True
+        print("FAIL: imported eagerly: " + ", ".join(sorted({name.split(".")[0] for name in eager})))
+    if median > args.budget_ms:
+        failed = True
+        print(f"FAIL: median import time {median:.0f}ms is over the {args.budget_ms:.0f}ms budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
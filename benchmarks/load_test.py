@@ -0,0 +1,291 @@
+"""Load test the API in-process against the offline fake LLM.
+
+Each virtual user runs full interviews concurrently: create a session, then
+for every question generate it and answer it (optionally over the streaming
+endpoint), and finally read the session back. Reports p50/p95/p99 latency,
+throughput, error counts, time spent in SQL and thread pool hops
+(``run_in_executor`` calls, e.g. sync LangChain callbacks) per endpoint.
+
+    python -m benchmarks.load_test --users 20 --interviews 3 --questions 3
+    python -m benchmarks.load_test --output report.json
+    python -m benchmarks.load_test --baseline report.json --max-regression 0.25
+
+With ``--baseline`` the exit status is non-zero when an endpoint's p95 grew
+by more than ``--max-regression`` (a fraction) or throughput dropped by more
+than that, so the run can gate CI. ``FAKE_LLM_*`` settings (see
+core/fake_llm.py) can be given as options or environment variables.
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+# Endpoint names used in the report.
+ENDPOINTS = ("create_session", "generate_question", "submit_answer", "get_session")
+
+ANSWERS = (
+    "I would start by reproducing the issue with a minimal test case, then measure before changing anything.",
+    "First I'd add metrics around the hot path, then compare the p95 latency before and after the fix.",
+    "I'd isolate the component behind an interface so it can be swapped and tested on its own.",
+    "It depends on the access pattern; for read-heavy workloads a cache in front of the database helps most.",
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users.")
+    parser.add_argument("--interviews", type=int, default=3, help="Interviews per user.")
+    parser.add_argument("--questions", type=int, default=3, help="Questions per interview.")
+    parser.add_argument("--tech-stacks", default="Python,React,SQL,System Design",
+                        help="Comma separated tech stacks sessions are drawn from.")
+    parser.add_argument("--stream", action="store_true", help="Answer through /answer/stream (SSE).")
+    parser.add_argument("--latency-ms", type=float, help="Median fake LLM latency (FAKE_LLM_LATENCY_MS).")
+    parser.add_argument("--latency-distribution", choices=("lognormal", "uniform", "fixed"),
+                        help="FAKE_LLM_LATENCY_DISTRIBUTION.")
+    parser.add_argument("--rejection-rate", type=float, help="FAKE_LLM_REJECTION_RATE.")
+    parser.add_argument("--malformed-rate", type=float, help="FAKE_LLM_MALFORMED_RATE.")
+    parser.add_argument("--rate-limit-rate", type=float, help="FAKE_LLM_RATE_LIMIT_RATE.")
+    parser.add_argument("--seed", type=int, default=0, help="Seeds the fake LLM and the load script.")
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    parser.add_argument("--baseline", help="JSON report of a previous run to compare against.")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed fractional p95/throughput regression against the baseline.")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args) -> None:
+    """Point the app at a throwaway database and the fake LLM before it is imported."""
+    db_dir = tempfile.mkdtemp()
+    os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{db_dir}/load_test.db")
+    os.environ.setdefault("GOOGLE_API_KEY", "offline")
+    os.environ["LLM_BACKEND"] = "fake"
+    # The pool would generate in the background and blur per-request numbers.
+    os.environ.setdefault("QUESTION_POOL_ENABLED", "false")
+    # Build the chains before the clock starts rather than in a background thread.
+    os.environ.setdefault("LLM_WARMUP", "startup")
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+    for option, variable in (
+        ("latency_ms", "FAKE_LLM_LATENCY_MS"),
+        ("latency_distribution", "FAKE_LLM_LATENCY_DISTRIBUTION"),
+        ("rejection_rate", "FAKE_LLM_REJECTION_RATE"),
+        ("malformed_rate", "FAKE_LLM_MALFORMED_RATE"),
+        ("rate_limit_rate", "FAKE_LLM_RATE_LIMIT_RATE"),
+    ):
+        value = getattr(args, option)
+        if value is not None:
+            os.environ[variable] = str(value)
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latencies = []
+        self.db_seconds = []
+        self.queries = []
+        self.executor_hops = []
+        self.errors = defaultdict(int)
+
+    def summary(self, percentile) -> dict:
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+        return {
+            "requests": count + sum(self.errors.values()),
+            "errors": dict(self.errors),
+            "p50": percentile(ordered, 50),
+            "p95": percentile(ordered, 95),
+            "p99": percentile(ordered, 99),
+            "mean": sum(ordered) / count if count else 0.0,
+            "db_mean": sum(self.db_seconds) / count if count else 0.0,
+            "db_share": sum(self.db_seconds) / sum(ordered) if ordered else 0.0,
+            "queries_mean": sum(self.queries) / count if count else 0.0,
+            "executor_hops_mean": sum(self.executor_hops) / count if count else 0.0,
+        }
+
+
+# [seconds in SQL, statements, thread pool hops] for the request running in the current task.
+_db_time = contextvars.ContextVar("db_time", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    accumulator = _db_time.get()
+    if accumulator is not None:
+        accumulator[0] += time.perf_counter() - started
+        accumulator[1] += 1
+
+
+def _count_executor_hops(loop) -> None:
+    run_in_executor = loop.run_in_executor
+
+    def counting(executor, func, *args):
+        accumulator = _db_time.get()
+        if accumulator is not None:
+            accumulator[2] += 1
+        return run_in_executor(executor, func, *args)
+
+    loop.run_in_executor = counting
+
+
+class LoadTest:
+    def __init__(self, client, args):
+        self.client = client
+        self.args = args
+        self.stacks = [stack.strip() for stack in args.tech_stacks.split(",") if stack.strip()]
+        self.stats = {name: EndpointStats() for name in ENDPOINTS}
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        accumulator = [0.0, 0, 0]
+        token = _db_time.set(accumulator)
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except Exception as e:
+            self.stats[name].errors[type(e).__name__] += 1
+            return None
+        finally:
+            _db_time.reset(token)
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            self.stats[name].errors[str(response.status_code)] += 1
+            return None
+        stats = self.stats[name]
+        stats.latencies.append(elapsed)
+        stats.db_seconds.append(accumulator[0])
+        stats.queries.append(accumulator[1])
+        stats.executor_hops.append(accumulator[2])
+        return response
+
+    async def answer(self, question_id: int, rng: random.Random) -> bool:
+        body = {"question_id": question_id, "user_answer": f"{rng.choice(ANSWERS)} ({rng.random():.6f})"}
+        if not self.args.stream:
+            return await self.request("submit_answer", "POST", f"/questions/{question_id}/answer", json=body) is not None
+        response = await self.request("submit_answer", "POST", f"/questions/{question_id}/answer/stream", json=body)
+        if response is None:
+            return False
+        if "event: done" not in response.text:
+            self.stats["submit_answer"].errors["stream_error"] += 1
+            return False
+        return True
+
+    async def interview(self, rng: random.Random) -> None:
+        response = await self.request("create_session", "POST", "/sessions", json={
+            "tech_stack": rng.choice(self.stacks),
+            "difficulty": rng.choice(("Easy", "Medium", "Hard")),
+        })
+        if response is None:
+            return
+        session_id = response.json()["id"]
+        for _ in range(self.args.questions):
+            response = await self.request("generate_question", "POST", f"/sessions/{session_id}/questions")
+            if response is None:
+                continue
+            await self.answer(response.json()["id"], rng)
+        await self.request("get_session", "GET", f"/sessions/{session_id}", params={"include": "answers"})
+
+    async def user(self, user_id: int) -> None:
+        rng = random.Random(self.args.seed * 10_007 + user_id)
+        for _ in range(self.args.interviews):
+            await self.interview(rng)
+
+
+def compare(report: dict, baseline: dict, max_regression: float):
+    """Return human readable regressions of ``report`` against ``baseline``."""
+    problems = []
+    if report["throughput_rps"] < baseline["throughput_rps"] * (1 - max_regression):
+        problems.append(
+            f"throughput {report['throughput_rps']:.1f} rps vs baseline {baseline['throughput_rps']:.1f} rps"
+        )
+    for name, current in report["endpoints"].items():
+        previous = baseline["endpoints"].get(name)
+        if not previous or not previous["p95"]:
+            continue
+        if current["p95"] > previous["p95"] * (1 + max_regression):
+            problems.append(f"{name} p95 {current['p95'] * 1000:.0f}ms vs baseline {previous['p95'] * 1000:.0f}ms")
+    return problems
+
+
+def print_report(report: dict) -> None:
+    print(f"{report['requests']} requests in {report['duration']:.1f}s "
+          f"({report['throughput_rps']:.1f} rps, {report['interviews_per_second']:.2f} interviews/s)")
+    print(f"{'endpoint':20} {'ok':>6} {'err':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'db ms':>7} {'db %':>5} {'sql':>5} {'pool':>5}")
+    for name, summary in report["endpoints"].items():
+        errors = sum(summary["errors"].values())
+        print(f"{name:20} {summary['requests'] - errors:6d} {errors:5d} {summary['p50'] * 1000:8.1f} "
+              f"{summary['p95'] * 1000:8.1f} {summary['p99'] * 1000:8.1f} {summary['db_mean'] * 1000:7.2f} "
+              f"{summary['db_share'] * 100:5.1f} {summary['queries_mean']:5.1f} "
+              f"{summary.get('executor_hops_mean', 0.0):5.1f}")
+
+
+async def main(args) -> int:
+    configure_environment(args)
+
+    import httpx
+    from sqlalchemy import event
+
+    from backend.database import engine
+    from backend.main import app
+    from backend.services import percentile, interview_service
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    _count_executor_hops(asyncio.get_running_loop())
+
+    for handler in app.router.on_startup:
+        await handler()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+            load_test = LoadTest(client, args)
+            started = time.perf_counter()
+            await asyncio.gather(*(load_test.user(user_id) for user_id in range(args.users)))
+            duration = time.perf_counter() - started
+    finally:
+        for handler in app.router.on_shutdown:
+            await handler()
+
+    endpoints = {name: stats.summary(percentile) for name, stats in load_test.stats.items()}
+    requests = sum(summary["requests"] for summary in endpoints.values())
+    report = {
+        "config": {
+            "users": args.users,
+            "interviews": args.interviews,
+            "questions": args.questions,
+            "stream": args.stream,
+            "llm": interview_service.llm.model_dump(),
+        },
+        "duration": duration,
+        "requests": requests,
+        "throughput_rps": requests / duration if duration else 0.0,
+        "interviews_per_second": args.users * args.interviews / duration if duration else 0.0,
+        "endpoints": endpoints,
+        "generation": interview_service.generation_stats(),
+        "llm_gateway": interview_service.gateway.stats(),
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(report, json.load(f), args.max_regression)
+        for problem in problems:
+            print(f"REGRESSION: {problem}")
+        if problems:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,213 @@
+"""Compare the "schema" and "compact" structured-output modes (LLM_OUTPUT_MODE).
+
+For every chain and mode it makes ``--calls`` LLM calls and reports mean
+input/output tokens (from the model's usage metadata), p50/p95 latency,
+replies that failed to parse and replies the compact parser had to repair.
+It also times the local work per call: rendering the prompt (PromptTemplate
+vs the per-tech-stack compiled prompt) and parsing a reply.
+
+By default the offline fake LLM is used, with latency that grows with the
+prompt length (``--prefill-ms-per-1k``); token counts are then estimates
+(4 characters per token). ``--live`` calls Gemini and needs GOOGLE_API_KEY.
+
+    python -m benchmarks.output_modes
+    python -m benchmarks.output_modes --calls 20 --live --output modes.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+MODES = ("schema", "compact")
+TECH_STACKS = ("Python", "React", "SQL", "System Design")
+SAMPLE_QUESTION = "How would you find the cause of a slow endpoint in production?"
+SAMPLE_ANSWER = (
+    "I would look at the p95 latency per endpoint, then profile the slow one, check the SQL it issues "
+    "for N+1 queries and add an index or a cache where the profile points."
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=40, help="LLM calls per chain and mode.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--live", action="store_true", help="Call Gemini instead of the fake LLM.")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Fake LLM median latency.")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=150.0,
+                        help="Fake LLM latency added per 1000 input tokens.")
+    parser.add_argument("--malformed-rate", type=float, default=0.05, help="Fake LLM malformed reply rate.")
+    parser.add_argument("--render-iterations", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file.")
+    return parser.parse_args(argv)
+
+
+def chain_inputs(chain_name: str, index: int) -> dict:
+    tech_stack = TECH_STACKS[index % len(TECH_STACKS)]
+    if chain_name == "evaluation_chain":
+        return {"tech_stack": tech_stack, "question": f"{SAMPLE_QUESTION} ({index})", "answer": SAMPLE_ANSWER}
+    if chain_name == "validation_chain":
+        return {"tech_stack": tech_stack, "question_text": f"{SAMPLE_QUESTION} ({index})"}
+    return {"tech_stack": tech_stack, "difficulty": ("Easy", "Medium", "Hard")[index % 3]}
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))] if ordered else 0.0
+
+
+def make_llm(args):
+    if args.live:
+        from core.chain import create_llm
+        return create_llm()
+    from core.fake_llm import FakeInterviewLLM
+    return FakeInterviewLLM(
+        latency_distribution="lognormal", latency_ms=args.latency_ms, latency_spread=0.3,
+        malformed_rate=args.malformed_rate, prefill_ms_per_1k_tokens=args.prefill_ms_per_1k, seed=args.seed,
+    )
+
+
+async def run_chain(chain, chain_name: str, args) -> dict:
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    usages = []
+
+    class UsageCollector(BaseCallbackHandler):
+        def on_llm_end(self, response, **kwargs):
+            for generations in response.generations:
+                for generation in generations:
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if usage:
+                        usages.append(usage)
+
+    config = {"callbacks": [UsageCollector()]}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, failures = [], 0
+
+    async def one(index: int):
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await chain.ainvoke(chain_inputs(chain_name, index), config=config)
+            except Exception:
+                failures += 1
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one(index) for index in range(args.calls)))
+    parser = chain.last
+    return {
+        "input_tokens": statistics.mean(usage["input_tokens"] for usage in usages) if usages else 0.0,
+        "output_tokens": statistics.mean(usage["output_tokens"] for usage in usages) if usages else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000.0,
+        "p95_ms": percentile(latencies, 0.95) * 1000.0,
+        "failures": failures,
+        "repairs": getattr(parser, "repairs", 0),
+        "format_instructions_chars": len(parser.get_format_instructions()),
+    }
+
+
+def time_local_work(llm, iterations: int) -> dict:
+    """Microseconds per prompt render (PromptTemplate vs compiled) and per reply parse, by prompt."""
+    from langchain_core.outputs import Generation
+    from core.chain import CHAIN_FACTORIES
+    from core.prompts import get_prompt, compile_prompt
+
+    results = {}
+    for chain_name in CHAIN_FACTORIES:
+        prompt_name = chain_name.replace("_chain", "_prompt")
+        inputs = [chain_inputs(chain_name, index) for index in range(len(TECH_STACKS))]
+        timings = {}
+        for mode in MODES:
+            parser = CHAIN_FACTORIES[chain_name](llm, output_mode=mode).last
+            instructions = parser.get_format_instructions()
+            template = get_prompt(prompt_name).partial(format_instructions=instructions)
+            compiled = compile_prompt(prompt_name, format_instructions=instructions)
+            assert template.format(**inputs[0]) == compiled.format(**inputs[0])
+
+            started = time.perf_counter()
+            for index in range(iterations):
+                template.format(**inputs[index % len(inputs)])
+            timings[f"{mode}_prompttemplate_us"] = (time.perf_counter() - started) / iterations * 1e6
+            started = time.perf_counter()
+            for index in range(iterations):
+                compiled.format(**inputs[index % len(inputs)])
+            timings[f"{mode}_compiled_us"] = (time.perf_counter() - started) / iterations * 1e6
+
+            reply = [Generation(text=json.dumps(_valid_reply(chain_name)))]
+            started = time.perf_counter()
+            for _ in range(iterations):
+                parser.parse_result(reply)
+            timings[f"{mode}_parse_us"] = (time.perf_counter() - started) / iterations * 1e6
+        results[chain_name] = timings
+    return results
+
+
+def _valid_reply(chain_name: str) -> dict:
+    if chain_name == "evaluation_chain":
+        return {"score_correctness": 4, "score_efficiency": 3, "score_clarity": 4,
+                "feedback": "Solid approach.", "overall_assessment": "Good"}
+    if chain_name == "validation_chain":
+        return {"is_valid": True, "reasoning": "Clear."}
+    reply = {"question_text": SAMPLE_QUESTION, "difficulty": "Medium"}
+    if chain_name == "fused_generation_chain":
+        reply.update(is_valid=True, reasoning="Clear.")
+    return reply
+
+
+async def run(args) -> dict:
+    from core.chain import CHAIN_FACTORIES
+
+    report = {"backend": "gemini" if args.live else "fake", "calls": args.calls, "chains": {}}
+    for chain_name, factory in CHAIN_FACTORIES.items():
+        report["chains"][chain_name] = {}
+        for mode in MODES:
+            chain = factory(make_llm(args), output_mode=mode)
+            report["chains"][chain_name][mode] = await run_chain(chain, chain_name, args)
+    report["local"] = time_local_work(make_llm(args), args.render_iterations)
+    return report
+
+
+def _change(old: float, new: float) -> str:
+    return f"{(new - old) / old * 100.0:+.0f}%" if old else "n/a"
+
+
+def print_report(report: dict) -> None:
+    print(f"backend: {report['backend']}, {report['calls']} calls per chain and mode")
+    print(f"{'chain':24} {'mode':8} {'fmt chars':>9} {'in tok':>8} {'out tok':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'failed':>7} {'repaired':>9}")
+    for chain_name, modes in report["chains"].items():
+        for mode, stats in modes.items():
+            print(f"{chain_name:24} {mode:8} {stats['format_instructions_chars']:9d} {stats['input_tokens']:8.0f} "
+                  f"{stats['output_tokens']:8.0f} {stats['p50_ms']:8.0f} {stats['p95_ms']:8.0f} "
+                  f"{stats['failures']:7d} {stats['repairs']:9d}")
+        schema, compact = modes["schema"], modes["compact"]
+        print(f"{'':24} {'change':8} {'':9} {_change(schema['input_tokens'], compact['input_tokens']):>8} "
+              f"{_change(schema['output_tokens'], compact['output_tokens']):>8} "
+              f"{_change(schema['p50_ms'], compact['p50_ms']):>8} {_change(schema['p95_ms'], compact['p95_ms']):>8}")
+    print("local work per call (us): PromptTemplate.format / compiled prompt / parse")
+    for chain_name, timings in report["local"].items():
+        cells = "  ".join(
+            f"{mode} {timings[f'{mode}_prompttemplate_us']:.1f} / {timings[f'{mode}_compiled_us']:.1f} / "
+            f"{timings[f'{mode}_parse_us']:.1f}"
+            for mode in MODES
+        )
+        print(f"  {chain_name:24} {cells}")
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    os.environ.setdefault("GOOGLE_API_KEY", "offline")
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Assert how many SQL statements each endpoint issues.
+
+Guards against N+1 regressions in the session/question/answer endpoints. The
+LLM chains are replaced with canned responses so no API key is needed; only
+queries issued while handling the request are counted.
+
+    python -m benchmarks.query_counts
+"""
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_db_dir}/query_counts.db")
+os.environ.setdefault("GOOGLE_API_KEY", "offline")
+os.environ["QUESTION_POOL_ENABLED"] = "false"
+os.environ["EVALUATION_CACHE_ENABLED"] = "false"
+# The chains are replaced below; don't build the real ones.
+os.environ["LLM_WARMUP"] = "off"
+
+import httpx
+from langchain_core.runnables import RunnableLambda
+from sqlalchemy import event
+
+from backend.database import engine
+from backend.main import app
+from backend.services import interview_service
+
+# Maximum statements per request.
+BUDGETS = {
+    "create_session": 2,
+    "generate_question": 3,
+    "submit_answer": 4,
+    "get_session": 2,
+    "get_session_with_answers": 3,
+    # Unchanged sessions: only the session row is read for the ETag.
+    "get_session_not_modified": 1,
+    "get_session_cached": 1,
+    # The ETag lookup (latest session update), then the page with its aggregates.
+    "list_sessions": 2,
+    "list_sessions_not_modified": 1,
+    # Batch grading of 5 answers in one transaction. SQLite can't return the ids
+    # of a multi-row INSERT in order, so the ORM inserts answers one by one there.
+    "evaluate_session": 8,
+    "regrade_session": 4,
+}
+
+EVALUATION = {
+    "score_correctness": 4,
+    "score_efficiency": 3,
+    "score_clarity": 5,
+    "feedback": "Solid answer.",
+    "overall_assessment": "Good",
+}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+QUESTIONS = itertools.cycle([
+    "How does the Python garbage collector deal with reference cycles?",
+    "Explain the difference between a process and a thread in Python.",
+    "When would you pick a dataclass over a namedtuple in Python?",
+    "Describe how asyncio schedules coroutines on the event loop in Python.",
+    "What problems does the Python GIL cause for CPU bound workloads?",
+    "How would you profile a slow Python web request in production?",
+    "Why can mutable default arguments surprise Python developers?",
+    "Compare Python list comprehensions and generator expressions for memory use.",
+    "How do Python context managers guarantee cleanup when an exception is raised?",
+    "What trade-offs come with using Python functools.lru_cache on a method?",
+])
+
+
+async def _generate(inputs):
+    return {"question_text": next(QUESTIONS), "difficulty": inputs["difficulty"]}
+
+
+async def _validate(inputs):
+    return {"is_valid": True, "reasoning": "ok"}
+
+
+async def _evaluate(inputs):
+    return dict(EVALUATION)
+
+
+async def _regrade(inputs):
+    return dict(EVALUATION, score_correctness=2, overall_assessment="Average")
+
+
+async def main() -> int:
+    interview_service.generation_chain = RunnableLambda(_generate)
+    interview_service.validation_chain = RunnableLambda(_validate)
+    interview_service.evaluation_chain = RunnableLambda(_evaluate)
+
+    for handler in app.router.on_startup:
+        await handler()
+
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    counts = {}
+
+    async def measure(name, method, url, expect=200, **kwargs):
+        counter.count = 0
+        response = await client.request(method, url, **kwargs)
+        assert response.status_code == expect, (name, response.status_code, response.text)
+        counts[name] = counter.count
+        return response
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        session = (await measure("create_session", "POST", "/sessions", json={"tech_stack": "Python"})).json()
+        for _ in range(5):
+            question = (await measure("generate_question", "POST", f"/sessions/{session['id']}/questions")).json()
+            await measure(
+                "submit_answer", "POST", f"/questions/{question['id']}/answer",
+                json={"question_id": question["id"], "user_answer": "An answer"},
+            )
+        etag = (await measure("get_session", "GET", f"/sessions/{session['id']}")).headers["ETag"]
+        await measure("get_session_with_answers", "GET", f"/sessions/{session['id']}", params={"include": "answers"})
+        await measure("get_session_not_modified", "GET", f"/sessions/{session['id']}", expect=304,
+                      headers={"If-None-Match": etag})
+        await measure("get_session_cached", "GET", f"/sessions/{session['id']}")
+        page = await measure("list_sessions", "GET", "/sessions")
+        assert page.json()["items"][0]["answered_count"] == 5, page.json()
+        await measure("list_sessions_not_modified", "GET", "/sessions", expect=304,
+                      headers={"If-None-Match": page.headers["ETag"]})
+
+        questions = [(await client.post(f"/sessions/{session['id']}/questions")).json() for _ in range(5)]
+        batch = {"answers": [{"question_id": q["id"], "user_answer": "An answer"} for q in questions]}
+        summary = (await measure("evaluate_session", "POST", f"/sessions/{session['id']}/evaluate", json=batch)).json()
+        assert summary["evaluated"] == 5, summary
+        response = await client.post(f"/sessions/{session['id']}/evaluate", json=batch)
+        assert response.status_code == 409, response.text
+        interview_service.evaluation_chain = RunnableLambda(_regrade)
+        summary = (await measure("regrade_session", "POST", f"/sessions/{session['id']}/evaluate", json={})).json()
+        assert summary["evaluated"] == 10, summary
+
+    for handler in app.router.on_shutdown:
+        await handler()
+
+    failed = False
+    for name, budget in BUDGETS.items():
+        status = "ok" if counts[name] <= budget else "OVER BUDGET"
+        failed |= counts[name] > budget
+        print(f"{name:28} {counts[name]:3d} queries (budget {budget})  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,280 @@
+"""Throughput of the API served by gunicorn as the number of workers grows.
+
+For each worker count (1, 2, 4, ... up to ``--max-workers``, default one per
+core) starts ``gunicorn -c gunicorn.conf.py backend.main:app`` against the
+same throwaway SQLite database and the offline fake LLM, and drives it for
+``--duration`` seconds from ``--clients`` load processes (so the client
+isn't the bottleneck) with ``--connections`` concurrent requests each:
+
+- ``reads``: ``GET /sessions/{id}?include=answers`` and ``GET /sessions`` over
+  seeded interviews, with the response cache off; CPU-bound in the app.
+- ``interview``: create a session, generate a question and answer it, with
+  ``--latency-ms`` of fake LLM latency per call; writes and LLM calls.
+
+Reports requests per second, latency and the speedup over one worker.
+Finally it checks that the workers share the LLM concurrency limit: with
+LLM_MAX_CONCURRENCY=``--llm-limit`` and all workers running, it generates
+questions concurrently and samples the shared slot files; fails (exit
+status 1) if more calls than the limit ever ran at once.
+
+    python -m benchmarks.worker_scaling
+    python -m benchmarks.worker_scaling --max-workers 8 --mix interview --duration 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANSWER = "I would measure first, then put a hash map in front of the slow lookup and cache the result."
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--mix", choices=("reads", "interview"), default="reads")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count.")
+    parser.add_argument("--clients", type=int, default=2, help="Load generating processes.")
+    # Sync answers hold a pooled DB connection during evaluation, so much more
+    # than 12 concurrent interviews per worker exhaust the SQLite pool (5 + 10).
+    parser.add_argument("--connections", type=int, default=6, help="Concurrent requests per client process.")
+    parser.add_argument("--sessions", type=int, default=100, help="Interviews seeded for the reads mix.")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Fake LLM latency for the interview mix.")
+    parser.add_argument("--llm-limit", type=int, default=2, help="LLM_MAX_CONCURRENCY of the limit check (0: skip).")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def worker_counts(max_workers: int):
+    counts, count = [], 1
+    while count < max_workers:
+        counts.append(count)
+        count *= 2
+    return counts + [max_workers]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """``gunicorn -c gunicorn.conf.py backend.main:app`` in a subprocess."""
+
+    # Every server shares the database, so each gets its own fake LLM seed:
+    # repeats of earlier questions would be rejected as duplicates.
+    started = 0
+
+    def __init__(self, workers: int, env: dict, log_path: str):
+        Server.started += 1
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.log = open(log_path, "ab")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "backend.main:app"],
+            cwd=ROOT, stdout=self.log, stderr=subprocess.STDOUT,
+            env={**os.environ, **env, "WEB_CONCURRENCY": str(workers), "PORT": str(self.port),
+                 "FAKE_LLM_SEED": f"{env['FAKE_LLM_SEED']}{Server.started}"},
+        )
+
+    def wait_ready(self, timeout: float = 60.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with status {self.process.returncode}, see {self.log.name}")
+            try:
+                if httpx.get(self.url + "/", timeout=1.0).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise RuntimeError(f"gunicorn did not start within {timeout:.0f}s, see {self.log.name}")
+
+    def stop(self) -> None:
+        self.process.send_signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.log.close()
+
+    def __enter__(self):
+        try:
+            self.wait_ready()
+        except BaseException:
+            self.stop()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+async def interview(client: httpx.AsyncClient, rng: random.Random) -> int:
+    """One session with one answered question; returns the number of requests made."""
+    response = await client.post("/sessions", json={"difficulty": rng.choice(("Easy", "Medium", "Hard")),
+                                                    "tech_stack": rng.choice(("Python", "SQL", "React"))})
+    response.raise_for_status()
+    session_id = response.json()["id"]
+    response = await client.post(f"/sessions/{session_id}/questions")
+    response.raise_for_status()
+    question_id = response.json()["id"]
+    response = await client.post(f"/questions/{question_id}/answer",
+                                 json={"question_id": question_id, "user_answer": ANSWER})
+    response.raise_for_status()
+    return 3
+
+
+async def seed(url: str, sessions: int, seed_value: int) -> None:
+    rng = random.Random(seed_value)
+    semaphore = asyncio.Semaphore(16)
+    async with httpx.AsyncClient(base_url=url, timeout=60.0) as client:
+        async def one():
+            async with semaphore:
+                await interview(client, rng)
+        await asyncio.gather(*(one() for _ in range(sessions)))
+
+
+async def drive(url: str, mix: str, duration: float, connections: int, sessions: int, seed_value: int) -> dict:
+    rng = random.Random(seed_value)
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=url, timeout=60.0, limits=limits) as client:
+        async def connection():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    if mix == "reads":
+                        if rng.random() < 0.8:
+                            response = await client.get(f"/sessions/{rng.randint(1, sessions)}",
+                                                        params={"include": "answers"})
+                        else:
+                            response = await client.get("/sessions", params={"limit": 20})
+                        response.raise_for_status()
+                        requests = 1
+                    else:
+                        requests = await interview(client, rng)
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.extend([(time.perf_counter() - started) / requests] * requests)
+        await asyncio.gather(*(connection() for _ in range(connections)))
+    return {"latencies": latencies, "errors": errors}
+
+
+def run_client(*args) -> dict:
+    return asyncio.run(drive(*args))
+
+
+def measure(url: str, args) -> dict:
+    with ProcessPoolExecutor(args.clients) as pool:
+        started = time.perf_counter()
+        results = list(pool.map(
+            run_client, *zip(*[
+                (url, args.mix, args.duration, args.connections, args.sessions, args.seed + index)
+                for index in range(args.clients)
+            ])
+        ))
+        elapsed = time.perf_counter() - started
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    return {
+        "requests": len(latencies),
+        "errors": sum(result["errors"] for result in results),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000.0 if latencies else 0.0,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000.0 if latencies else 0.0,
+    }
+
+
+async def llm_limit_check(url: str, shared_dir: str, args) -> dict:
+    """Generate questions concurrently and sample how many shared LLM slots are held."""
+    from backend.llm_gateway import SharedSlots
+
+    slots = SharedSlots(shared_dir, "llm", args.llm_limit)
+    requests = max(8, 4 * args.max_workers)
+    peak = 0
+    async with httpx.AsyncClient(base_url=url, timeout=120.0) as client:
+        response = await client.post("/sessions", json={"difficulty": "Easy", "tech_stack": "Python"})
+        session_id = response.json()["id"]
+        burst = asyncio.gather(*(client.post(f"/sessions/{session_id}/questions") for _ in range(requests)))
+        task = asyncio.ensure_future(burst)
+        started = time.perf_counter()
+        while not task.done():
+            peak = max(peak, slots.in_use())
+            await asyncio.sleep(0.005)
+        elapsed = time.perf_counter() - started
+        statuses = [response.status_code for response in task.result()]
+    return {"requests": requests, "ok": statuses.count(200), "peak": peak, "elapsed": elapsed}
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    work_dir = tempfile.mkdtemp()
+    log_path = os.path.join(work_dir, "gunicorn.log")
+    env = {
+        "DATABASE_URL": f"sqlite+aiosqlite:///{work_dir}/scaling.db",
+        "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY", "offline"),
+        "LLM_BACKEND": "fake",
+        "LLM_WARMUP": "startup",
+        "QUESTION_POOL_ENABLED": "false",
+        "SESSION_CACHE_SIZE": "0",
+        "FAKE_LLM_LATENCY_DISTRIBUTION": "fixed",
+        "FAKE_LLM_REJECTION_RATE": "0",
+        "FAKE_LLM_MALFORMED_RATE": "0",
+        "FAKE_LLM_SEED": str(args.seed),
+    }
+    try:
+        if args.mix == "reads":
+            with Server(1, {**env, "FAKE_LLM_LATENCY_MS": "1"}, log_path) as server:
+                asyncio.run(seed(server.url, args.sessions, args.seed))
+            print(f"seeded {args.sessions} interviews")
+
+        results = {}
+        for workers in worker_counts(args.max_workers):
+            with Server(workers, {**env, "FAKE_LLM_LATENCY_MS": str(args.latency_ms)}, log_path) as server:
+                results[workers] = measure(server.url, args)
+        baseline = results[min(results)]["rps"]
+        print(f"{args.mix} mix, {args.clients}x{args.connections} connections, {os.cpu_count()} cores")
+        print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7} {'speedup':>8} {'eff.':>6}")
+        for workers, result in results.items():
+            speedup = result["rps"] / baseline if baseline else 0.0
+            print(f"{workers:7d} {result['rps']:9.1f} {result['p50_ms']:8.1f} {result['p95_ms']:8.1f} "
+                  f"{result['errors']:7d} {speedup:7.2f}x {speedup / workers * 100:5.0f}%")
+
+        if args.llm_limit <= 0:
+            return 0
+        shared_dir = os.path.join(work_dir, "llm-limits")
+        latency_ms = 500
+        limit_env = {**env, "FAKE_LLM_LATENCY_MS": str(latency_ms), "LLM_MAX_CONCURRENCY": str(args.llm_limit),
+                     "LLM_SHARED_LIMITS_DIR": shared_dir, "LLM_QUEUE_TIMEOUT": "120"}
+        with Server(args.max_workers, limit_env, log_path) as server:
+            check = asyncio.run(llm_limit_check(server.url, shared_dir, args))
+        # Each question is at least a generation and a validation call.
+        floor = check["requests"] * 2 * latency_ms / 1000.0 / args.llm_limit
+        print(f"LLM limit {args.llm_limit} across {args.max_workers} workers: {check['ok']}/{check['requests']} "
+              f"questions in {check['elapsed']:.1f}s (>= {floor:.1f}s expected), peak {check['peak']} calls at once")
+        if check["peak"] > args.llm_limit or check["ok"] != check["requests"]:
+            print("FAIL: the LLM concurrency limit was not shared by the workers")
+            return 1
+        return 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
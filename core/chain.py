@@ -1,37 +1,118 @@
+"""LLM client and chains, built lazily on first use.
+
+Importing LangChain and the Google client takes over a second, so nothing
+here is constructed at import time. ``get_llm()`` and ``get_chain()`` build
+the shared objects once, under a lock so concurrent first calls (Streamlit
+script threads, the backend's warm-up thread) don't race. The old
+module-level names (``llm``, ``evaluation_chain``, ...) still work and
+resolve through ``get_llm``/``get_chain`` on first access.
+"""
 import os
+import threading
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.output_parsers import JsonOutputParser
-from .prompts import evaluation_prompt, generation_prompt, validation_prompt
-from .parsers import InterviewEvaluation, GeneratedQuestion, QuestionValidationResult
 
 load_dotenv()
 
-llm = ChatGoogleGenerativeAI(
-    model="models/gemini-2.0-flash",
-    google_api_key=os.environ.get("GEMINI_API_KEY"),
-    temperature=0.7,
-    max_output_tokens=2048
-)
-
-def create_evaluation_chain():
-    parser = JsonOutputParser(pydantic_object=InterviewEvaluation)
-    prompt = evaluation_prompt.partial(format_instructions=parser.get_format_instructions())
-    chain = prompt | llm | parser
-    return chain
+# "gemini" calls the real model; "fake" uses the offline FakeInterviewLLM.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_MODEL = os.getenv("LLM_MODEL", "models/gemini-2.0-flash")
+# "schema" embeds the full JSON schema of the expected reply in every prompt;
+# "compact" sends a one-line shape and validates/repairs the reply locally.
+LLM_OUTPUT_MODE = os.getenv("LLM_OUTPUT_MODE", "schema")
 
-def create_generation_chain():
-    parser = JsonOutputParser(pydantic_object=GeneratedQuestion)
-    prompt = generation_prompt.partial(format_instructions=parser.get_format_instructions())
-    chain = prompt | llm | parser
-    return chain
+_lock = threading.RLock()
+_llm = None
+_chains = {}
+
+def create_llm(model=None, backend=None):
+    if (backend or LLM_BACKEND) == "fake":
+        from .fake_llm import FakeInterviewLLM
+        return FakeInterviewLLM.from_env()
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=model or LLM_MODEL,
+        # The backend has always read GOOGLE_API_KEY, the Streamlit app GEMINI_API_KEY.
+        google_api_key=os.environ.get("GOOGLE_API_KEY") or os.environ.get("GEMINI_API_KEY"),
+        temperature=0.7,
+        max_output_tokens=2048
+    )
+
+def get_llm():
+    """The shared chat model, created on first call."""
+    global _llm
+    if _llm is None:
+        with _lock:
+            if _llm is None:
+                _llm = create_llm()
+    return _llm
+
+def create_output_parser(pydantic_object, output_mode=None):
+    """The reply parser for LLM_OUTPUT_MODE; its format instructions are part of the prompt."""
+    if (output_mode or LLM_OUTPUT_MODE) == "compact":
+        from .compact_output import CompactJsonOutputParser
+        return CompactJsonOutputParser(pydantic_object=pydantic_object)
+    from langchain_core.output_parsers import JsonOutputParser
+    return JsonOutputParser(pydantic_object=pydantic_object)
+
+def _json_chain(prompt_name, pydantic_object, llm=None, output_mode=None, template=None):
+    from langchain_core.prompt_values import StringPromptValue
+    from langchain_core.runnables import RunnableLambda
+    from .prompts import compile_prompt
+
+    parser = create_output_parser(pydantic_object, output_mode)
+    compiled = compile_prompt(prompt_name, template, format_instructions=parser.get_format_instructions())
+
+    def render(inputs):
+        return StringPromptValue(text=compiled.format(**inputs))
 
-def create_validation_chain():
-    parser = JsonOutputParser(pydantic_object=QuestionValidationResult)
-    prompt = validation_prompt.partial(format_instructions=parser.get_format_instructions())
-    chain = prompt | llm | parser
+    async def arender(inputs):
+        return render(inputs)
+
+    prompt = RunnableLambda(render, afunc=arender, name=prompt_name)
+    return prompt | (llm if llm is not None else get_llm()) | parser
+
+def create_evaluation_chain(llm=None, output_mode=None, template=None):
+    """``template`` replaces EVALUATION_PROMPT_TEMPLATE, e.g. to try a candidate prompt."""
+    from .parsers import InterviewEvaluation
+    return _json_chain("evaluation_prompt", InterviewEvaluation, llm, output_mode, template)
+
+def create_generation_chain(llm=None, output_mode=None):
+    from .parsers import GeneratedQuestion
+    return _json_chain("generation_prompt", GeneratedQuestion, llm, output_mode)
+
+def create_validation_chain(llm=None, output_mode=None):
+    from .parsers import QuestionValidationResult
+    return _json_chain("validation_prompt", QuestionValidationResult, llm, output_mode)
+
+def create_fused_generation_chain(llm=None, output_mode=None):
+    from .parsers import SelfValidatedQuestion
+    return _json_chain("fused_generation_prompt", SelfValidatedQuestion, llm, output_mode)
+
+CHAIN_FACTORIES = {
+    "evaluation_chain": create_evaluation_chain,
+    "generation_chain": create_generation_chain,
+    "validation_chain": create_validation_chain,
+    "fused_generation_chain": create_fused_generation_chain,
+}
+
+def get_chain(name: str):
+    """The shared chain called ``name`` (a key of CHAIN_FACTORIES), created on first call."""
+    chain = _chains.get(name)
+    if chain is None:
+        with _lock:
+            chain = _chains.get(name)
+            if chain is None:
+                chain = _chains[name] = CHAIN_FACTORIES[name]()
     return chain
 
-evaluation_chain = create_evaluation_chain()
-generation_chain = create_generation_chain()
-validation_chain = create_validation_chain()
+def warm_up():
+    """Build the client and every chain now instead of on the first request."""
+    for name in CHAIN_FACTORIES:
+        get_chain(name)
+
+def __getattr__(name):
+    if name == "llm":
+        return get_llm()
+    if name in CHAIN_FACTORIES:
+        return get_chain(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,121 @@
+"""Compact structured-output mode.
+
+``JsonOutputParser.get_format_instructions()`` embeds the full JSON schema of
+the pydantic model, field descriptions included, in every prompt; for the
+evaluation chain that is longer than the prompt itself. In compact mode the
+prompt only carries the model's hand-written ``compact_schema`` line, and
+the reply is instead checked locally: malformed JSON gets a repair pass and
+the result is validated against the pydantic model (types, ranges, enums,
+required fields), so a reply that merely looks like JSON can't slip through.
+"""
+import json
+import logging
+import re
+from typing import Any, AsyncIterator, Iterator, List, Union
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import BaseMessage
+from langchain_core.output_parsers import JsonOutputParser
+from langchain_core.outputs import Generation
+from langchain_core.utils.json import parse_partial_json
+from pydantic import ValidationError
+
+logger = logging.getLogger(__name__)
+
+COMPACT_FORMAT_INSTRUCTIONS = "Respond with only a JSON object, no prose or markdown, shaped like:\n{schema}"
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_PYTHON_LITERAL = re.compile(r"(?<=[:\[,\s])(True|False|None)(?=\s*[,}\]])")
+
+
+def repair_json(text: str) -> Any:
+    """Best-effort parse of almost-JSON: fences, surrounding prose, trailing
+    commas, Python literals and a truncated tail are tolerated."""
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("no JSON object in reply")
+    end = text.rfind("}")
+    text = text[start:end + 1] if end > start else text[start:]
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    text = _TRAILING_COMMA.sub(r"\1", text)
+    text = _PYTHON_LITERAL.sub(lambda match: _PYTHON_LITERALS[match.group(1)], text)
+    parsed = parse_partial_json(text)
+    if parsed is None:
+        raise ValueError("unrepairable JSON")
+    return parsed
+
+
+class CompactJsonOutputParser(JsonOutputParser):
+    """JsonOutputParser with compact format instructions and validated results.
+
+    Partial results (streaming) are passed through as-is; the final result
+    is repaired if needed, validated and returned as a plain dict. A stream
+    ends with the validated result, or raises if the full reply is invalid.
+    """
+
+    repairs: int = 0
+
+    def get_format_instructions(self) -> str:
+        return COMPACT_FORMAT_INSTRUCTIONS.format(schema=self.pydantic_object.compact_schema)
+
+    def parse_result(self, result: List[Generation], *, partial: bool = False) -> Any:
+        if partial:
+            return super().parse_result(result, partial=True)
+        text = result[0].text
+        try:
+            data = json.loads(text.strip())
+        except json.JSONDecodeError:
+            try:
+                data = repair_json(text)
+            except ValueError as e:
+                raise OutputParserException(f"Invalid json output: {text}", llm_output=text) from e
+            self.repairs += 1
+            logger.debug("Repaired malformed JSON reply for %s", self.pydantic_object.__name__)
+        try:
+            return self.pydantic_object.model_validate(data).model_dump()
+        except ValidationError as e:
+            raise OutputParserException(
+                f"Reply does not match {self.pydantic_object.__name__}: {e}", llm_output=text
+            ) from e
+
+    def _transform(self, input: Iterator[Union[str, BaseMessage]]) -> Iterator[Any]:
+        chunks = []
+
+        def tee():
+            for chunk in input:
+                chunks.append(_chunk_text(chunk))
+                yield chunk
+
+        last = None
+        for last in super()._transform(tee()):
+            yield last
+        final = self.parse_result([Generation(text="".join(chunks))])
+        if final != last:
+            yield final
+
+    async def _atransform(self, input: AsyncIterator[Union[str, BaseMessage]]) -> AsyncIterator[Any]:
+        chunks = []
+
+        async def tee():
+            async for chunk in input:
+                chunks.append(_chunk_text(chunk))
+                yield chunk
+
+        last = None
+        async for last in super()._atransform(tee()):
+            yield last
+        final = self.parse_result([Generation(text="".join(chunks))])
+        if final != last:
+            yield final
+
+
+def _chunk_text(chunk: Union[str, BaseMessage]) -> str:
+    return chunk.content if isinstance(chunk, BaseMessage) else chunk
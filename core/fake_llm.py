@@ -0,0 +1,259 @@
+"""Offline stand-in for the Gemini chat model.
+
+``FakeInterviewLLM`` recognises which of the app's prompts it was given
+(generation, validation, fused generation or evaluation) and answers with
+JSON of the right shape after a simulated delay, so the API can be load
+tested without spending quota. Latency, the share of questions the
+"validator" rejects and the share of malformed replies (prose, or JSON
+with a trailing comma, Python literals or a cut-off end) are configurable,
+as is the share of calls that fail like a provider rate limit (HTTP 429);
+prompt length can add prefill latency. Every reply is derived from a seed, the prompt and how often
+that prompt has been seen, so runs are repeatable even when calls interleave.
+
+Select it with ``LLM_BACKEND=fake``; ``FakeInterviewLLM.from_env()`` reads the
+``FAKE_LLM_*`` settings below.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+import xxhash
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+LATENCY_DISTRIBUTIONS = ("lognormal", "uniform", "fixed")
+
+FAKE_LLM_LATENCY_DISTRIBUTION = os.getenv("FAKE_LLM_LATENCY_DISTRIBUTION", "lognormal")
+# Median latency of one call in milliseconds.
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", "800"))
+# lognormal: sigma of the underlying normal; uniform: +/- fraction of the median.
+FAKE_LLM_LATENCY_SPREAD = float(os.getenv("FAKE_LLM_LATENCY_SPREAD", "0.5"))
+FAKE_LLM_REJECTION_RATE = float(os.getenv("FAKE_LLM_REJECTION_RATE", "0.2"))
+FAKE_LLM_MALFORMED_RATE = float(os.getenv("FAKE_LLM_MALFORMED_RATE", "0.02"))
+FAKE_LLM_RATE_LIMIT_RATE = float(os.getenv("FAKE_LLM_RATE_LIMIT_RATE", "0"))
+FAKE_LLM_SEED = int(os.getenv("FAKE_LLM_SEED", "0"))
+# Extra latency per 1000 input tokens, so longer prompts are slower as with a real model.
+FAKE_LLM_PREFILL_MS_PER_1K_TOKENS = float(os.getenv("FAKE_LLM_PREFILL_MS_PER_1K_TOKENS", "0"))
+
+# Streamed replies are cut into chunks of this many characters.
+STREAM_CHUNK_CHARS = 24
+# Share of the latency spent before the first streamed chunk.
+TIME_TO_FIRST_CHUNK = 0.3
+
+_TECH_STACK = re.compile(r"specializing in (.+?)\.\s*$", re.MULTILINE)
+_VALIDATION_STACK = re.compile(r"question for a (.+?) mock interview")
+_DIFFICULTY = re.compile(r"\*\*DIFFICULTY:\*\*\s*(\w+)")
+
+OPENERS = (
+    "How would you", "Explain how you would", "Walk me through how you would",
+    "Describe how you would", "What is your approach to", "How do you",
+)
+TASKS = (
+    "debug a memory leak", "profile a slow endpoint", "design a retry policy",
+    "structure error handling", "test concurrency bugs", "cache expensive results",
+    "roll out a breaking schema change", "reduce cold start time", "paginate a large result set",
+    "trace a request across services", "enforce rate limits", "migrate a legacy module",
+)
+SCENARIOS = (
+    "for a service handling {n} requests per second", "in a codebase with {n} modules",
+    "when a job processes {n} records", "for an API with {n} daily users",
+    "when a queue holds {n} pending messages", "for a dashboard refreshing {n} widgets",
+)
+MALFORMED_REPLIES = (
+    "I'm sorry, but I can't help with that request.",
+    "Here is the question you asked for: what is a closure",
+)
+# Prompts in compact output mode ask for bare JSON; the fake then answers without fences or indentation.
+COMPACT_OUTPUT_MARKER = "Respond with only a JSON object"
+ASSESSMENTS = ((4.5, "Excellent"), (3.5, "Good"), (2.5, "Average"), (0.0, "Needs Improvement"))
+
+
+class FakeRateLimitError(Exception):
+    """Raised the way a provider's "429 Too Many Requests" would be."""
+
+    code = 429
+
+
+class FakeInterviewLLM(BaseChatModel):
+    """Deterministic chat model that plays every LLM role the interviewer uses."""
+
+    latency_distribution: str = "lognormal"
+    latency_ms: float = 800.0
+    latency_spread: float = 0.5
+    rejection_rate: float = 0.2
+    malformed_rate: float = 0.02
+    rate_limit_rate: float = 0.0
+    prefill_ms_per_1k_tokens: float = 0.0
+    seed: int = 0
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.latency_distribution}")
+        self._seen: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "FakeInterviewLLM":
+        return cls(
+            latency_distribution=FAKE_LLM_LATENCY_DISTRIBUTION,
+            latency_ms=FAKE_LLM_LATENCY_MS,
+            latency_spread=FAKE_LLM_LATENCY_SPREAD,
+            rejection_rate=FAKE_LLM_REJECTION_RATE,
+            malformed_rate=FAKE_LLM_MALFORMED_RATE,
+            rate_limit_rate=FAKE_LLM_RATE_LIMIT_RATE,
+            prefill_ms_per_1k_tokens=FAKE_LLM_PREFILL_MS_PER_1K_TOKENS,
+            seed=FAKE_LLM_SEED,
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-interview"
+
+    def _rng(self, prompt: str) -> random.Random:
+        """RNG seeded by (seed, prompt, nth time this prompt was seen)."""
+        digest = xxhash.xxh64_intdigest(prompt, seed=self.seed)
+        with self._lock:
+            occurrence = self._seen[digest]
+            self._seen[digest] += 1
+        return random.Random(digest * 1_000_003 + occurrence)
+
+    def _latency(self, rng: random.Random) -> float:
+        median = self.latency_ms / 1000.0
+        if self.latency_distribution == "fixed":
+            return median
+        if self.latency_distribution == "uniform":
+            return max(0.0, rng.uniform(median * (1 - self.latency_spread), median * (1 + self.latency_spread)))
+        return rng.lognormvariate(0.0, self.latency_spread) * median
+
+    def _reply(self, prompt: str, rng: random.Random) -> str:
+        malformed = rng.random() < self.malformed_rate
+        # Half of the malformed replies are prose, half are damaged JSON.
+        if malformed and rng.random() < 0.5:
+            return rng.choice(MALFORMED_REPLIES)
+
+        difficulty_match = _DIFFICULTY.search(prompt)
+        difficulty = difficulty_match.group(1) if difficulty_match else "Medium"
+        stack_match = _TECH_STACK.search(prompt) or _VALIDATION_STACK.search(prompt)
+        tech_stack = stack_match.group(1) if stack_match else "General"
+
+        if "critically check your own question" in prompt:
+            is_valid = rng.random() >= self.rejection_rate
+            reply = {
+                "question_text": self._question(tech_stack, rng),
+                "difficulty": difficulty,
+                "is_valid": is_valid,
+                "reasoning": "Clear and relevant." if is_valid else "Too ambiguous when spoken.",
+            }
+        elif "validate the quality of generated interview questions" in prompt:
+            is_valid = rng.random() >= self.rejection_rate
+            reply = {
+                "is_valid": is_valid,
+                "reasoning": "Clear and relevant." if is_valid else "Too ambiguous when spoken.",
+            }
+        elif "evaluate this answer" in prompt:
+            reply = self._evaluation(rng)
+        else:
+            reply = {"question_text": self._question(tech_stack, rng), "difficulty": difficulty}
+        if COMPACT_OUTPUT_MARKER in prompt:
+            content = json.dumps(reply)
+        else:
+            content = "```json\n" + json.dumps(reply, indent=2) + "\n```"
+        return self._damage(content, rng) if malformed else content
+
+    @staticmethod
+    def _damage(content: str, rng: random.Random) -> str:
+        """Break the JSON the way models do: a trailing comma, Python literals or a cut-off end."""
+        end = content.rindex("}")
+        damage = rng.choice(("trailing_comma", "python_literals", "truncated"))
+        if damage == "trailing_comma":
+            return content[:end].rstrip() + ",\n" + content[end:]
+        if damage == "python_literals" and (": true" in content or ": false" in content):
+            return content.replace(": true", ": True").replace(": false", ": False")
+        return content[:end].rstrip()
+
+    def _question(self, tech_stack: str, rng: random.Random) -> str:
+        scenario = rng.choice(SCENARIOS).format(n=rng.randrange(10, 100_000))
+        return f"{rng.choice(OPENERS)} {rng.choice(TASKS)} in {tech_stack} {scenario}?"
+
+    def _evaluation(self, rng: random.Random) -> dict:
+        scores = [rng.randint(0, 5) for _ in range(3)]
+        average = sum(scores) / 3.0
+        assessment = next(label for bound, label in ASSESSMENTS if average >= bound)
+        feedback = " ".join(
+            rng.choice((
+                "The answer identifies the core problem.",
+                "Consider the failure modes under load.",
+                "A concrete example would make this clearer.",
+                "The trade-offs between approaches deserve a mention.",
+                "Good use of the standard tooling for this stack.",
+                "The explanation skips how the fix would be verified.",
+            ))
+            for _ in range(rng.randint(3, 8))
+        )
+        return {
+            "score_correctness": scores[0],
+            "score_efficiency": scores[1],
+            "score_clarity": scores[2],
+            "feedback": feedback,
+            "overall_assessment": assessment,
+        }
+
+    def _respond(self, messages: List[BaseMessage]):
+        prompt = "\n".join(str(message.content) for message in messages)
+        rng = self._rng(prompt)
+        if rng.random() < self.rate_limit_rate:
+            raise FakeRateLimitError("429 Resource has been exhausted (fake)")
+        content = self._reply(prompt, rng)
+        usage = {
+            "input_tokens": len(prompt) // 4,
+            "output_tokens": len(content) // 4,
+            "total_tokens": (len(prompt) + len(content)) // 4,
+        }
+        latency = self._latency(rng) + usage["input_tokens"] * self.prefill_ms_per_1k_tokens / 1_000_000.0
+        return content, usage, latency
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        content, usage, latency = self._respond(messages)
+        time.sleep(latency)
+        message = AIMessage(content=content, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        content, usage, latency = self._respond(messages)
+        await asyncio.sleep(latency)
+        message = AIMessage(content=content, usage_metadata=usage)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, content: str, usage: dict):
+        pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+        for index, piece in enumerate(pieces):
+            # Report usage once, on the last chunk, as the real providers do.
+            chunk_usage = usage if index == len(pieces) - 1 else None
+            yield ChatGenerationChunk(message=AIMessageChunk(content=piece, usage_metadata=chunk_usage))
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        content, usage, latency = self._respond(messages)
+        chunks = list(self._chunks(content, usage))
+        time.sleep(latency * TIME_TO_FIRST_CHUNK)
+        for chunk in chunks:
+            yield chunk
+            time.sleep(latency * (1 - TIME_TO_FIRST_CHUNK) / len(chunks))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        content, usage, latency = self._respond(messages)
+        chunks = list(self._chunks(content, usage))
+        await asyncio.sleep(latency * TIME_TO_FIRST_CHUNK)
+        for chunk in chunks:
+            yield chunk
+            await asyncio.sleep(latency * (1 - TIME_TO_FIRST_CHUNK) / len(chunks))
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Literal
+from typing import ClassVar, Literal
 
 class InterviewEvaluation(BaseModel):
     score_correctness: int = Field(
@@ -24,6 +24,13 @@ class InterviewEvaluation(BaseModel):
     description="A single, overall assessment of the candidate's answer."
     )
 
+    # Hand-compacted shape used instead of the full JSON schema in compact output mode.
+    compact_schema: ClassVar[str] = (
+        '{"score_correctness": int 0-5, "score_efficiency": int 0-5, "score_clarity": int 0-5, '
+        '"feedback": str (why these scores; if wrong, the correct approach), '
+        '"overall_assessment": "Excellent"|"Good"|"Average"|"Needs Improvement"}'
+    )
+
 class GeneratedQuestion(BaseModel):
     question_text: str = Field(
         description="The full text of the generated interview question."
@@ -32,6 +39,8 @@ class GeneratedQuestion(BaseModel):
         description="The assessed difficulty of the question."
     )
 
+    compact_schema: ClassVar[str] = '{"question_text": str, "difficulty": "Easy"|"Medium"|"Hard"}'
+
 class QuestionValidationResult(BaseModel):
     is_valid: bool = Field(
         description="A boolean flag indicating if the question is valid (true) or not (false)."
@@ -39,3 +48,24 @@ class QuestionValidationResult(BaseModel):
     reasoning: str = Field(
         description="A brief explanation for the validation decision. If not valid, explain why (e.g., 'too ambiguous', 'not relevant to the chosen tech stack')."
     )
+
+    compact_schema: ClassVar[str] = '{"is_valid": bool, "reasoning": str (brief; if invalid, why)}'
+
+class SelfValidatedQuestion(BaseModel):
+    question_text: str = Field(
+        description="The full text of the generated interview question."
+    )
+    difficulty: Literal["Easy", "Medium", "Hard"] = Field(
+        description="The assessed difficulty of the question."
+    )
+    is_valid: bool = Field(
+        description="Your own verdict on the question against the validation criteria: true if it passes all of them, false otherwise."
+    )
+    reasoning: str = Field(
+        description="A brief explanation for the self-check verdict. If not valid, explain which criterion failed."
+    )
+
+    compact_schema: ClassVar[str] = (
+        '{"question_text": str, "difficulty": "Easy"|"Medium"|"Hard", '
+        '"is_valid": bool (your self-check verdict), "reasoning": str (brief; if invalid, which criterion failed)}'
+    )
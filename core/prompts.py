@@ -1,5 +1,11 @@
-from langchain_core.prompts import PromptTemplate
-from typing import Literal
+import os
+import threading
+from functools import lru_cache
+from string import Formatter
+from typing import Optional
+
+# Tech stacks whose pre-rendered prompt text is kept per compiled prompt.
+PROMPT_CACHE_SIZE = int(os.getenv("PROMPT_CACHE_SIZE", "128"))
 
 EVALUATION_PROMPT_TEMPLATE = """
 You are an expert AI Technical Interviewer specializing in {tech_stack}.
@@ -33,13 +39,6 @@ You must provide your evaluation in a JSON format.
 {format_instructions}
 """
 
-evaluation_prompt = PromptTemplate(
-    template=EVALUATION_PROMPT_TEMPLATE,
-    input_variables=["tech_stack", "question", "answer"],
-    partial_variables={
-        "format_instructions": "" # This will be filled in by the parser
-    }
-)
 
 
 GENERATION_PROMPT_TEMPLATE = """
@@ -60,13 +59,6 @@ You must provide your generated question in a JSON format.
 {format_instructions}
 """
 
-generation_prompt = PromptTemplate(
-    template=GENERATION_PROMPT_TEMPLATE,
-    input_variables=["tech_stack", "difficulty"],
-    partial_variables={
-        "format_instructions": ""
-    }
-)
 
 
 VALIDATION_PROMPT_TEMPLATE = """
@@ -87,10 +79,110 @@ You must provide your validation result in a JSON format.
 {format_instructions}
 """
 
-validation_prompt = PromptTemplate(
-    template=VALIDATION_PROMPT_TEMPLATE,
-    input_variables=["tech_stack", "question_text"],
-    partial_variables={
-        "format_instructions": ""
-    }
-)
\ No newline at end of file
+
+
+FUSED_GENERATION_PROMPT_TEMPLATE = """
+You are an AI expert in technical interviewing, specializing in {tech_stack}.
+Your task is to generate a single, high-quality interview question based on a specified difficulty, and then critically check your own question before returning it.
+The question should be clear, concise, and suitable for a real video interview (spoken).
+
+**RULES:**
+- Do NOT generate a generic question. It should be specific to {tech_stack}.
+- The question can be about coding concepts, system design, debugging, or architecture depending on the stack.
+- Ensure the difficulty level is accurately reflected in the question's complexity.
+- Keep the question length reasonable for spoken delivery.
+
+**SELF-CHECK CRITERIA:**
+1.  **Clarity:** Is the question unambiguous and easy to understand when spoken?
+2.  **Relevance:** Is the question directly related to {tech_stack}?
+3.  **Practicality:** Does it test a real-world skill or concept?
+4.  **Uniqueness:** Is it an interesting question?
+
+Be strict: only mark the question as valid if it meets every criterion.
+
+**DIFFICULTY:** {difficulty}
+
+**YOUR RESPONSE:**
+You must provide your generated question and self-check result in a JSON format.
+{format_instructions}
+"""
+
+
+# PromptTemplate pulls in LangChain, so the template objects are built on first
+# use; importing the template strings above (e.g. for cache keys) stays cheap.
+PROMPT_DEFINITIONS = {
+    "evaluation_prompt": (EVALUATION_PROMPT_TEMPLATE, ["tech_stack", "question", "answer"]),
+    "generation_prompt": (GENERATION_PROMPT_TEMPLATE, ["tech_stack", "difficulty"]),
+    "validation_prompt": (VALIDATION_PROMPT_TEMPLATE, ["tech_stack", "question_text"]),
+    "fused_generation_prompt": (FUSED_GENERATION_PROMPT_TEMPLATE, ["tech_stack", "difficulty"]),
+}
+
+_prompts = {}
+_lock = threading.Lock()
+
+
+def get_prompt(name: str):
+    prompt = _prompts.get(name)
+    if prompt is None:
+        from langchain_core.prompts import PromptTemplate
+        template, input_variables = PROMPT_DEFINITIONS[name]
+        with _lock:
+            prompt = _prompts.setdefault(name, PromptTemplate(
+                template=template,
+                input_variables=input_variables,
+                partial_variables={
+                    "format_instructions": "" # This will be filled in by the parser
+                }
+            ))
+    return prompt
+
+
+class CompiledPrompt:
+    """A prompt template parsed once, with its static parts pre-rendered per tech stack.
+
+    PromptTemplate re-parses the f-string template on every call. Here the
+    template is split into literal text and fields once; the static variables
+    (format instructions) and the tech stack are then substituted once per
+    stack and cached, so rendering a request's prompt only joins the cached
+    text with the remaining per-request values (question, answer, ...).
+    """
+
+    def __init__(self, template: str, static: Optional[dict] = None, cache_size: int = PROMPT_CACHE_SIZE):
+        self.segments = [(literal, field) for literal, field, _, _ in Formatter().parse(template)]
+        self.static = dict(static or {})
+        self.for_stack = lru_cache(maxsize=cache_size)(self._compile)
+
+    def _compile(self, tech_stack: Optional[str]):
+        """(literals, fields) with len(literals) == len(fields) + 1, tech stack and statics filled in."""
+        static = dict(self.static, tech_stack=tech_stack) if tech_stack is not None else self.static
+        literals, fields, text = [], [], ""
+        for literal, field in self.segments:
+            text += literal
+            if field is None:
+                continue
+            if field in static:
+                text += str(static[field])
+            else:
+                literals.append(text)
+                fields.append(field)
+                text = ""
+        literals.append(text)
+        return tuple(literals), tuple(fields)
+
+    def format(self, **values) -> str:
+        literals, fields = self.for_stack(values.get("tech_stack"))
+        parts = [literals[0]]
+        for field, literal in zip(fields, literals[1:]):
+            parts.append(str(values[field]))
+            parts.append(literal)
+        return "".join(parts)
+
+
+def compile_prompt(name: str, template: Optional[str] = None, **static) -> CompiledPrompt:
+    return CompiledPrompt(template or PROMPT_DEFINITIONS[name][0], static)
+
+
+def __getattr__(name):
+    if name in PROMPT_DEFINITIONS:
+        return get_prompt(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
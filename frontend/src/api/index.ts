@@ -17,22 +17,79 @@ export interface Session {
     questions: Question[];
 }
 
+export interface SessionSummary {
+    id: number;
+    created_at: string;
+    difficulty: string;
+    tech_stack: string;
+    question_count: number;
+    answered_count: number;
+    avg_score_correctness: number | null;
+    avg_score_efficiency: number | null;
+    avg_score_clarity: number | null;
+}
+
+export interface SessionPage {
+    items: SessionSummary[];
+    next_cursor: string | null;
+}
+
 export interface Question {
     id: number;
     question_text: string;
     difficulty: string;
+    answer?: AnswerResponse | null;
+}
+
+export interface Evaluation {
+    score_correctness: number;
+    score_efficiency: number;
+    score_clarity: number;
+    // null in answers listed with a session; fetch the answer for its feedback.
+    feedback: string | null;
+    overall_assessment: string;
 }
 
 export interface AnswerResponse {
     id: number;
     user_answer: string;
-    feedback_json: {
-        score_correctness: number;
-        score_efficiency: number;
-        score_clarity: number;
-        feedback: string;
-        overall_assessment: string;
-    };
+    status?: 'pending' | 'completed' | 'failed';
+    feedback_json: Evaluation;
+}
+
+// Answers submitted in async mode have no evaluation until their job is done.
+export interface AnswerStatus extends Omit<AnswerResponse, 'feedback_json'> {
+    question_id: number;
+    feedback_json: Evaluation | null;
+    error?: string | null;
+}
+
+export interface EvaluationJob {
+    job_id: number;
+    answer_id: number;
+    status: string;
+    poll_url: string;
+}
+
+export interface BatchEvaluationResult {
+    question_id: number;
+    answer_id: number | null;
+    status: 'completed' | 'failed';
+    feedback_json: Evaluation | null;
+    error?: string | null;
+}
+
+export interface SessionEvaluation {
+    session_id: number;
+    mode: 'new' | 'regrade';
+    evaluated: number;
+    failed: number;
+    avg_score_correctness: number | null;
+    avg_score_efficiency: number | null;
+    avg_score_clarity: number | null;
+    assessments: Record<string, number>;
+    elapsed_ms: number;
+    results: BatchEvaluationResult[];
 }
 
 export const createSession = async (difficulty: string, tech_stack: string) => {
@@ -40,13 +97,18 @@ export const createSession = async (difficulty: string, tech_stack: string) => {
     return response.data;
 };
 
-export const getSession = async (sessionId: number) => {
-    const response = await api.get<Session>(`/sessions/${sessionId}`);
+export const getSession = async (sessionId: number, includeAnswers = false) => {
+    const response = await api.get<Session>(
+        `/sessions/${sessionId}`,
+        includeAnswers ? { params: { include: 'answers' } } : undefined
+    );
     return response.data;
 };
 
-export const getSessions = async () => {
-    const response = await api.get<Session[]>('/sessions');
+export const getSessions = async (cursor?: string | null, limit = 20) => {
+    const response = await api.get<SessionPage>('/sessions', {
+        params: cursor ? { cursor, limit } : { limit },
+    });
     return response.data;
 };
 
@@ -72,4 +134,85 @@ export const submitAnswer = async (questionId: number, userAnswer: string) => {
     return response.data;
 };
 
+// Stores the answer immediately; the evaluation is done in the background.
+export const submitAnswerAsync = async (questionId: number, userAnswer: string) => {
+    const response = await api.post<EvaluationJob>(
+        `/questions/${questionId}/answer`,
+        { question_id: questionId, user_answer: userAnswer },
+        { params: { mode: 'async' } }
+    );
+    return response.data;
+};
+
+// Long-polls for up to `wait` seconds while the answer is still pending.
+export const getAnswer = async (answerId: number, wait = 25) => {
+    const response = await api.get<AnswerStatus>(`/answers/${answerId}`, { params: { wait } });
+    return response.data;
+};
+
+export const waitForEvaluation = async (answerId: number) => {
+    let answer = await getAnswer(answerId);
+    while (answer.status === 'pending') {
+        answer = await getAnswer(answerId);
+    }
+    return answer;
+};
+
+// Grades all given answers concurrently; with no answers, re-grades the stored ones.
+export const evaluateSession = async (
+    sessionId: number,
+    answers: { question_id: number; user_answer: string }[] = [],
+    fresh = false
+) => {
+    const response = await api.post<SessionEvaluation>(`/sessions/${sessionId}/evaluate`, { answers, fresh });
+    return response.data;
+};
+
+export type InterviewMessage =
+    | { type: 'question'; data: Question; prefetched: boolean }
+    | { type: 'field'; data: { field: string; value: number | string } }
+    | { type: 'feedback'; data: { delta: string } }
+    | { type: 'done'; data: AnswerResponse }
+    | { type: 'pong'; data: Record<string, never> }
+    | { type: 'error'; data: { detail: string; context: string; retry_after?: number } };
+
+export interface InterviewChannel {
+    nextQuestion: (difficulty?: "Easy" | "Medium" | "Hard") => void;
+    answer: (questionId: number, userAnswer: string) => void;
+    close: () => void;
+}
+
+// One WebSocket for the whole interview. Evaluations stream as field/feedback/done
+// messages and, with prefetch (the default), the server pushes the next question
+// right after `done`, so only the first question has to be asked for.
+export const openInterviewChannel = (
+    sessionId: number,
+    onMessage: (message: InterviewMessage) => void,
+    options: { prefetch?: boolean; difficulty?: "Easy" | "Medium" | "Hard" } = {}
+): InterviewChannel => {
+    const url = new URL(`ws/sessions/${sessionId}`, API_URL.endsWith('/') ? API_URL : `${API_URL}/`);
+    url.protocol = url.protocol === 'https:' ? 'wss:' : 'ws:';
+    if (options.prefetch === false) url.searchParams.set('prefetch', 'false');
+    if (options.difficulty) url.searchParams.set('difficulty', options.difficulty);
+
+    const socket = new WebSocket(url);
+    const queued: string[] = [];
+    socket.onopen = () => queued.splice(0).forEach((message) => socket.send(message));
+    socket.onmessage = (event) => onMessage(JSON.parse(event.data) as InterviewMessage);
+    const send = (message: object) => {
+        const text = JSON.stringify(message);
+        if (socket.readyState === WebSocket.OPEN) {
+            socket.send(text);
+        } else {
+            queued.push(text);
+        }
+    };
+
+    return {
+        nextQuestion: (difficulty) => send(difficulty ? { type: 'next_question', difficulty } : { type: 'next_question' }),
+        answer: (questionId, userAnswer) => send({ type: 'answer', question_id: questionId, user_answer: userAnswer }),
+        close: () => socket.close(),
+    };
+};
+
 export default api;
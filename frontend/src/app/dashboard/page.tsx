@@ -3,15 +3,17 @@
 import { useEffect, useState } from "react";
 import Link from "next/link";
 import { useRouter } from "next/navigation";
-import { getSessions, createSession, Session } from "@/api";
+import { getSessions, createSession, SessionSummary } from "@/api";
 import { Button } from "@/components/ui/button";
 import { Card, CardHeader, CardTitle, CardContent } from "@/components/ui/card";
 import { Plus, Calendar, ArrowRight, Loader2, LayoutDashboard } from "lucide-react";
 import { motion } from "framer-motion";
 
 export default function Dashboard() {
-    const [sessions, setSessions] = useState<Session[]>([]);
+    const [sessions, setSessions] = useState<SessionSummary[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [loading, setLoading] = useState(true);
+    const [loadingMore, setLoadingMore] = useState(false);
     const [creating, setCreating] = useState(false);
     const [selectedStack, setSelectedStack] = useState("Python");
     const router = useRouter();
@@ -22,8 +24,9 @@ export default function Dashboard() {
 
     const loadSessions = async () => {
         try {
-            const data = await getSessions();
-            setSessions(data);
+            const page = await getSessions();
+            setSessions(page.items);
+            setNextCursor(page.next_cursor);
         } catch (error) {
             console.error("Failed to load sessions", error);
         } finally {
@@ -31,6 +34,20 @@ export default function Dashboard() {
         }
     };
 
+    const loadMoreSessions = async () => {
+        if (!nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const page = await getSessions(nextCursor);
+            setSessions(prev => [...prev, ...page.items]);
+            setNextCursor(page.next_cursor);
+        } catch (error) {
+            console.error("Failed to load more sessions", error);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleNewSession = async () => {
         setCreating(true);
         try {
@@ -122,7 +139,7 @@ export default function Dashboard() {
                                 key={session.id}
                                 initial={{ opacity: 0, y: 20 }}
                                 animate={{ opacity: 1, y: 0 }}
-                                transition={{ delay: index * 0.1 }}
+                                transition={{ delay: Math.min(index % 20, 10) * 0.1 }}
                             >
                                 <Link href={`/interview/${session.id}`}>
                                     <Card className="hover:shadow-md transition-shadow cursor-pointer border-slate-200 bg-white hover:border-indigo-200 group">
@@ -152,6 +169,14 @@ export default function Dashboard() {
                                                     day: 'numeric'
                                                 })}
                                             </div>
+                                            <div className="mt-2 text-sm text-slate-500">
+                                                {session.answered_count}/{session.question_count} answered
+                                                {session.avg_score_correctness !== null && (
+                                                    <span className="ml-2 text-slate-400">
+                                                        · avg {(((session.avg_score_correctness ?? 0) + (session.avg_score_efficiency ?? 0) + (session.avg_score_clarity ?? 0)) / 3).toFixed(1)}/5
+                                                    </span>
+                                                )}
+                                            </div>
                                         </CardContent>
                                     </Card>
                                 </Link>
@@ -159,6 +184,15 @@ export default function Dashboard() {
                         ))}
                     </div>
                 )}
+
+                {nextCursor && (
+                    <div className="flex justify-center mt-10">
+                        <Button onClick={loadMoreSessions} disabled={loadingMore} variant="outline" className="gap-2">
+                            {loadingMore && <Loader2 className="w-4 h-4 animate-spin" />}
+                            Load more
+                        </Button>
+                    </div>
+                )}
             </main>
         </div>
     );
@@ -0,0 +1,51 @@
+"""Gunicorn settings for running the API with several uvicorn worker processes.
+
+    gunicorn -c gunicorn.conf.py backend.main:app
+
+Before forking, the master creates/upgrades the database schema once
+(``python -m backend.migrations``) and turns it off for the workers, and it
+gives them a directory of lock files through which they share the LLM
+concurrency limits (LLM_MAX_CONCURRENCY, LLM_CHAIN_CONCURRENCY). On SIGTERM
+workers stop accepting connections, drain open ones for HTTP_DRAIN_TIMEOUT
+seconds and running evaluation jobs for EVALUATION_DRAIN_TIMEOUT seconds,
+all within GRACEFUL_TIMEOUT.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# One async worker per core is enough; each has its own DB pool and question pool.
+# Capped by default because containers often report the host's cores.
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(4, os.cpu_count() or 1))))
+worker_class = "backend.serving.UvicornWorker"
+# Seconds a worker gets after SIGTERM before it is killed.
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+# Seconds a worker may be unresponsive before the master restarts it.
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = 5
+# Workers import the app after the fork, with the environment set in on_starting.
+preload_app = False
+# Access log to stderr, like uvicorn on its own.
+accesslog = "-"
+
+# Lock directory created here (and removed on exit) when none was configured.
+_shared_limits_dir = None
+
+
+def on_starting(server):
+    global _shared_limits_dir
+    server.log.info("Creating/upgrading the database schema")
+    subprocess.run([sys.executable, "-m", "backend.migrations"], check=True)
+    os.environ["DB_CREATE_SCHEMA"] = "false"
+    if not os.getenv("LLM_SHARED_LIMITS_DIR"):
+        _shared_limits_dir = tempfile.mkdtemp(prefix="ai-interviewer-llm-")
+        os.environ["LLM_SHARED_LIMITS_DIR"] = _shared_limits_dir
+    server.log.info("LLM limits shared by workers through %s", os.environ["LLM_SHARED_LIMITS_DIR"])
+
+
+def on_exit(server):
+    if _shared_limits_dir is not None:
+        shutil.rmtree(_shared_limits_dir, ignore_errors=True)